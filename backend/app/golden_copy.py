@@ -0,0 +1,493 @@
+"""Local index of the GLEIF golden-copy files.
+
+GLEIF publishes the full Level 1 (LEI-CDF) and Level 2 (RR-CDF) data as
+concatenated XML or CSV files, usually zipped.  ``ingest`` streams those files
+into a compact SQLite store so the proxy can answer record, children and
+ultimate-parent lookups without touching the rate-limited API.
+
+Usage (from the ``backend`` directory)::
+
+    python -m app.golden_copy --lei-file 20240101-gleif-concatenated-file-lei2.xml.zip \\
+        --rr-file 20240101-gleif-concatenated-file-rr.xml.zip --out golden.sqlite
+
+Records are stored in the same JSON:API shape the upstream ``lei-records``
+endpoint returns, so ``_map_row`` and ``_map_details`` work on them unchanged.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import csv
+import io
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zipfile
+import zlib
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, IO, Iterator, List, Optional, Tuple, TypeVar
+from xml.etree.ElementTree import iterparse
+
+from app.matching import normalize_name, trigrams
+
+logger = logging.getLogger("gleif.golden_copy")
+
+_BATCH = 5000
+
+_T = TypeVar("_T")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (lei TEXT PRIMARY KEY, data BLOB NOT NULL) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS direct_parent (child TEXT PRIMARY KEY, parent TEXT NOT NULL) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS ultimate_parent (child TEXT PRIMARY KEY, parent TEXT NOT NULL) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL) WITHOUT ROWID;
+"""
+
+# Trigram full-text index over normalised legal names, used by /api/match.
+_NAMES_SCHEMA = "CREATE VIRTUAL TABLE IF NOT EXISTS names USING fts5(lei UNINDEXED, display UNINDEXED, name, tokenize='trigram')"
+
+_INDEXES = """
+CREATE INDEX IF NOT EXISTS direct_parent_by_parent ON direct_parent (parent, child);
+CREATE INDEX IF NOT EXISTS ultimate_parent_by_parent ON ultimate_parent (parent, child);
+"""
+
+# ---------------------------------------------------------------------------
+# Read side
+# ---------------------------------------------------------------------------
+
+class GoldenCopyStore:
+    """Read-only view over an ingested golden-copy database.
+
+    Lookups return ``None`` when the LEI is not in the store, so callers can
+    tell "unknown here, ask upstream" apart from "known, with no children".
+    The lookups block; async callers go through :meth:`run`.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._db = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        # False when the store was built by an SQLite without FTS5 trigram support
+        self.with_names = (
+            self._db.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'names'").fetchone()
+            is not None
+        )
+        self._lock = threading.Lock()
+
+    async def run(self, lookup: Callable[..., _T], *args: Any) -> _T:
+        """Run ``lookup(*args)`` in a worker thread, one at a time on the shared connection."""
+
+        def locked() -> _T:
+            with self._lock:
+                return lookup(*args)
+
+        return await asyncio.to_thread(locked)
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def has(self, lei: str) -> bool:
+        return self._db.execute("SELECT 1 FROM records WHERE lei = ?", (lei,)).fetchone() is not None
+
+    def record(self, lei: str) -> Optional[dict]:
+        row = self._db.execute("SELECT data FROM records WHERE lei = ?", (lei,)).fetchone()
+        return _decode(row[0]) if row else None
+
+    def records(self, leis: List[str]) -> Dict[str, dict]:
+        out: Dict[str, dict] = {}
+        for i in range(0, len(leis), 500):
+            chunk = leis[i : i + 500]
+            marks = ",".join("?" * len(chunk))
+            for lei, data in self._db.execute(f"SELECT lei, data FROM records WHERE lei IN ({marks})", chunk):
+                out[lei] = _decode(data)
+        return out
+
+    def direct_children(self, lei: str) -> Optional[List[str]]:
+        if not self.has(lei):
+            return None
+        rows = self._db.execute("SELECT child FROM direct_parent WHERE parent = ? ORDER BY child", (lei,))
+        return [r[0] for r in rows]
+
+    def direct_children_many(self, leis: List[str]) -> Dict[str, List[str]]:
+        """Batched :meth:`direct_children`; LEIs not in the store are left out."""
+        out: Dict[str, List[str]] = {}
+        for i in range(0, len(leis), 500):
+            chunk = leis[i : i + 500]
+            marks = ",".join("?" * len(chunk))
+            for (lei,) in self._db.execute(f"SELECT lei FROM records WHERE lei IN ({marks})", chunk):
+                out[lei] = []
+            rows = self._db.execute(
+                f"SELECT parent, child FROM direct_parent WHERE parent IN ({marks}) ORDER BY parent, child", chunk
+            )
+            for parent, child in rows:
+                if parent in out:
+                    out[parent].append(child)
+        return out
+
+    def ultimate_parent(self, lei: str) -> Tuple[bool, Optional[str]]:
+        """Return ``(known, parent)``; ``parent`` is ``None`` for top-level entities."""
+        row = self._db.execute("SELECT parent FROM ultimate_parent WHERE child = ?", (lei,)).fetchone()
+        if row:
+            return True, row[0]
+        return self.has(lei), None
+
+    def ultimate_children_count(self, lei: str) -> Optional[int]:
+        if not self.has(lei):
+            return None
+        return self._db.execute("SELECT COUNT(*) FROM ultimate_parent WHERE parent = ?", (lei,)).fetchone()[0]
+
+    def name_candidates(self, normalized: str, limit: int = 50) -> List[Tuple[str, str]]:
+        """Return ``(lei, legal name)`` pairs ranked by trigram overlap with ``normalized``."""
+        grams = [g for g in trigrams(normalized) if g.strip() == g and len(g) == 3]
+        if not grams or not self.with_names:
+            return []
+        query = " OR ".join('"' + g.replace('"', '""') + '"' for g in grams)
+        try:
+            rows = self._db.execute(
+                "SELECT lei, display FROM names WHERE names MATCH ? ORDER BY bm25(names) LIMIT ?",
+                (query, limit),
+            ).fetchall()
+        except sqlite3.OperationalError:  # this SQLite can't read the FTS5 index
+            return []
+        return [(lei, display) for lei, display in rows]
+
+
+def open_store(path: Optional[str]) -> Optional[GoldenCopyStore]:
+    if not path:
+        return None
+    if not os.path.exists(path):
+        logger.warning("Golden-copy store %s not found; using the GLEIF API only", path)
+        return None
+    return GoldenCopyStore(path)
+
+
+def _encode(record: dict) -> bytes:
+    return zlib.compress(json.dumps(record, separators=(",", ":")).encode("utf-8"), 6)
+
+
+def _decode(blob: bytes) -> dict:
+    return json.loads(zlib.decompress(blob))
+
+# ---------------------------------------------------------------------------
+# Source readers
+# ---------------------------------------------------------------------------
+
+@contextmanager
+def _open_source(path: str) -> Iterator[Tuple[IO[bytes], str]]:
+    """Yield a binary stream and its format (``xml`` or ``csv``), unzipping on the fly."""
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as zf:
+            members = [m for m in zf.namelist() if m.lower().endswith((".xml", ".csv"))]
+            if not members:
+                raise ValueError(f"{path}: no .xml or .csv member in archive")
+            with zf.open(members[0]) as fh:
+                yield fh, members[0].lower().rsplit(".", 1)[1]
+    else:
+        fmt = "csv" if path.lower().endswith(".csv") else "xml"
+        with open(path, "rb") as fh:
+            yield fh, fmt
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _child_text(elem: Any, name: str) -> Optional[str]:
+    for child in elem:
+        if _local(child.tag) == name:
+            text = (child.text or "").strip()
+            return text or None
+    return None
+
+
+def _child(elem: Any, name: str) -> Any:
+    for child in elem:
+        if _local(child.tag) == name:
+            return child
+    return None
+
+
+def _iter_xml(fh: IO[bytes], record_tag: str) -> Iterator[Any]:
+    """Stream ``record_tag`` elements, detaching each one after use to bound memory."""
+    stack: List[Any] = []
+    for event, elem in iterparse(fh, events=("start", "end")):
+        if event == "start":
+            stack.append(elem)
+            continue
+        stack.pop()
+        if _local(elem.tag) == record_tag:
+            yield elem
+            elem.clear()
+            if stack:
+                stack[-1].remove(elem)
+
+
+def _xml_address(elem: Any) -> Dict[str, Any]:
+    if elem is None:
+        return {}
+    lines = [
+        (c.text or "").strip()
+        for c in elem
+        if _local(c.tag) in ("FirstAddressLine", "AdditionalAddressLine") and (c.text or "").strip()
+    ]
+    return {
+        "language": elem.get("{http://www.w3.org/XML/1998/namespace}lang"),
+        "addressLines": lines,
+        "city": _child_text(elem, "City"),
+        "region": _child_text(elem, "Region"),
+        "country": _child_text(elem, "Country"),
+        "postalCode": _child_text(elem, "PostalCode"),
+    }
+
+
+def _lei_record(
+    lei: str,
+    *,
+    legal_name: Optional[str],
+    name_language: Optional[str],
+    legal_address: Dict[str, Any],
+    hq_address: Dict[str, Any],
+    ra_id: Optional[str],
+    ra_entity_id: Optional[str],
+    fields: Dict[str, Optional[str]],
+) -> dict:
+    """Build a record in the upstream ``lei-records`` JSON:API shape."""
+    return {
+        "type": "lei-records",
+        "id": lei,
+        "attributes": {
+            "lei": lei,
+            "entity": {
+                "legalName": {"name": legal_name, "language": name_language},
+                "legalAddress": legal_address,
+                "headquartersAddress": hq_address,
+                "registrationAuthority": {
+                    "registrationAuthorityID": ra_id,
+                    "registrationAuthorityEntityID": ra_entity_id,
+                },
+                "jurisdiction": fields.get("LegalJurisdiction"),
+                "category": fields.get("EntityCategory"),
+                "subCategory": fields.get("EntitySubCategory"),
+                "status": fields.get("EntityStatus"),
+                "creationDate": fields.get("EntityCreationDate"),
+                "expirationDate": fields.get("EntityExpirationDate"),
+            },
+            "registration": {
+                "initialRegistrationDate": fields.get("InitialRegistrationDate"),
+                "lastUpdateDate": fields.get("LastUpdateDate"),
+                "registrationStatus": fields.get("RegistrationStatus"),
+                "nextRenewalDate": fields.get("NextRenewalDate"),
+                "managingLou": fields.get("ManagingLOU"),
+                "validationSources": fields.get("ValidationSources"),
+            },
+            "managingLou": fields.get("ManagingLOU"),
+            "validationSources": fields.get("ValidationSources"),
+        },
+    }
+
+
+def _iter_lei_xml(fh: IO[bytes]) -> Iterator[Tuple[str, dict]]:
+    for rec in _iter_xml(fh, "LEIRecord"):
+        lei = _child_text(rec, "LEI")
+        entity = _child(rec, "Entity")
+        registration = _child(rec, "Registration")
+        if not lei or entity is None:
+            continue
+        name_el = _child(entity, "LegalName")
+        ra = _child(entity, "RegistrationAuthority")
+        fields: Dict[str, Optional[str]] = {}
+        for name in ("LegalJurisdiction", "EntityCategory", "EntitySubCategory", "EntityStatus",
+                     "EntityCreationDate", "EntityExpirationDate"):
+            fields[name] = _child_text(entity, name)
+        if registration is not None:
+            for name in ("InitialRegistrationDate", "LastUpdateDate", "RegistrationStatus",
+                         "NextRenewalDate", "ManagingLOU", "ValidationSources"):
+                fields[name] = _child_text(registration, name)
+        yield lei, _lei_record(
+            lei,
+            legal_name=(name_el.text or "").strip() if name_el is not None else None,
+            name_language=name_el.get("{http://www.w3.org/XML/1998/namespace}lang") if name_el is not None else None,
+            legal_address=_xml_address(_child(entity, "LegalAddress")),
+            hq_address=_xml_address(_child(entity, "HeadquartersAddress")),
+            ra_id=_child_text(ra, "RegistrationAuthorityID") if ra is not None else None,
+            ra_entity_id=_child_text(ra, "RegistrationAuthorityEntityID") if ra is not None else None,
+            fields=fields,
+        )
+
+
+def _csv_address(row: Dict[str, str], prefix: str) -> Dict[str, Any]:
+    lines = [row.get(f"{prefix}.FirstAddressLine") or ""]
+    lines += [row.get(f"{prefix}.AdditionalAddressLine.{i}") or "" for i in (1, 2, 3)]
+    return {
+        "language": row.get(f"{prefix}.xmllang") or None,
+        "addressLines": [x.strip() for x in lines if x.strip()],
+        "city": row.get(f"{prefix}.City") or None,
+        "region": row.get(f"{prefix}.Region") or None,
+        "country": row.get(f"{prefix}.Country") or None,
+        "postalCode": row.get(f"{prefix}.PostalCode") or None,
+    }
+
+
+def _iter_lei_csv(fh: IO[bytes]) -> Iterator[Tuple[str, dict]]:
+    for row in csv.DictReader(io.TextIOWrapper(fh, encoding="utf-8-sig", newline="")):
+        lei = (row.get("LEI") or "").strip()
+        if not lei:
+            continue
+        fields = {
+            name: (row.get(f"Entity.{name}") or None)
+            for name in ("LegalJurisdiction", "EntityCategory", "EntitySubCategory", "EntityStatus",
+                         "EntityCreationDate", "EntityExpirationDate")
+        }
+        fields.update({
+            name: (row.get(f"Registration.{name}") or None)
+            for name in ("InitialRegistrationDate", "LastUpdateDate", "RegistrationStatus",
+                         "NextRenewalDate", "ManagingLOU", "ValidationSources")
+        })
+        yield lei, _lei_record(
+            lei,
+            legal_name=row.get("Entity.LegalName") or None,
+            name_language=row.get("Entity.LegalName.xmllang") or None,
+            legal_address=_csv_address(row, "Entity.LegalAddress"),
+            hq_address=_csv_address(row, "Entity.HeadquartersAddress"),
+            ra_id=row.get("Entity.RegistrationAuthority.RegistrationAuthorityID") or None,
+            ra_entity_id=row.get("Entity.RegistrationAuthority.RegistrationAuthorityEntityID") or None,
+            fields=fields,
+        )
+
+
+# (child, parent, relationship type, relationship status)
+_Relationship = Tuple[str, str, str, Optional[str]]
+
+
+def _iter_rr_xml(fh: IO[bytes]) -> Iterator[_Relationship]:
+    for rec in _iter_xml(fh, "RelationshipRecord"):
+        rel = _child(rec, "Relationship")
+        if rel is None:
+            continue
+        start, end = _child(rel, "StartNode"), _child(rel, "EndNode")
+        child = _child_text(start, "NodeID") if start is not None else None
+        parent = _child_text(end, "NodeID") if end is not None else None
+        rel_type = _child_text(rel, "RelationshipType")
+        if child and parent and rel_type:
+            yield child, parent, rel_type, _child_text(rel, "RelationshipStatus")
+
+
+def _iter_rr_csv(fh: IO[bytes]) -> Iterator[_Relationship]:
+    for row in csv.DictReader(io.TextIOWrapper(fh, encoding="utf-8-sig", newline="")):
+        child = (row.get("Relationship.StartNode.NodeID") or "").strip()
+        parent = (row.get("Relationship.EndNode.NodeID") or "").strip()
+        rel_type = (row.get("Relationship.RelationshipType") or "").strip()
+        if child and parent and rel_type:
+            yield child, parent, rel_type, (row.get("Relationship.RelationshipStatus") or None)
+
+# ---------------------------------------------------------------------------
+# Ingestion
+# ---------------------------------------------------------------------------
+
+def ingest(out_path: str, lei_file: Optional[str] = None, rr_file: Optional[str] = None) -> Dict[str, int]:
+    """Stream the given golden-copy files into ``out_path`` and return row counts.
+
+    The database is built next to ``out_path`` and swapped in atomically, so a
+    running proxy never sees a half-written store.
+    """
+    tmp_path = f"{out_path}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    db = sqlite3.connect(tmp_path, isolation_level=None)
+    db.execute("PRAGMA journal_mode=OFF")
+    db.execute("PRAGMA synchronous=OFF")
+    db.executescript(_SCHEMA)
+    try:
+        db.execute(_NAMES_SCHEMA)
+        with_names = True
+    except sqlite3.OperationalError:
+        logger.warning("SQLite lacks FTS5 trigram support; skipping the legal-name index")
+        with_names = False
+    counts = {"records": 0, "direct": 0, "ultimate": 0}
+
+    db.execute("BEGIN")
+    if lei_file:
+        with _open_source(lei_file) as (fh, fmt):
+            reader = _iter_lei_csv(fh) if fmt == "csv" else _iter_lei_xml(fh)
+            batch: List[Tuple[str, bytes]] = []
+            names: List[Tuple[str, str, str]] = []
+            for lei, record in reader:
+                batch.append((lei, _encode(record)))
+                legal_name = record["attributes"]["entity"]["legalName"]["name"]
+                if with_names and legal_name:
+                    names.append((lei, legal_name, normalize_name(legal_name)))
+                if len(batch) >= _BATCH:
+                    db.executemany("INSERT OR REPLACE INTO records VALUES (?, ?)", batch)
+                    if with_names:
+                        db.executemany("INSERT INTO names VALUES (?, ?, ?)", names)
+                    counts["records"] += len(batch)
+                    batch.clear()
+                    names.clear()
+            db.executemany("INSERT OR REPLACE INTO records VALUES (?, ?)", batch)
+            if with_names:
+                db.executemany("INSERT INTO names VALUES (?, ?, ?)", names)
+            counts["records"] += len(batch)
+        logger.info("Ingested %d LEI records from %s", counts["records"], lei_file)
+
+    if rr_file:
+        with _open_source(rr_file) as (fh, fmt):
+            reader = _iter_rr_csv(fh) if fmt == "csv" else _iter_rr_xml(fh)
+            direct: List[Tuple[str, str]] = []
+            ultimate: List[Tuple[str, str]] = []
+            for child, parent, rel_type, status in reader:
+                if status and status.upper() != "ACTIVE":
+                    continue
+                if rel_type == "IS_DIRECTLY_CONSOLIDATED_BY":
+                    direct.append((child, parent))
+                elif rel_type == "IS_ULTIMATELY_CONSOLIDATED_BY":
+                    ultimate.append((child, parent))
+                if len(direct) >= _BATCH:
+                    db.executemany("INSERT OR REPLACE INTO direct_parent VALUES (?, ?)", direct)
+                    counts["direct"] += len(direct)
+                    direct.clear()
+                if len(ultimate) >= _BATCH:
+                    db.executemany("INSERT OR REPLACE INTO ultimate_parent VALUES (?, ?)", ultimate)
+                    counts["ultimate"] += len(ultimate)
+                    ultimate.clear()
+            db.executemany("INSERT OR REPLACE INTO direct_parent VALUES (?, ?)", direct)
+            db.executemany("INSERT OR REPLACE INTO ultimate_parent VALUES (?, ?)", ultimate)
+            counts["direct"] += len(direct)
+            counts["ultimate"] += len(ultimate)
+        logger.info("Ingested %d direct / %d ultimate relationships from %s",
+                    counts["direct"], counts["ultimate"], rr_file)
+
+    db.executemany(
+        "INSERT OR REPLACE INTO meta VALUES (?, ?)",
+        [
+            ("ingested_at", str(int(time.time()))),
+            ("lei_file", os.path.basename(lei_file or "")),
+            ("rr_file", os.path.basename(rr_file or "")),
+        ],
+    )
+    db.execute("COMMIT")
+    db.executescript(_INDEXES)
+    db.execute("VACUUM")
+    db.close()
+    os.replace(tmp_path, out_path)
+    return counts
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Build a local index from GLEIF golden-copy files.")
+    parser.add_argument("--lei-file", help="LEI-CDF concatenated file (.xml, .csv or .zip)")
+    parser.add_argument("--rr-file", help="RR-CDF concatenated file (.xml, .csv or .zip)")
+    parser.add_argument("--out", required=True, help="SQLite database to write")
+    args = parser.parse_args(argv)
+    if not args.lei_file and not args.rr_file:
+        parser.error("at least one of --lei-file/--rr-file is required")
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    counts = ingest(args.out, args.lei_file, args.rr_file)
+    logger.info("Wrote %s: %s", args.out, counts)
+
+
+if __name__ == "__main__":
+    main()
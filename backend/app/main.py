@@ -1,20 +1,69 @@
 from __future__ import annotations
 
 import asyncio
+import bisect
+import csv
+import hashlib
+import io
+import json
 import logging
 import random
 import re
+import sqlite3
+import sys
+import threading
 import time
 import os
-from collections import OrderedDict, deque
-from contextlib import asynccontextmanager
+import queue
+import uuid
+import zlib
+from collections import Counter, OrderedDict, deque
+from contextlib import asynccontextmanager, contextmanager, nullcontext
+from contextvars import ContextVar
 from email.utils import parsedate_to_datetime
-from typing import Any, Dict, List, Optional, Set, Callable, Awaitable
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Set, Callable, Awaitable
 
 import httpx
-from fastapi import FastAPI, HTTPException, Request, Response
+import pydantic_core
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+from app.golden_copy import GoldenCopyStore, open_store
+from app.matching import NameIndex, normalize_name, score_normalized
+from app.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, Registry, Sample, histogram_samples
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # optional, only needed for COORDINATION_BACKEND=redis
+    aioredis = None
+
+try:
+    import orjson
+except ImportError:  # optional, speeds up encoding of large hierarchy results
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # optional, enables Content-Encoding: br
+    brotli = None
+
+try:
+    import msgpack
+except ImportError:  # optional, enables the MessagePack flavour of the columnar format
+    msgpack = None
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # optional, enables the Parquet flavour of the ultimate-children export
+    pyarrow = None
+
+try:
+    import h2
+except ImportError:  # optional (httpx[http2]), enables HTTP/2 to GLEIF
+    h2 = None
 
 # ---------------------------------------------------------------------------
 # Logging
@@ -42,6 +91,41 @@ class Row(BaseModel):
     spglobal: Optional[List[str]] = None
 
 
+_ROW_FIELDS = tuple(Row.model_fields)
+# Values repeated across a group (and LEIs, which reappear as parentLei) are
+# interned so every node shares one string object.
+_INTERNED_ROW_FIELDS = frozenset(
+    {"lei", "status", "jurisdiction", "countryCode", "managingLOU", "registrationAuthorityName"}
+)
+# Rows held for a long time (graph edges, hierarchy snapshots) are kept as a
+# tuple of field values in _ROW_FIELDS order, about a fifth of a Row model.
+PackedRow = tuple
+
+
+def _pack_fields(values: Dict[str, Any]) -> PackedRow:
+    packed = []
+    for field in _ROW_FIELDS:
+        value = values.get(field)
+        if value is not None:
+            if field in _INTERNED_ROW_FIELDS:
+                value = sys.intern(value)
+            elif field == "spglobal":
+                value = tuple(value)
+        packed.append(value)
+    return tuple(packed)
+
+
+def _pack_row(row: Row) -> PackedRow:
+    return _pack_fields(row.__dict__)
+
+
+def _unpack_row(packed: PackedRow) -> Row:
+    values = dict(zip(_ROW_FIELDS, packed))
+    if values["spglobal"] is not None:
+        values["spglobal"] = list(values["spglobal"])
+    return Row.model_construct(**values)
+
+
 class Address(BaseModel):
     language: Optional[str] = None
     addressLines: List[str] = []
@@ -74,9 +158,14 @@ class LeiDetails(BaseModel):
     entityExpirationDate: Optional[str] = None
 
 
+class BatchLeiRequest(BaseModel):
+    leis: List[str]
+
+
 class HierarchyNode(BaseModel):
     entity: Row
     children: List["HierarchyNode"] = []
+    truncated: bool = False  # children not (fully) explored due to max_nodes/max_depth
 
 
 class HierarchyShape(BaseModel):
@@ -86,48 +175,939 @@ class HierarchyShape(BaseModel):
     ultimateChildrenCount: int
     visitedCount: int
 
+
+class LeiView(BaseModel):
+    lei: str  # the LEI that children and childCounts describe
+    ultimateParent: Optional[Row] = None
+    children: Optional[List[Row]] = None
+    childCounts: Optional[Dict[str, int]] = None  # direct-children count of lei and its first children
+    shape: Optional[HierarchyShape] = None
+
+
+class MatchRequest(BaseModel):
+    names: List[str]
+    limit: int = Field(3, ge=1, le=25)  # matches returned per name
+    minScore: int = Field(0, ge=0, le=100)
+
+
+class NameMatch(BaseModel):
+    lei: str
+    legalName: Optional[str] = None
+    jurisdiction: Optional[str] = None
+    status: Optional[str] = None
+    score: int
+    matchType: str  # Exact | Strong | Partial | Weak
+
+
+class MatchResult(BaseModel):
+    input: str
+    normalized: str
+    matches: List[NameMatch] = []
+    source: str  # local | gleif | none
+
+
+class HierarchyJobRequest(BaseModel):
+    lei: str
+    view: str = Field("flat", pattern="^(flat|shape)$")
+    maxNodes: Optional[int] = Field(None, ge=1, le=20000)  # defaults to the endpoint's cap
+
+
+class Job(BaseModel):
+    id: str
+    kind: str
+    params: Dict[str, Any] = {}
+    status: str = "queued"  # queued | running | done | failed
+    progress: Dict[str, int] = {}
+    result: Any = None
+    error: Optional[str] = None
+    createdAt: float
+    updatedAt: float
+
+# ---------------------------------------------------------------------------
+# Metrics and per-request cost accounting
+# ---------------------------------------------------------------------------
+
+_metrics = Registry()
+_http_requests = _metrics.counter(
+    "http_requests_total", "Requests served, by route template, method and status.", ("route", "method", "status")
+)
+_http_duration = _metrics.histogram(
+    "http_request_duration_seconds", "Time until the response started, by route template.", ("route",)
+)
+_response_cache = _metrics.counter(
+    "http_response_cache_total", "Encoded-response cache lookups, by route and result.", ("route", "result")
+)
+_gleif_requests = _metrics.counter(
+    "gleif_requests_total", "GLEIF API attempts, by upstream route and status.", ("route", "status")
+)
+_gleif_duration = _metrics.histogram(
+    "gleif_request_duration_seconds", "GLEIF API latency per attempt, by upstream route.", ("route",)
+)
+_gleif_retries = _metrics.counter("gleif_retries_total", "GLEIF API retries, by reason.", ("reason",))
+_gleif_concurrency_wait = _metrics.histogram(
+    "gleif_concurrency_wait_seconds", "Time spent waiting for an adaptive concurrency slot."
+)
+_derived_answers = _metrics.counter(
+    "hierarchy_derived_total", "Counts and shapes answered from data already held instead of GLEIF, by kind.", ("kind",)
+)
+_gleif_connect_duration = _metrics.histogram(
+    "gleif_connect_seconds", "Setup time of new GLEIF connections, by step (connect_tcp, start_tls).", ("step",)
+)
+
+
+class _RequestCost:
+    """Upstream calls, waits and cache lookups made on behalf of one request.
+
+    Tasks started while serving the request (single-flight loads, crawls)
+    inherit it, so a request that starts a crawl is charged for all of it;
+    a request that joins someone else's crawl is not.
+    """
+
+    __slots__ = (
+        "started", "upstream_calls", "upstream_seconds", "wait_seconds", "cache_hits", "cache_misses", "stale_seconds"
+    )
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.upstream_calls = 0
+        self.upstream_seconds = 0.0
+        self.wait_seconds = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # How far past expiry the stalest cached value used for the request was
+        self.stale_seconds = 0.0
+
+    def server_timing(self) -> str:
+        total = (time.perf_counter() - self.started) * 1000
+        return (
+            f'upstream;dur={self.upstream_seconds * 1000:.1f};desc="{self.upstream_calls} GLEIF calls", '
+            f'wait;dur={self.wait_seconds * 1000:.1f};desc="rate limit and concurrency", '
+            f'cache;desc="{self.cache_hits} hits, {self.cache_misses} misses", '
+            f"total;dur={total:.1f}"
+        )
+
+
+_request_cost: ContextVar[Optional[_RequestCost]] = ContextVar("request_cost", default=None)
+
 # ---------------------------------------------------------------------------
 # TTL + LRU Cache  (thread-safe for single-process async use)
 # ---------------------------------------------------------------------------
 
+# Keys read while producing a response.  Set by _cached_json so a response
+# later served from its encoded cache still counts as use of its sources.
+_cache_reads: ContextVar[Optional[List[str]]] = ContextVar("cache_reads", default=None)
+
+
+_MISSING = object()
+
+
 class TTLCache:
-    """In-memory cache with per-key TTL and LRU eviction."""
+    """In-memory cache with per-key TTL and LRU eviction.
+
+    An optional second tier (``l2``) is written through for the key kinds
+    it persists.  ``get`` only looks in memory; ``aget`` / ``aget_many``
+    also fall back to ``l2``, reading it in a worker thread.  Hits are counted per stored
+    value so a refresher can find hot keys; a key marked as refreshing is
+    served past its expiry until the new value is set.  Expired entries are
+    kept for ``grace_seconds`` more and served while ``serve_stale()`` says
+    upstream is unavailable.  With ``max_bytes`` the cache is also bounded
+    by the total ``sizeof`` of its values.  ``version`` tells whether a key
+    was stored again since it was last seen.  ``lookups``, ``writes`` and
+    ``evictions`` are totals by key kind for /metrics.
+    """
 
-    def __init__(self, ttl_seconds: int = 300, max_size: int = 2048) -> None:
+    def __init__(
+        self,
+        ttl_seconds: int = 300,
+        max_size: int = 2048,
+        grace_seconds: int = 0,
+        max_bytes: int = 0,
+        sizeof: Callable[[Any], int] = lambda value: 0,
+    ) -> None:
         self._ttl = ttl_seconds
         self._max = max_size
+        self._grace = grace_seconds
+        self._max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._sizes: Dict[str, int] = {}
+        self.nbytes = 0
+        self.serve_stale: Callable[[], bool] = lambda: False
         self._store: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._hits: Dict[str, int] = {}
+        self._versions: Dict[str, int] = {}
+        self._stored = 0
+        self._refreshing: Set[str] = set()
+        self.l2: Optional[DiskCache] = None
+        self.lookups: Counter[tuple[str, str]] = Counter()
+        self.writes: Counter[str] = Counter()
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    @property
+    def ttl(self) -> int:
+        """Default lifetime of an entry, in seconds."""
+        return self._ttl
 
     def get(self, key: str) -> Any:
+        value = self._get_l1(key)
+        if value is _MISSING:
+            self._count(key, "miss")
+            return None
+        return value
+
+    async def aget(self, key: str) -> Any:
+        value = self._get_l1(key)
+        if value is not _MISSING:
+            return value
+        if self.l2 is None or not self.l2.accepts(key):
+            self._count(key, "miss")
+            return None
+        return self._got_l2(key, await asyncio.to_thread(self.l2.get, key))
+
+    async def aget_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Look up several keys, reading all ``l2`` misses in one worker-thread call."""
+        found: Dict[str, Any] = {}
+        l2_keys: List[str] = []
+        for key in keys:
+            value = self._get_l1(key)
+            if value is not _MISSING:
+                found[key] = value
+            elif self.l2 is not None and self.l2.accepts(key):
+                l2_keys.append(key)
+            else:
+                self._count(key, "miss")
+        if l2_keys:
+            loaded = await asyncio.to_thread(self.l2.get_many, l2_keys)
+            for key in l2_keys:
+                value = self._got_l2(key, loaded.get(key))
+                if value is not None:
+                    found[key] = value
+        return found
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        self.writes[key.split(":", 2)[1]] += 1
+        self._put(key, value, ttl)
+        if self.l2 is not None:
+            self.l2.set(key, value)
+
+    def prime(self, key: str, value: Any, *, write_through: bool = False) -> None:
+        """Store a value loaded from elsewhere (a warm-up), not counted as a write.
+
+        ``l2`` is only written when ``write_through`` is set; a value read
+        from it need not go back.
+        """
+        self._put(key, value)
+        if write_through and self.l2 is not None:
+            self.l2.set(key, value)
+
+    def delete(self, key: str) -> None:
+        self._drop(key)
+        if self.l2 is not None:
+            self.l2.delete(key)
+
+    def version(self, key: str) -> Optional[int]:
+        """A number that changes whenever ``key`` is stored; ``None`` while it isn't in memory."""
+        return self._versions.get(key)
+
+    def clear(self) -> None:
+        """Drop every in-memory entry (the second tier is left alone)."""
+        self._store.clear()
+        self._hits.clear()
+        self._versions.clear()
+        self._sizes.clear()
+        self.nbytes = 0
+
+    def resize(self, key: str) -> None:
+        """Re-measure a stored value that grew in place."""
+        item = self._store.get(key)
+        if item is not None and self._max_bytes:
+            self._account(key, self._sizeof(item[1]))
+            self._shrink(keep=key)
+
+    def touch(self, keys: Iterable[str]) -> None:
+        """Count a hit on each stored key without reading it."""
+        for key in keys:
+            if key in self._store:
+                self._hits[key] = self._hits.get(key, 0) + 1
+
+    def refresh_candidates(self, kinds: Set[str], within: float, min_hits: int) -> List[str]:
+        """Keys of ``kinds`` hit ``min_hits`` times that expire within ``within`` seconds, hottest first."""
+        deadline = time.time() + within
+        keys = [
+            key
+            for key, (expires_at, _) in self._store.items()
+            if expires_at <= deadline
+            and self._hits.get(key, 0) >= min_hits
+            and key not in self._refreshing
+            and key.split(":", 2)[1] in kinds
+        ]
+        return sorted(keys, key=lambda k: self._hits[k], reverse=True)
+
+    def begin_refresh(self, key: str) -> None:
+        self._refreshing.add(key)
+
+    def end_refresh(self, key: str) -> None:
+        self._refreshing.discard(key)
+
+    def _get_l1(self, key: str) -> Any:
+        """The in-memory value for ``key``, or ``_MISSING``."""
+        reads = _cache_reads.get()
+        if reads is not None:
+            reads.append(key)
         item = self._store.get(key)
         if item is None:
-            return None
+            return _MISSING
         expires_at, value = item
-        if time.time() > expires_at:
-            self._store.pop(key, None)
-            return None
+        stale_for = time.time() - expires_at
+        if stale_for > 0 and key not in self._refreshing:
+            if stale_for > self._grace:
+                self._drop(key)
+                return _MISSING
+            if not self.serve_stale():
+                # Kept in case upstream fails before a fresh value replaces it
+                return _MISSING
         # Move to end (most-recently used)
         self._store.move_to_end(key)
+        self._hits[key] = self._hits.get(key, 0) + 1
+        self._count(key, "stale" if stale_for > 0 else "hit", stale_for)
+        if self.l2 is not None:
+            self.l2.note_hit(key)
         return value
 
-    def set(self, key: str, value: Any) -> None:
+    def _got_l2(self, key: str, value: Any) -> Any:
+        if value is not None:
+            self._put(key, value)
+        self._count(key, "miss" if value is None else "l2_hit")
+        return value
+
+    def _count(self, key: str, result: str, stale_for: float = 0.0) -> None:
+        self.lookups[key.split(":", 2)[1], result] += 1
+        cost = _request_cost.get()
+        if cost is not None:
+            if result == "miss":
+                cost.cache_misses += 1
+            else:
+                cost.cache_hits += 1
+                cost.stale_seconds = max(cost.stale_seconds, stale_for)
+
+    def _put(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        size = self._sizeof(value) if self._max_bytes else 0
+        if size > self._max_bytes // 4:
+            # Too big to be worth pushing everything else out for
+            self._drop(key)
+            return
         # Update existing key or insert new
         if key in self._store:
             self._store.move_to_end(key)
         elif len(self._store) >= self._max:
             # Evict least-recently used (front of OrderedDict)
-            self._store.popitem(last=False)
-        self._store[key] = (time.time() + self._ttl, value)
+            self._drop(next(iter(self._store)))
+            self.evictions += 1
+        self._store[key] = (time.time() + (self._ttl if ttl is None else ttl), value)
+        self._stored += 1
+        self._versions[key] = self._stored
+        # A new value starts cold; it has to earn another refresh
+        self._hits.pop(key, None)
+        if self._max_bytes:
+            self._account(key, size)
+            self._shrink(keep=key)
+
+    def _drop(self, key: str) -> None:
+        self._store.pop(key, None)
+        self._hits.pop(key, None)
+        self._versions.pop(key, None)
+        self.nbytes -= self._sizes.pop(key, 0)
+
+    def _account(self, key: str, size: int) -> None:
+        self.nbytes += size - self._sizes.get(key, 0)
+        self._sizes[key] = size
+
+    def _shrink(self, keep: str) -> None:
+        """Evict least-recently used entries until within ``max_bytes``, sparing ``keep``."""
+        while self.nbytes > self._max_bytes and len(self._store) > 1:
+            oldest = next(iter(self._store))
+            if oldest == keep:
+                self._store.move_to_end(keep)
+                continue
+            self._drop(oldest)
+            self.evictions += 1
+
+
+class DiskCache:
+    """SQLite (WAL mode) second-tier cache that survives process restarts.
+
+    Only JSON-serialisable entries whose key kind is listed in ``kinds`` are
+    stored.  Rows carry their own expiry and a hit counter; when the file
+    grows past ``max_bytes`` the coldest rows are evicted first.
+
+    Reads block and are meant for a worker thread (``TTLCache.aget`` runs
+    them in one).  Writes, deletes and hit counts only queue up: a writer
+    thread with its own connection applies them in batches, one transaction
+    each, and until then ``get`` answers from the queue.  Triggers keep the
+    total size in a one-row table, so it stays right when several worker
+    processes share the file and eviction never has to re-sum it.
+    """
+
+    _WRITE_BATCH = 256
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        namespace: str,
+        kinds: Set[str],
+        ttl_seconds: int = 86400,
+        max_bytes: int = 256 * 1024 * 1024,
+    ) -> None:
+        self._path = path
+        self._namespace = namespace
+        self._kinds = kinds
+        self._ttl = ttl_seconds
+        self._max_bytes = max_bytes
+        dirname = os.path.dirname(path)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA busy_timeout=5000")
+        self._db.execute("BEGIN IMMEDIATE")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL,"
+            " expires_at REAL NOT NULL, hits INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_hits ON entries (hits)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_expiry ON entries (expires_at)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS totals (id INTEGER PRIMARY KEY CHECK (id = 0), size INTEGER NOT NULL)")
+        # Seeded once for files written before the totals table existed
+        self._db.execute("INSERT OR IGNORE INTO totals (id, size) SELECT 0, COALESCE(SUM(size), 0) FROM entries")
+        self._db.execute(
+            "CREATE TRIGGER IF NOT EXISTS entries_insert AFTER INSERT ON entries"
+            " BEGIN UPDATE totals SET size = size + new.size WHERE id = 0; END"
+        )
+        self._db.execute(
+            "CREATE TRIGGER IF NOT EXISTS entries_delete AFTER DELETE ON entries"
+            " BEGIN UPDATE totals SET size = size - old.size WHERE id = 0; END"
+        )
+        self._db.execute(
+            "CREATE TRIGGER IF NOT EXISTS entries_resize AFTER UPDATE OF size ON entries"
+            " BEGIN UPDATE totals SET size = size + new.size - old.size WHERE id = 0; END"
+        )
+        # Drop entries written under an older CACHE_VERSION or already expired.
+        self._db.execute(
+            "DELETE FROM entries WHERE substr(key, 1, ?) != ? OR expires_at < ?",
+            (len(namespace), namespace, time.time()),
+        )
+        self._db.execute("COMMIT")
+        self._read_lock = threading.Lock()
+        # key -> (sequence number, value or _MISSING for a delete) until written
+        self._lock = threading.Lock()
+        self._pending: Dict[str, tuple[int, Any]] = {}
+        self._pending_hits: Counter[str] = Counter()
+        self._seq = 0
+        self._queue: "queue.SimpleQueue[Optional[tuple]]" = queue.SimpleQueue()
+        self._writer = threading.Thread(target=self._write_loop, name="l2-cache-writer", daemon=True)
+        self._writer.start()
+
+    @property
+    def size(self) -> int:
+        """Bytes stored across every process sharing the file."""
+        with self._read_lock:
+            return self._db.execute("SELECT size FROM totals WHERE id = 0").fetchone()[0]
+
+    def accepts(self, key: str) -> bool:
+        if not key.startswith(self._namespace):
+            return False
+        return key[len(self._namespace):].split(":", 1)[0] in self._kinds
+
+    def get(self, key: str) -> Any:
+        """Blocking read; call it from a worker thread."""
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """Blocking read of several keys; call it from a worker thread."""
+        out: Dict[str, Any] = {}
+        wanted: List[str] = []
+        with self._lock:
+            for key in keys:
+                if not self.accepts(key):
+                    continue
+                pending = self._pending.get(key)
+                if pending is None:
+                    wanted.append(key)
+                elif pending[1] is not _MISSING:
+                    out[key] = pending[1]
+                    self._pending_hits[key] += 1
+        now = time.time()
+        expired: List[str] = []
+        for i in range(0, len(wanted), 500):
+            chunk = wanted[i : i + 500]
+            marks = ",".join("?" * len(chunk))
+            with self._read_lock:
+                rows = self._db.execute(
+                    f"SELECT key, value, expires_at FROM entries WHERE key IN ({marks})", chunk
+                ).fetchall()
+            for key, value, expires_at in rows:
+                if now > expires_at:
+                    expired.append(key)
+                else:
+                    out[key] = json.loads(value)
+        with self._lock:
+            for key in wanted:
+                if key in out:
+                    self._pending_hits[key] += 1
+        for key in expired:
+            self.delete(key)
+        return out
+
+    def set(self, key: str, value: Any) -> None:
+        if self.accepts(key):
+            self._enqueue("set", key, value)
+
+    def delete(self, key: str) -> None:
+        if self.accepts(key):
+            self._enqueue("delete", key, _MISSING)
+
+    def note_hit(self, key: str) -> None:
+        """Record an L1 hit so warm start can prefer frequently used keys."""
+        if self.accepts(key):
+            with self._lock:
+                self._pending_hits[key] += 1
+                full = len(self._pending_hits) >= 512
+            if full:
+                self.flush_hits()
+
+    def flush_hits(self) -> None:
+        with self._lock:
+            hits, self._pending_hits = self._pending_hits, Counter()
+        if hits:
+            self._queue.put(("hits", hits))
+
+    def hottest(self, limit: int) -> List[tuple[str, Any]]:
+        """Blocking: up to ``limit`` unexpired entries, most-hit first."""
+        with self._read_lock:
+            rows = self._db.execute(
+                "SELECT key, value FROM entries WHERE expires_at >= ? ORDER BY hits DESC LIMIT ?",
+                (time.time(), limit),
+            ).fetchall()
+        return [(k, json.loads(v)) for k, v in rows]
+
+    def close(self) -> None:
+        """Write out everything queued, then close (blocking)."""
+        self.flush_hits()
+        self._queue.put(None)
+        self._writer.join()
+        self._db.close()
+
+    def _enqueue(self, op: str, key: str, value: Any) -> None:
+        with self._lock:
+            self._seq += 1
+            self._pending[key] = (self._seq, value)
+            seq = self._seq
+        self._queue.put((op, key, value, seq))
+
+    # -- writer thread -----------------------------------------------------
+
+    def _write_loop(self) -> None:
+        db = sqlite3.connect(self._path, isolation_level=None)
+        db.execute("PRAGMA busy_timeout=5000")
+        db.execute("PRAGMA synchronous=NORMAL")
+        try:
+            while True:
+                batch = [self._queue.get()]
+                while batch[-1] is not None and len(batch) < self._WRITE_BATCH:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                ops = [op for op in batch if op is not None]
+                try:
+                    self._apply(db, ops)
+                except sqlite3.Error:
+                    logger.exception("L2 cache write of %d operations failed", len(ops))
+                finally:
+                    self._settle(ops)
+                if batch[-1] is None:
+                    return
+        finally:
+            db.close()
+
+    def _apply(self, db: sqlite3.Connection, ops: List[tuple]) -> None:
+        expires_at = time.time() + self._ttl
+        writes: List[tuple[str, Optional[str]]] = []
+        hits: Counter[str] = Counter()
+        for op in ops:
+            if op[0] == "hits":
+                hits.update(op[1])
+            elif op[0] == "delete":
+                writes.append((op[1], None))
+            else:
+                try:
+                    writes.append((op[1], json.dumps(op[2], separators=(",", ":"))))
+                except (TypeError, ValueError):
+                    logger.warning("Not caching %s on disk: value is not JSON-serialisable", op[1])
+        if not writes and not hits:
+            return
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            for key, encoded in writes:
+                if encoded is None:
+                    db.execute("DELETE FROM entries WHERE key = ?", (key,))
+                else:
+                    db.execute(
+                        "INSERT INTO entries (key, value, size, expires_at, hits) VALUES (?, ?, ?, ?, 0)"
+                        " ON CONFLICT(key) DO UPDATE SET value = excluded.value, size = excluded.size,"
+                        " expires_at = excluded.expires_at",
+                        (key, encoded, len(encoded), expires_at),
+                    )
+            if hits:
+                db.executemany("UPDATE entries SET hits = hits + ? WHERE key = ?", [(n, k) for k, n in hits.items()])
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        if writes and self._total(db) > self._max_bytes:
+            self._evict(db)
+
+    def _settle(self, ops: List[tuple]) -> None:
+        """Forget queued values the batch wrote, unless a newer one replaced them."""
+        with self._lock:
+            for op in ops:
+                if op[0] != "hits" and self._pending.get(op[1], (None,))[0] == op[3]:
+                    del self._pending[op[1]]
+
+    @staticmethod
+    def _total(db: sqlite3.Connection) -> int:
+        return db.execute("SELECT size FROM totals WHERE id = 0").fetchone()[0]
+
+    def _evict(self, db: sqlite3.Connection) -> None:
+        """Drop expired rows, then the least-hit rows until 90% of the budget."""
+        db.execute("DELETE FROM entries WHERE expires_at < ?", (time.time(),))
+        excess = self._total(db) - int(self._max_bytes * 0.9)
+        while excess > 0:
+            # Coldest first; among equally cold rows the oldest (by rowid)
+            rows = db.execute("SELECT key, size FROM entries ORDER BY hits ASC LIMIT 64").fetchall()
+            if not rows:
+                break
+            victims: List[tuple[str]] = []
+            for key, size in rows:
+                if excess <= 0:
+                    break
+                victims.append((key,))
+                excess -= size
+            db.executemany("DELETE FROM entries WHERE key = ?", victims)
 
 
 CACHE_VERSION = "3"
-lei_cache = TTLCache(ttl_seconds=600, max_size=4096)
+# Expired entries stay servable this long while the GLEIF circuit is not closed
+CACHE_STALE_GRACE_SECONDS = int(os.getenv("CACHE_STALE_GRACE_SECONDS", "1800"))
+lei_cache = TTLCache(ttl_seconds=600, max_size=4096, grace_seconds=CACHE_STALE_GRACE_SECONDS)
+# Encoded response bodies, kept apart so large bodies can't push out the
+# upstream data above and are bounded by their size in bytes.
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+response_cache = TTLCache(
+    ttl_seconds=600,
+    max_size=4096,
+    grace_seconds=CACHE_STALE_GRACE_SECONDS,
+    max_bytes=RESPONSE_CACHE_MAX_BYTES,
+    sizeof=lambda encoded: encoded.nbytes,
+)
+
+# Second-tier disk cache (opt-in).  Set L2_CACHE_PATH to a writable file, e.g.
+# /tmp/gleif-cache.sqlite on Vercel, to keep upstream data across restarts.
+L2_CACHE_PATH = os.getenv("L2_CACHE_PATH", "")
+if not L2_CACHE_PATH and os.getenv("COORDINATION_BACKEND", "local").lower() != "local":
+    # Multi-worker deployments share cached upstream data through the L2 file
+    L2_CACHE_PATH = "/tmp/gleif-cache.sqlite"
+L2_CACHE_TTL_SECONDS = int(os.getenv("L2_CACHE_TTL_SECONDS", "86400"))
+L2_CACHE_MAX_BYTES = int(os.getenv("L2_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+L2_CACHE_WARM_KEYS = int(os.getenv("L2_CACHE_WARM_KEYS", "2048"))
+# Local golden-copy index (see app/golden_copy.py).  When set, record,
+# children and ultimate-parent lookups are served from it and only LEIs it
+# does not know fall back to the GLEIF API.
+GOLDEN_COPY_PATH = os.getenv("GOLDEN_COPY_PATH", "")
+_golden: Optional[GoldenCopyStore] = None
+# Legal names of every record the proxy has mapped, searched by /api/match
+# before falling back to GLEIF autocompletions.
+_name_index = NameIndex(max_entries=int(os.getenv("NAME_INDEX_MAX_ENTRIES", "200000")))
+
+_L2_CACHE_KINDS = {
+    "lei_raw",
+    "children_ids",
+    "ult_parent",
+    "ultimate_children_count",
+    "direct_children_count",
+    "checkpoint",
+    "job",
+}
+
+# ---------------------------------------------------------------------------
+# Request coalescing (single-flight) for concurrent cache misses
+# ---------------------------------------------------------------------------
+
+class _Flight:
+    """Priority of one single-flight task, raised when a more urgent caller joins.
+
+    A flight started from inside another one (``parent``) follows it, so a
+    promotion reaches the nested loads too.  ``waiters`` counts the callers
+    awaiting the task; ``token`` is the task's own cancel check, set once
+    the last of them has gone away.
+    """
+
+    __slots__ = ("priority", "parent", "waiters", "token")
+
+    def __init__(self, priority: int, parent: Optional["_Flight"]) -> None:
+        self.priority = priority
+        self.parent = parent
+        self.waiters = 0
+        self.token = CancelToken()
+
+    def effective(self) -> int:
+        if self.parent is None:
+            return self.priority
+        return min(self.priority, self.parent.effective())
+
+
+_flight: ContextVar[Optional[_Flight]] = ContextVar("gleif_flight", default=None)
+
+
+class SingleFlight:
+    """Share one in-flight upstream call between concurrent callers of a key.
+
+    The first caller for a key starts the work as a task; later callers await
+    the same task instead of issuing their own GLEIF requests.  The task is
+    shielded so one client disconnecting does not fail the others; work
+    started with ``do_cancellable`` is only cancelled once every caller
+    waiting on it has disconnected.  It runs
+    at the priority of its most urgent caller: an interactive request joining
+    a load a bulk crawl started moves it into the interactive lane.  Code in
+    the task that sets its own priority (crawls run as bulk) keeps it.
+    """
+
+    def __init__(self) -> None:
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._flights: Dict[str, _Flight] = {}
+        self.started = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        return await self.do_cancellable(key, lambda _: factory(), None)
+
+    async def do_cancellable(
+        self,
+        key: str,
+        factory: Callable[["CancelToken"], Awaitable[Any]],
+        cancel_check: Optional[Callable[[], Awaitable[bool]]],
+    ) -> Any:
+        """``do`` for work that takes a cancel check.
+
+        ``factory`` is passed the flight's token rather than any one caller's,
+        so the work stops only when every caller waiting on it is gone.  A
+        caller whose own ``cancel_check`` fires stops waiting with a 499.
+        """
+        disconnect = cancel_check if isinstance(cancel_check, CancelToken) else None
+        while True:
+            task = self._inflight.get(key)
+            if task is None:
+                explicit = _request_priority.get()
+                flight = _Flight(_current_priority(), None if explicit is not None else _flight.get())
+                task = asyncio.ensure_future(self._run(flight, factory))
+                self._inflight[key] = task
+                self._flights[key] = flight
+                task.add_done_callback(lambda t, k=key: self._release(k, t))
+                self.started += 1
+            else:
+                flight = self._flights[key]
+                flight.priority = min(flight.priority, _current_priority())
+                self.coalesced += 1
+            flight.waiters += 1
+            try:
+                if disconnect is not None:
+                    return await disconnect.run(asyncio.shield(task))
+                return await asyncio.shield(task)
+            except HTTPException as exc:
+                # Cancelled by a client other than this caller's; retry with a call of our own
+                if exc.status_code == 499 and not (disconnect is not None and disconnect.cancelled):
+                    continue
+                raise
+            finally:
+                self._leave(key, task, flight, disconnect)
+
+    @staticmethod
+    async def _run(flight: _Flight, factory: Callable[["CancelToken"], Awaitable[Any]]) -> Any:
+        _flight.set(flight)
+        # Follow the flight's priority unless the work sets its own
+        _request_priority.set(None)
+        return await factory(flight.token)
+
+    def _leave(self, key: str, task: asyncio.Task, flight: _Flight, disconnect: Optional["CancelToken"]) -> None:
+        flight.waiters -= 1
+        if flight.waiters or task.done() or disconnect is None or not disconnect.cancelled:
+            return
+        # The last waiter disconnected: stop the work, and let the next caller start afresh
+        flight.token.cancel()
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+            del self._flights[key]
+
+    def _release(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+            del self._flights[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved when nobody is left awaiting it.
+            task.exception()
+
+    def stats(self) -> Dict[str, int]:
+        return {"inflight": len(self._inflight), "started": self.started, "coalesced": self.coalesced}
+
+
+_inflight = SingleFlight()
+
+# ---------------------------------------------------------------------------
+# Shared hierarchy graph
+# ---------------------------------------------------------------------------
+
+class HierarchyGraph:
+    """Parent->children edges (and child rows, when known) shared by all crawls.
+
+    Every direct-children fetch writes here and every traversal reads from
+    here, so shape, flat and tree queries over overlapping groups reuse
+    sub-trees already seen instead of calling upstream again.  Rows are held
+    packed and rebuilt as models when read.
+    """
+
+    def __init__(self, ttl_seconds: int = 600, max_parents: int = 50000) -> None:
+        self._ttl = ttl_seconds
+        self._max = max_parents
+        # parent -> (expires_at, child ids, packed child rows or None)
+        self._edges: OrderedDict[str, tuple[float, List[str], Optional[List[PackedRow]]]] = OrderedDict()
+
+    def _entry(self, lei: str) -> Optional[tuple[float, List[str], Optional[List[PackedRow]]]]:
+        item = self._edges.get(lei)
+        if item is None:
+            return None
+        if time.time() > item[0]:
+            self._edges.pop(lei, None)
+            return None
+        self._edges.move_to_end(lei)
+        return item
+
+    def child_ids(self, lei: str) -> Optional[List[str]]:
+        item = self._entry(lei)
+        return list(item[1]) if item else None
+
+    def child_rows(self, lei: str) -> Optional[List[Row]]:
+        item = self._entry(lei)
+        return [_unpack_row(p) for p in item[2]] if item and item[2] is not None else None
+
+    def set_child_ids(self, lei: str, ids: List[str]) -> None:
+        item = self._entry(lei)
+        rows = item[2] if item and item[1] == ids else None
+        self._store(lei, list(ids), rows)
+
+    def set_child_rows(self, lei: str, rows: List[Row]) -> None:
+        packed = [_pack_row(r) for r in rows]
+        self._store(lei, [p[0] for p in packed], packed)
+
+    def discard(self, lei: str) -> None:
+        self._edges.pop(lei, None)
+
+    def _store(self, lei: str, ids: List[str], rows: Optional[List[PackedRow]]) -> None:
+        if lei in self._edges:
+            self._edges.move_to_end(lei)
+        elif len(self._edges) >= self._max:
+            self._edges.popitem(last=False)
+        self._edges[lei] = (time.time() + self._ttl, ids, rows)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "parents": len(self._edges),
+            "edges": sum(len(ids) for _, ids, _ in self._edges.values()),
+            "withRows": sum(1 for _, _, rows in self._edges.values() if rows is not None),
+        }
+
+
+_graph = HierarchyGraph(ttl_seconds=600)
 
 # ---------------------------------------------------------------------------
 # Shared httpx client (connection-pooled) via lifespan
 # ---------------------------------------------------------------------------
 
+# Point at a local stand-in (python -m bench.fake_gleif) to test the transport
+GLEIF_API_URL = os.getenv("GLEIF_API_URL", "https://api.gleif.org/api/v1").rstrip("/")
+# auto: HTTP/2 whenever h2 is installed.  Over https the protocol is negotiated
+# (ALPN); over plain http HTTP/2 means prior knowledge (h2c).
+GLEIF_HTTP2 = os.getenv("GLEIF_HTTP2", "auto").lower()
+# Every GLEIF call holds an adaptive concurrency slot, so the pool never needs
+# more connections than GLEIF_MAX_CONCURRENCY (used when this is 0).  Idle
+# connections are kept through rate-limit pauses instead of re-handshaking.
+GLEIF_POOL_MAX_CONNECTIONS = int(os.getenv("GLEIF_POOL_MAX_CONNECTIONS", "0"))
+GLEIF_POOL_KEEPALIVE_SECONDS = float(os.getenv("GLEIF_POOL_KEEPALIVE_SECONDS", "60"))
+# Connections opened at startup, before the first request (0 disables; one
+# is enough with HTTP/2)
+GLEIF_POOL_WARM_CONNECTIONS = int(os.getenv("GLEIF_POOL_WARM_CONNECTIONS", "2"))
+
+_CONNECT_STEPS = ("connection.connect_tcp", "connection.start_tls")
+
+
+def _use_http2() -> bool:
+    if GLEIF_HTTP2 == "auto":
+        return h2 is not None
+    if GLEIF_HTTP2 not in ("1", "true", "on", "yes"):
+        return False
+    if h2 is None:
+        logger.warning("GLEIF_HTTP2 is set but h2 is not installed (pip install 'httpx[http2]'); using HTTP/1.1")
+    return h2 is not None
+
+
+class GleifTransport(httpx.AsyncHTTPTransport):
+    """Pooled transport that times connection setup and reports pool state.
+
+    httpcore's ``trace`` extension reports the TCP connect and TLS handshake
+    of each new connection; requests on reused connections add nothing.
+    """
+
+    def __init__(self, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.http_versions: Counter[str] = Counter()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        started: Dict[str, float] = {}
+
+        async def trace(event: str, info: Dict[str, Any]) -> None:
+            step, _, phase = event.rpartition(".")
+            if step not in _CONNECT_STEPS:
+                return
+            if phase == "started":
+                started[step] = time.perf_counter()
+            elif phase == "complete" and step in started:
+                _gleif_connect_duration.observe(time.perf_counter() - started.pop(step), step.split(".", 1)[1])
+
+        request.extensions["trace"] = trace
+        response = await super().handle_async_request(request)
+        self.http_versions[response.extensions.get("http_version", b"HTTP/1.1").decode()] += 1
+        return response
+
+    def pool_stats(self) -> Dict[str, int]:
+        """Active and idle pooled connections; empty if httpcore's pool can't be read."""
+        # httpx keeps its httpcore pool private; read it defensively so an
+        # upgrade that moves it only drops these gauges.
+        connections = getattr(getattr(self, "_pool", None), "connections", None)
+        if connections is None:
+            return {}
+        try:
+            connections = [c for c in connections if not c.is_closed()]
+            idle = sum(1 for c in connections if c.is_idle())
+        except AttributeError:
+            return {}
+        return {"active": len(connections) - idle, "idle": idle}
+
+
 _http_client: Optional[httpx.AsyncClient] = None
+_gleif_transport: Optional[GleifTransport] = None
 
 
 def _get_client() -> httpx.AsyncClient:
@@ -136,20 +1116,88 @@ def _get_client() -> httpx.AsyncClient:
     return _http_client
 
 
+async def _prewarm_gleif(client: httpx.AsyncClient, connections: int) -> None:
+    """Resolve GLEIF's host and open ``connections`` pooled connections.
+
+    Each connection is opened by a HEAD request that takes a bulk-lane
+    rate-limit token, so user traffic arriving meanwhile goes first.
+    """
+    _request_endpoint.set("prewarm")
+    url = httpx.URL(GLEIF_API_URL)
+    started = time.perf_counter()
+    try:
+        await asyncio.get_running_loop().getaddrinfo(url.host, url.port or (443 if url.scheme == "https" else 80))
+    except OSError as exc:
+        logger.warning("Could not resolve %s: %s", url.host, exc)
+        return
+
+    async def open_one() -> None:
+        await GLEIF_RATE_LIMITER.acquire(PRIORITY_BULK)
+        await client.head(f"{GLEIF_API_URL}/lei-records", params={"page[size]": 1}, timeout=10)
+
+    results = await asyncio.gather(*(open_one() for _ in range(connections)), return_exceptions=True)
+    failed = [r for r in results if isinstance(r, Exception)]
+    if failed:
+        logger.warning("GLEIF pre-warm: %d of %d connections failed (%s)", len(failed), connections, failed[0])
+    else:
+        logger.info("GLEIF pre-warm: %d connection(s) open in %.2fs", connections, time.perf_counter() - started)
+
+
 @asynccontextmanager
 async def _lifespan(app: FastAPI):
-    global _http_client
-    limits = httpx.Limits(max_connections=40, max_keepalive_connections=20)
-    _http_client = httpx.AsyncClient(
-        limits=limits,
-        timeout=httpx.Timeout(30.0, connect=10.0),
-        http2=False,
+    global _http_client, _gleif_transport, _golden
+    http2 = _use_http2()
+    max_connections = GLEIF_POOL_MAX_CONNECTIONS or _gleif_limit.max_limit
+    _gleif_transport = GleifTransport(
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=GLEIF_POOL_KEEPALIVE_SECONDS,
+        ),
+        http2=http2,
+        http1=not (http2 and GLEIF_API_URL.startswith("http://")),
+    )
+    _http_client = httpx.AsyncClient(transport=_gleif_transport, timeout=httpx.Timeout(30.0, connect=10.0))
+    logger.info(
+        "Shared httpx.AsyncClient created (pool max=%d, %s)", max_connections, "HTTP/2" if http2 else "HTTP/1.1"
     )
-    logger.info("Shared httpx.AsyncClient created (pool max=40)")
+    prewarm = None
+    if GLEIF_POOL_WARM_CONNECTIONS > 0:
+        prewarm = asyncio.create_task(_prewarm_gleif(_http_client, 1 if http2 else GLEIF_POOL_WARM_CONNECTIONS))
+    if L2_CACHE_PATH:
+        lei_cache.l2 = DiskCache(
+            L2_CACHE_PATH,
+            namespace=f"{CACHE_VERSION}:",
+            kinds=_L2_CACHE_KINDS,
+            ttl_seconds=L2_CACHE_TTL_SECONDS,
+            max_bytes=L2_CACHE_MAX_BYTES,
+        )
+        warm = await asyncio.to_thread(lei_cache.l2.hottest, L2_CACHE_WARM_KEYS)
+        for key, value in warm:
+            lei_cache.prime(key, value)
+            if ":lei_raw:" in key:
+                _name_index.add(key.rsplit(":", 1)[1], _raw_legal_name(value))
+        logger.info("L2 disk cache opened at %s (warmed %d keys)", L2_CACHE_PATH, len(warm))
+    _golden = open_store(GOLDEN_COPY_PATH)
+    if _golden is not None:
+        logger.info("Golden-copy store opened at %s", GOLDEN_COPY_PATH)
+    warmer = asyncio.create_task(_cache_warmer()) if CACHE_WARM_INTERVAL_SECONDS > 0 else None
     yield
+    for task in (warmer, prewarm):
+        if task is not None:
+            task.cancel()
+    for task in list(_job_tasks) + list(_warm_tasks):
+        task.cancel()
     await _http_client.aclose()
     _http_client = None
+    _gleif_transport = None
     logger.info("Shared httpx.AsyncClient closed")
+    if lei_cache.l2 is not None:
+        await asyncio.to_thread(lei_cache.l2.close)
+        lei_cache.l2 = None
+    if _golden is not None:
+        await asyncio.to_thread(_golden.close)
+        _golden = None
 
 
 app = FastAPI(title="GLEIF Proxy API", version="0.2.0", lifespan=_lifespan)
@@ -182,8 +1230,33 @@ app.add_middleware(
     allow_credentials=False,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Cache-Stale"],
 )
 
+_LEI_IN_PATH = re.compile(r"/[A-Za-z0-9]{20}(?=/|$)")
+
+
+@app.middleware("http")
+async def _instrument_request(request: Request, call_next):
+    """Tag upstream calls made while serving a request with its route and report its cost.
+
+    The ``Server-Timing`` header lists the GLEIF calls made for the request,
+    the time spent waiting for the rate limiter and concurrency slots, and
+    cache hits; streamed bodies report what happened before the first byte.
+    """
+    _request_endpoint.set(_LEI_IN_PATH.sub("/{lei}", request.url.path))
+    cost = _RequestCost()
+    _request_cost.set(cost)
+    response = await call_next(request)
+    route = getattr(request.scope.get("route"), "path", "unmatched")
+    _http_requests.inc(route, request.method, str(response.status_code))
+    _http_duration.observe(time.perf_counter() - cost.started, route)
+    response.headers["Server-Timing"] = cost.server_timing()
+    if cost.stale_seconds > 0:
+        # Served from expired cache entries while GLEIF is unavailable
+        response.headers["X-Cache-Stale"] = str(int(cost.stale_seconds))
+    return response
+
 # ---------------------------------------------------------------------------
 # Health / debug endpoints
 # ---------------------------------------------------------------------------
@@ -193,6 +1266,137 @@ async def health():
     return {"status": "ok"}
 
 
+def _cache_samples() -> Iterator[Sample]:
+    for cache in (lei_cache, response_cache):
+        for (kind, result), n in cache.lookups.items():
+            yield "lei_cache_lookups_total", {"kind": kind, "result": result}, n
+
+
+def _ratelimit_wait_samples() -> Iterator[Sample]:
+    limiter = GLEIF_RATE_LIMITER
+    for lane, name in enumerate(_PRIORITY_NAMES):
+        counts, total = limiter.wait_histogram(lane)
+        yield from histogram_samples("gleif_ratelimit_wait_seconds", {"lane": name}, _WAIT_BUCKETS, counts, total)
+
+
+_metrics.collector("lei_cache_lookups_total", "Cache lookups by key kind and result.", "counter", _cache_samples)
+_metrics.collector(
+    "lei_cache_writes_total",
+    "Cache writes by key kind.",
+    "counter",
+    lambda: (
+        ("lei_cache_writes_total", {"kind": k}, n)
+        for cache in (lei_cache, response_cache)
+        for k, n in cache.writes.items()
+    ),
+)
+_metrics.collector(
+    "lei_cache_evictions_total",
+    "Entries evicted from the in-memory cache to make room.",
+    "counter",
+    lambda: [("lei_cache_evictions_total", {}, lei_cache.evictions)],
+)
+_metrics.collector(
+    "lei_cache_entries", "Entries held in the in-memory cache.", "gauge", lambda: [("lei_cache_entries", {}, len(lei_cache))]
+)
+_metrics.collector(
+    "response_cache_bytes",
+    "Size of the encoded response bodies held in memory.",
+    "gauge",
+    lambda: [("response_cache_bytes", {}, response_cache.nbytes)],
+)
+_metrics.collector(
+    "response_cache_evictions_total",
+    "Encoded responses evicted to stay within RESPONSE_CACHE_MAX_BYTES.",
+    "counter",
+    lambda: [("response_cache_evictions_total", {}, response_cache.evictions)],
+)
+_metrics.collector(
+    "gleif_ratelimit_wait_seconds", "Time waiting for a rate-limit token, by lane.", "histogram", _ratelimit_wait_samples
+)
+_metrics.collector(
+    "gleif_ratelimit_queue_depth",
+    "Callers waiting for a rate-limit token, by lane.",
+    "gauge",
+    lambda: (
+        ("gleif_ratelimit_queue_depth", {"lane": lane}, stats["queueDepth"])
+        for lane, stats in GLEIF_RATE_LIMITER.stats()["lanes"].items()
+    ),
+)
+_metrics.collector(
+    "gleif_ratelimit_tokens_total",
+    "Rate-limit tokens taken, by the route that needed them.",
+    "counter",
+    lambda: (
+        ("gleif_ratelimit_tokens_total", {"endpoint": e}, n) for e, n in GLEIF_RATE_LIMITER.tokens_by_endpoint.items()
+    ),
+)
+_metrics.collector(
+    "singleflight_calls_total",
+    "Upstream loads started and callers coalesced onto one already in flight.",
+    "counter",
+    lambda: (
+        ("singleflight_calls_total", {"result": r}, _inflight.stats()[r]) for r in ("started", "coalesced")
+    ),
+)
+
+
+_metrics.collector(
+    "gleif_concurrency_limit",
+    "Current adaptive limit on parallel GLEIF calls.",
+    "gauge",
+    lambda: [("gleif_concurrency_limit", {}, _gleif_limit.limit)],
+)
+_metrics.collector(
+    "gleif_concurrency_in_flight",
+    "GLEIF calls in flight.",
+    "gauge",
+    lambda: [("gleif_concurrency_in_flight", {}, _gleif_limit.in_flight)],
+)
+_metrics.collector(
+    "gleif_pool_connections",
+    "Open GLEIF connections, active or idle in the pool.",
+    "gauge",
+    lambda: (
+        ("gleif_pool_connections", {"state": state}, n)
+        for state, n in (_gleif_transport.pool_stats().items() if _gleif_transport else ())
+    ),
+)
+_metrics.collector(
+    "gleif_pool_max_connections",
+    "Size of the GLEIF connection pool.",
+    "gauge",
+    lambda: [("gleif_pool_max_connections", {}, GLEIF_POOL_MAX_CONNECTIONS or _gleif_limit.max_limit)],
+)
+_metrics.collector(
+    "gleif_http_responses_total",
+    "GLEIF responses by negotiated HTTP version.",
+    "counter",
+    lambda: (
+        ("gleif_http_responses_total", {"http_version": v}, n)
+        for v, n in (_gleif_transport.http_versions.items() if _gleif_transport else ())
+    ),
+)
+_metrics.collector(
+    "gleif_circuit_open",
+    "1 while the GLEIF circuit breaker is open or half-open.",
+    "gauge",
+    lambda: [("gleif_circuit_open", {"state": _gleif_breaker.state}, int(_gleif_breaker.degraded()))],
+)
+_metrics.collector(
+    "gleif_circuit_opened_total",
+    "Times the GLEIF circuit breaker opened.",
+    "counter",
+    lambda: [("gleif_circuit_opened_total", {}, _gleif_breaker.opened)],
+)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus text-format metrics for this worker process."""
+    return Response(_metrics.render(), media_type=METRICS_CONTENT_TYPE)
+
+
 if os.getenv("DEBUG", "").lower() in ("1", "true"):
     @app.get("/debug/cors")
     async def debug_cors():
@@ -204,6 +1408,21 @@ if os.getenv("DEBUG", "").lower() in ("1", "true"):
             "env_ALLOW_ALL_VERCEL": os.getenv("ALLOW_ALL_VERCEL"),
         }
 
+    @app.get("/debug/inflight")
+    async def debug_inflight():
+        """Single-flight counters – only available when DEBUG=1."""
+        return _inflight.stats()
+
+    @app.get("/debug/ratelimit")
+    async def debug_ratelimit():
+        """Rate-limiter queue depth, wait times and per-endpoint token use – DEBUG=1 only."""
+        return GLEIF_RATE_LIMITER.stats()
+
+    @app.get("/debug/graph")
+    async def debug_graph():
+        """Shared hierarchy graph size – only available when DEBUG=1."""
+        return _graph.stats()
+
 
 # ---------------------------------------------------------------------------
 # Mapping helpers
@@ -265,53 +1484,517 @@ def _map_row(data: Dict[str, Any]) -> Row:
     )
 
 
-class AsyncRateLimiter:
-    def __init__(self, max_calls: int, period_seconds: float) -> None:
-        self._max_calls = max_calls
-        self._period = period_seconds
-        self._calls: deque[float] = deque()
-        self._lock = asyncio.Lock()
+# Priority lanes for upstream calls.  Interactive lookups skip ahead of
+# background hierarchy crawls, which run in the bulk lane.
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BULK = 1
+_PRIORITY_NAMES = ("interactive", "bulk")
 
-    async def acquire(self) -> None:
-        while True:
-            async with self._lock:
-                now = time.monotonic()
-                while self._calls and (now - self._calls[0]) > self._period:
-                    self._calls.popleft()
-                if len(self._calls) < self._max_calls:
-                    self._calls.append(now)
-                    return
-                wait_for = self._period - (now - self._calls[0])
-            await asyncio.sleep(max(0.01, wait_for) + random.uniform(0, 0.05))
+# None inside a single-flight task: the flight's priority applies
+_request_priority: ContextVar[Optional[int]] = ContextVar("gleif_priority", default=PRIORITY_INTERACTIVE)
+_request_endpoint: ContextVar[str] = ContextVar("gleif_endpoint", default="other")
 
+def _current_priority() -> int:
+    priority = _request_priority.get()
+    if priority is not None:
+        return priority
+    flight = _flight.get()
+    return flight.effective() if flight is not None else PRIORITY_INTERACTIVE
 
-# Keep headroom under the GLEIF 60 req/min limit
-GLEIF_RATE_LIMITER = AsyncRateLimiter(max_calls=55, period_seconds=60.0)
 
-# Concurrency semaphore – avoid overwhelming the upstream with parallel requests
-_GLEIF_SEMAPHORE = asyncio.Semaphore(12)
+_WAIT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
 
 
-async def _gleif_get(
-    url: str,
-    *,
-    params: Optional[Dict[str, Any]] = None,
-    timeout: float | httpx.Timeout | None = 30.0,
-    max_retries: int = 5,
-) -> httpx.Response:
-    """Rate-limited GET against the GLEIF API with retry + backoff."""
-    client = _get_client()
-    base_backoff = 0.5
-    for attempt in range(max_retries + 1):
-        await GLEIF_RATE_LIMITER.acquire()
-        async with _GLEIF_SEMAPHORE:
-            try:
-                r = await client.get(url, params=params, timeout=timeout)
-            except httpx.HTTPError:
-                if attempt >= max_retries:
-                    raise
-                await asyncio.sleep(min(8.0, base_backoff * (2 ** attempt)) + random.uniform(0, 0.1))
+class LocalTokenBucket:
+    """Token bucket held in this process."""
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self._rate = rate
+        self._capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+    async def take(self) -> float:
+        """Take a token; return 0 on success or the seconds until one is due."""
+        self._refill()
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        return (1 - self._tokens) / self._rate
+
+    async def give_back(self) -> None:
+        self._refill()
+        self._tokens = min(self._capacity, self._tokens + 1)
+
+    def describe(self) -> Dict[str, Any]:
+        self._refill()
+        return {"backend": "local", "tokensAvailable": round(self._tokens, 2)}
+
+
+class SQLiteTokenBucket:
+    """Token bucket shared by every worker process on the host via a SQLite file.
+
+    Each update waits for the file's write lock, up to five seconds while
+    other workers hold it, so updates run in a worker thread rather than on
+    the event loop.
+    """
+
+    def __init__(self, path: str, name: str, rate: float, capacity: float) -> None:
+        self._path = path
+        self._name = name
+        self._rate = rate
+        self._capacity = capacity
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5.0)
+        self._lock = threading.Lock()
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS token_buckets (name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+        )
+
+    def _update(self, delta: int) -> float:
+        with self._lock:
+            return self._update_locked(delta)
+
+    def _update_locked(self, delta: int) -> float:
+        # BEGIN IMMEDIATE takes the write lock, so read-modify-write is atomic across processes.
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            now = time.time()
+            row = self._db.execute(
+                "SELECT tokens, updated FROM token_buckets WHERE name = ?", (self._name,)
+            ).fetchone()
+            tokens = self._capacity if row is None else min(self._capacity, row[0] + max(0.0, now - row[1]) * self._rate)
+            wait = 0.0
+            if delta < 0:
+                if tokens >= 1:
+                    tokens -= 1
+                else:
+                    wait = (1 - tokens) / self._rate
+            else:
+                tokens = min(self._capacity, tokens + delta)
+            self._db.execute(
+                "INSERT OR REPLACE INTO token_buckets (name, tokens, updated) VALUES (?, ?, ?)",
+                (self._name, tokens, now),
+            )
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        return wait
+
+    async def take(self) -> float:
+        return await asyncio.to_thread(self._update, -1)
+
+    async def give_back(self) -> None:
+        await asyncio.to_thread(self._update, 1)
+
+    def describe(self) -> Dict[str, Any]:
+        return {"backend": "sqlite", "path": self._path}
+
+
+_REDIS_BUCKET_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local rate, cap, delta = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local tokens = tonumber(redis.call('HGET', KEYS[1], 'tokens') or cap)
+local updated = tonumber(redis.call('HGET', KEYS[1], 'updated') or now)
+tokens = math.min(cap, tokens + math.max(0, now - updated) * rate)
+local wait = 0
+if delta < 0 then
+  if tokens >= 1 then tokens = tokens - 1 else wait = (1 - tokens) / rate end
+else
+  tokens = math.min(cap, tokens + delta)
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+redis.call('EXPIRE', KEYS[1], 3600)
+return tostring(wait)
+"""
+
+
+class RedisTokenBucket:
+    """Token bucket in Redis (or any server speaking its protocol and Lua)."""
+
+    def __init__(self, url: str, name: str, rate: float, capacity: float) -> None:
+        if aioredis is None:
+            raise RuntimeError("COORDINATION_BACKEND=redis requires the 'redis' package")
+        self._client = aioredis.from_url(url)
+        self._key = f"gleif:bucket:{name}"
+        self._rate = rate
+        self._capacity = capacity
+        self._script = self._client.register_script(_REDIS_BUCKET_SCRIPT)
+
+    async def take(self) -> float:
+        return float(await self._script(keys=[self._key], args=[self._rate, self._capacity, -1]))
+
+    async def give_back(self) -> None:
+        await self._script(keys=[self._key], args=[self._rate, self._capacity, 1])
+
+    def describe(self) -> Dict[str, Any]:
+        return {"backend": "redis"}
+
+
+class AsyncRateLimiter:
+    """Token bucket with FIFO priority lanes.
+
+    Waiters park on a future; one dispatcher task takes tokens from the
+    bucket as they come due and hands them to the highest-priority lane
+    first, so individual callers never poll.  A waiter queued by a
+    single-flight task moves up a lane if the flight is promoted while it
+    waits.  ``burst`` bounds how many calls can go out back to back after an
+    idle spell.  The bucket itself may be shared between worker processes
+    (see COORDINATION_BACKEND).
+    """
+
+    def __init__(self, max_calls: int, period_seconds: float, burst: int = 5, bucket: Any = None) -> None:
+        self._bucket = bucket or LocalTokenBucket(max_calls / period_seconds, float(burst))
+        # (future, queued at, flight whose priority it follows, if any)
+        self._lanes: List[deque[tuple[asyncio.Future, float, Optional[_Flight]]]] = [
+            deque() for _ in _PRIORITY_NAMES
+        ]
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._wait_counts = [[0] * (len(_WAIT_BUCKETS) + 1) for _ in _PRIORITY_NAMES]
+        self._wait_sums = [0.0 for _ in _PRIORITY_NAMES]
+        self.tokens_by_endpoint: Counter[str] = Counter()
+
+    async def acquire(self, priority: Optional[int] = None) -> None:
+        lane = _current_priority() if priority is None else priority
+        flight = _flight.get() if priority is None and _request_priority.get() is None else None
+        self.tokens_by_endpoint[_request_endpoint.get()] += 1
+        if not self._has_waiters() and await self._bucket.take() == 0:
+            self._observe(lane, 0.0)
+            return
+        fut = asyncio.get_running_loop().create_future()
+        self._lanes[lane].append((fut, time.monotonic(), flight))
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.ensure_future(self._dispatch())
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # Granted just before we were cancelled; give the token back.
+                asyncio.ensure_future(self._bucket.give_back())
+            raise
+
+    def idle(self) -> bool:
+        """True when no caller in this process is waiting for a token."""
+        return not self._has_waiters()
+
+    def _has_waiters(self) -> bool:
+        for queue in self._lanes:
+            while queue and queue[0][0].done():  # drop cancelled waiters
+                queue.popleft()
+            if queue:
+                return True
+        return False
+
+    async def _dispatch(self) -> None:
+        while self._has_waiters():
+            wait = await self._bucket.take()
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue
+            if not self._has_waiters():
+                await self._bucket.give_back()
+                return
+            self._promote()
+            for lane, queue in enumerate(self._lanes):
+                if queue:
+                    fut, queued_at, _ = queue.popleft()
+                    fut.set_result(None)
+                    self._observe(lane, time.monotonic() - queued_at)
+                    break
+
+    def _promote(self) -> None:
+        """Move waiters whose flight was promoted into their new lane."""
+        for lane in range(1, len(self._lanes)):
+            queue = self._lanes[lane]
+            if not any(flight is not None and flight.effective() < lane for _, _, flight in queue):
                 continue
+            stay: deque[tuple[asyncio.Future, float, Optional[_Flight]]] = deque()
+            for waiter in queue:
+                flight = waiter[2]
+                target = flight.effective() if flight is not None else lane
+                (self._lanes[target] if target < lane else stay).append(waiter)
+            self._lanes[lane] = stay
+
+    def _observe(self, lane: int, waited: float) -> None:
+        self._wait_counts[lane][bisect.bisect_left(_WAIT_BUCKETS, waited)] += 1
+        self._wait_sums[lane] += waited
+
+    def wait_histogram(self, lane: int) -> tuple[List[int], float]:
+        """``(per-bucket counts of _WAIT_BUCKETS plus overflow, total seconds)`` waited in ``lane``."""
+        return list(self._wait_counts[lane]), self._wait_sums[lane]
+
+    def stats(self) -> Dict[str, Any]:
+        lanes: Dict[str, Any] = {}
+        for lane, name in enumerate(_PRIORITY_NAMES):
+            counts, waited = self.wait_histogram(lane)
+            cumulative = [sum(counts[: i + 1]) for i in range(len(counts))]
+            lanes[name] = {
+                "queueDepth": sum(1 for fut, _, _ in self._lanes[lane] if not fut.done()),
+                "granted": cumulative[-1],
+                "waitSecondsSum": round(waited, 3),
+                "waitHistogram": {
+                    **{f"le_{b:g}": n for b, n in zip(_WAIT_BUCKETS, cumulative)},
+                    "le_inf": cumulative[-1],
+                },
+            }
+        return {
+            "bucket": self._bucket.describe(),
+            "lanes": lanes,
+            "tokensByEndpoint": dict(self.tokens_by_endpoint),
+        }
+
+
+# Cross-worker coordination.  "local" keeps limiter state per process; with
+# "sqlite" (same host) or "redis" every uvicorn worker draws from one bucket,
+# and the L2 cache file doubles as the shared cache between workers.
+COORDINATION_BACKEND = os.getenv("COORDINATION_BACKEND", "local").lower()
+COORDINATION_PATH = os.getenv("COORDINATION_PATH", "/tmp/gleif-coordination.sqlite")
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+# Keep headroom under the GLEIF 60 req/min limit (55/min sustained + burst of 5)
+_GLEIF_RATE, _GLEIF_BURST = 55 / 60.0, 5.0
+if COORDINATION_BACKEND == "sqlite":
+    _gleif_bucket: Any = SQLiteTokenBucket(COORDINATION_PATH, "gleif", _GLEIF_RATE, _GLEIF_BURST)
+elif COORDINATION_BACKEND == "redis":
+    _gleif_bucket = RedisTokenBucket(REDIS_URL, "gleif", _GLEIF_RATE, _GLEIF_BURST)
+else:
+    _gleif_bucket = LocalTokenBucket(_GLEIF_RATE, _GLEIF_BURST)
+GLEIF_RATE_LIMITER = AsyncRateLimiter(max_calls=55, period_seconds=60.0, burst=5, bucket=_gleif_bucket)
+
+
+class UpstreamUnavailable(HTTPException):
+    """Raised instead of calling GLEIF while the circuit breaker is open."""
+
+    def __init__(self, retry_after: float) -> None:
+        super().__init__(
+            status_code=503,
+            detail="GLEIF upstream unavailable",
+            headers={"Retry-After": str(max(1, int(retry_after + 0.999)))},
+        )
+
+
+class CircuitBreaker:
+    """Stop calling GLEIF after repeated failures, then probe for recovery.
+
+    ``failure_threshold`` consecutive failures (5xx, timeouts, transport
+    errors) open the circuit: calls fail fast for ``reset_seconds``, doubled
+    for every failed probe up to ``max_reset_seconds``.  After that the
+    circuit is half-open and lets one probe through at a time; a success
+    closes it.  While it is not closed the cache serves expired entries
+    within their grace window.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 10.0, max_reset_seconds: float = 120.0) -> None:
+        self._threshold = failure_threshold
+        self._base_reset = reset_seconds
+        self._max_reset = max_reset_seconds
+        self._reset = reset_seconds
+        self._failures = 0
+        self._opened_until = 0.0
+        self._probing = False
+        self.state = "closed"
+        self.opened = 0
+
+    def degraded(self) -> bool:
+        return self.state != "closed"
+
+    def retry_after(self) -> float:
+        return max(0.0, self._opened_until - time.monotonic())
+
+    def rejects(self) -> bool:
+        """Whether a call would be refused now; unlike ``allow`` it claims nothing."""
+        if self.state == "open":
+            return time.monotonic() < self._opened_until
+        return self.state == "half_open" and self._probing
+
+    def allow(self) -> bool:
+        """Admit a call, claiming the probe slot when half-open.
+
+        Call it right before the request goes out: a claimed probe must end
+        in ``record`` or ``abandon``, or the circuit stays half-open.
+        """
+        if self.state == "closed":
+            return True
+        if self.state == "open":
+            if time.monotonic() < self._opened_until:
+                return False
+            self.state = "half_open"
+            self._probing = False
+        if self._probing:
+            return False
+        self._probing = True
+        return True
+
+    def abandon(self) -> None:
+        """A call was cancelled before it could tell; let another probe through."""
+        self._probing = False
+
+    def record(self, ok: bool) -> None:
+        if ok:
+            if self.state != "closed":
+                logger.info("GLEIF circuit closed")
+            self.state, self._failures, self._reset, self._probing = "closed", 0, self._base_reset, False
+            return
+        self._failures += 1
+        if self.state == "half_open":
+            self._reset = min(self._max_reset, self._reset * 2)
+            self._open()
+        elif self.state == "closed" and self._failures >= self._threshold:
+            self._open()
+
+    def _open(self) -> None:
+        self.state, self._probing = "open", False
+        self._opened_until = time.monotonic() + self._reset
+        self.opened += 1
+        logger.warning("GLEIF circuit open for %.0fs after %d failures", self._reset, self._failures)
+
+
+class AdaptiveConcurrencyLimit:
+    """Cap on parallel GLEIF calls that adapts to upstream health (AIMD).
+
+    A short and a long moving average of call latency are kept.  While the
+    short one stays within ``tolerance`` times the long one, each completed
+    call raises the limit by 1/limit (about +1 per round of calls); slower
+    calls cut it by 10% and failures halve it.  Comparing against the
+    long-run average rather than the fastest call keeps naturally slow
+    routes (200-row pages) from being mistaken for degradation.  Waiters
+    queue FIFO for a slot.
+    """
+
+    def __init__(self, initial: int, min_limit: int = 1, max_limit: Optional[int] = None, tolerance: float = 2.0) -> None:
+        self._limit = float(initial)
+        self._min = min_limit
+        # The most parallel calls the limit ever allows; sizes the connection pool
+        self.max_limit = max_limit or initial
+        self._tolerance = tolerance
+        self._short: Optional[float] = None
+        self._long: Optional[float] = None
+        self._in_flight = 0
+        self._waiters: deque[asyncio.Future] = deque()
+
+    @property
+    def limit(self) -> int:
+        return max(self._min, int(self._limit))
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    async def acquire(self) -> None:
+        if self._in_flight < self.limit and not self._waiters:
+            self._in_flight += 1
+            return
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # Granted just before we were cancelled; hand the slot on.
+                self.release()
+            raise
+
+    def release(self, latency: Optional[float] = None, ok: bool = True) -> None:
+        """Free a slot; ``latency``/``ok`` of the finished call adjust the limit."""
+        self._in_flight -= 1
+        if not ok:
+            self._limit = max(self._min, self._limit / 2)
+        elif latency is not None:
+            self._observe(latency)
+        while self._waiters and self._in_flight < self.limit:
+            fut = self._waiters.popleft()
+            if not fut.done():
+                self._in_flight += 1
+                fut.set_result(None)
+
+    def _observe(self, latency: float) -> None:
+        if self._short is None or self._long is None:
+            self._short = self._long = latency
+            return
+        self._short += (latency - self._short) * 0.2
+        self._long += (latency - self._long) * 0.01
+        if self._short > self._long * self._tolerance:
+            self._limit = max(self._min, self._limit * 0.9)
+        else:
+            self._limit = min(self.max_limit, self._limit + 1 / self._limit)
+
+
+# Upstream parallelism starts at GLEIF_MAX_CONCURRENCY and shrinks while GLEIF
+# slows down or fails.  Per process; lower it when running several workers.
+_gleif_limit = AdaptiveConcurrencyLimit(
+    int(os.getenv("GLEIF_MAX_CONCURRENCY", "12")), min_limit=int(os.getenv("GLEIF_MIN_CONCURRENCY", "1"))
+)
+_gleif_breaker = CircuitBreaker(
+    failure_threshold=int(os.getenv("GLEIF_BREAKER_FAILURES", "5")),
+    reset_seconds=float(os.getenv("GLEIF_BREAKER_RESET_SECONDS", "10")),
+)
+lei_cache.serve_stale = response_cache.serve_stale = _gleif_breaker.degraded
+
+
+def _record_gleif_attempt(route: str, status: str, queued: float, started: float) -> None:
+    elapsed = time.perf_counter() - started
+    _gleif_requests.inc(route, status)
+    _gleif_duration.observe(elapsed, route)
+    cost = _request_cost.get()
+    if cost is not None:
+        cost.upstream_calls += 1
+        cost.upstream_seconds += elapsed
+        cost.wait_seconds += started - queued
+
+
+async def _gleif_get(
+    url: str,
+    *,
+    params: Optional[Dict[str, Any]] = None,
+    timeout: float | httpx.Timeout | None = 30.0,
+    max_retries: int = 5,
+) -> httpx.Response:
+    """Rate-limited GET against the GLEIF API with retry + backoff."""
+    client = _get_client()
+    base_backoff = 0.5
+    route = _LEI_IN_PATH.sub("/{lei}", httpx.URL(url).path)
+    for attempt in range(max_retries + 1):
+        # Fail fast before queueing; the probe slot itself is only claimed
+        # once both waits are over, so a call cancelled while queued can't
+        # leave the circuit half-open with a probe that never reports back.
+        if _gleif_breaker.rejects():
+            raise UpstreamUnavailable(_gleif_breaker.retry_after())
+        queued = time.perf_counter()
+        await GLEIF_RATE_LIMITER.acquire()
+        granted = time.perf_counter()
+        await _gleif_limit.acquire()
+        started = time.perf_counter()
+        _gleif_concurrency_wait.observe(started - granted)
+        if not _gleif_breaker.allow():
+            _gleif_limit.release()
+            raise UpstreamUnavailable(_gleif_breaker.retry_after())
+        try:
+            r = await client.get(url, params=params, timeout=timeout)
+        except httpx.HTTPError:
+            _gleif_limit.release(ok=False)
+            _gleif_breaker.record(False)
+            _record_gleif_attempt(route, "error", queued, started)
+            if attempt >= max_retries or _gleif_breaker.state == "open":
+                raise
+            _gleif_retries.inc("transport")
+            await asyncio.sleep(min(8.0, base_backoff * (2 ** attempt)) + random.uniform(0, 0.1))
+            continue
+        except BaseException:
+            _gleif_limit.release()
+            _gleif_breaker.abandon()
+            raise
+        failed = r.status_code >= 500
+        # 429s say nothing about upstream health; the rate limiter deals with them
+        _gleif_limit.release(None if r.status_code == 429 else time.perf_counter() - started, ok=not failed)
+        _gleif_breaker.record(not failed)
+        _record_gleif_attempt(route, str(r.status_code), queued, started)
 
         if r.status_code == 404:
             return r
@@ -319,6 +2002,9 @@ async def _gleif_get(
         if r.status_code in (429, 500, 502, 503, 504):
             if attempt >= max_retries:
                 r.raise_for_status()
+            if _gleif_breaker.state == "open":
+                raise UpstreamUnavailable(_gleif_breaker.retry_after())
+            _gleif_retries.inc(str(r.status_code))
             retry_after = r.headers.get("retry-after")
             sleep_seconds: float
             if retry_after is not None:
@@ -340,16 +2026,82 @@ async def _gleif_get(
 
     raise HTTPException(status_code=502, detail="GLEIF upstream not available")
 
+class CancelToken:
+    """Per-request cancellation flag, set once by a disconnect watcher.
+
+    Checking it is a plain attribute read.  Work started through ``run`` is
+    cancelled the moment the token fires and surfaces as a 499, so fan-outs
+    stop without waiting for their next ``_maybe_cancel`` checkpoint.
+    Calling the token returns the flag, so it is a drop-in ``cancel_check``.
+    """
+
+    __slots__ = ("cancelled", "_running")
+
+    def __init__(self) -> None:
+        self.cancelled = False
+        self._running: Set[asyncio.Future] = set()
+
+    async def __call__(self) -> bool:
+        return self.cancelled
+
+    def cancel(self) -> None:
+        if self.cancelled:
+            return
+        self.cancelled = True
+        for fut in list(self._running):
+            fut.cancel()
+
+    async def run(self, aw: Awaitable[Any]) -> Any:
+        fut = asyncio.ensure_future(aw)
+        if self.cancelled:
+            fut.cancel()
+            raise HTTPException(status_code=499, detail="Client closed request")
+        self._running.add(fut)
+        try:
+            return await fut
+        except asyncio.CancelledError:
+            if self.cancelled:
+                raise HTTPException(status_code=499, detail="Client closed request")
+            raise
+        finally:
+            self._running.discard(fut)
+
+
 async def _maybe_cancel(cancel_check: Optional[Callable[[], Awaitable[bool]]]) -> None:
     if cancel_check is None:
         return
-    if await cancel_check():
+    if cancel_check.cancelled if isinstance(cancel_check, CancelToken) else await cancel_check():
         raise HTTPException(status_code=499, detail="Client closed request")
 
-def _make_cancel_check(request: Request) -> Callable[[], Awaitable[bool]]:
-    async def _check() -> bool:
-        return await request.is_disconnected()
-    return _check
+
+async def _gather(cancel_check: Optional[Callable[[], Awaitable[bool]]], *aws: Awaitable[Any]) -> List[Any]:
+    """``asyncio.gather`` that a CancelToken aborts as soon as the client goes away."""
+    if isinstance(cancel_check, CancelToken):
+        return await cancel_check.run(asyncio.gather(*aws))
+    return list(await asyncio.gather(*aws))
+
+
+def _make_cancel_check(request: Request) -> CancelToken:
+    """Return a token that one watcher task sets when the client disconnects.
+
+    The watcher blocks on the ASGI receive channel instead of polling it.
+    The server also reports ``http.disconnect`` once the response is
+    complete, which ends the watcher; by then the request's work is done.
+    """
+    token = CancelToken()
+
+    async def watch() -> None:
+        while (await request.receive())["type"] != "http.disconnect":
+            pass
+        token.cancel()
+
+    watcher = asyncio.ensure_future(watch())
+    _disconnect_watchers.add(watcher)
+    watcher.add_done_callback(_disconnect_watchers.discard)
+    return token
+
+
+_disconnect_watchers: Set[asyncio.Future] = set()
 
 
 # ---------------------------------------------------------------------------
@@ -359,16 +2111,24 @@ def _make_cancel_check(request: Request) -> Callable[[], Awaitable[bool]]:
 async def _fetch_lei_raw(lei: str) -> Optional[dict]:
     """Fetch raw GLEIF record (cached). Single source of truth for per-LEI data."""
     cache_key = f"{CACHE_VERSION}:lei_raw:{lei}"
-    cached = lei_cache.get(cache_key)
+    cached = await lei_cache.aget(cache_key)
     if cached is not None:
         return cached
-    r = await _gleif_get(f"https://api.gleif.org/api/v1/lei-records/{lei}", timeout=20)
+    if _golden is not None:
+        local = await _golden.run(_golden.record, lei)
+        if local is not None:
+            return local
+    return await _inflight.do(cache_key, lambda: _load_lei_raw(lei))
+
+
+async def _load_lei_raw(lei: str) -> Optional[dict]:
+    r = await _gleif_get(f"{GLEIF_API_URL}/lei-records/{lei}", timeout=20)
     if r.status_code == 404:
         return None
     data = r.json().get("data")
     if not data:
         return None
-    lei_cache.set(cache_key, data)
+    lei_cache.set(f"{CACHE_VERSION}:lei_raw:{lei}", data)
     return data
 
 
@@ -383,9 +2143,86 @@ async def _fetch_lei(lei: str) -> Optional[Row]:
         return None
     row = _map_row(data)
     lei_cache.set(cache_key, row)
+    _name_index.add(row.lei, row.legalName)
     return row
 
 
+# GLEIF caps page[size] at 200, so one filter[lei] request resolves 200 LEIs.
+_BATCH_CHUNK = 200
+_BATCH_MAX_LEIS = 5000
+
+
+async def _fetch_lei_raw_many(leis: List[str]) -> Dict[str, dict]:
+    """Fetch raw records for many LEIs, grouping cache misses into filter[lei] queries.
+
+    Each chunk of up to 200 misses costs one rate-limit token instead of one
+    per LEI.  LEIs unknown upstream are simply absent from the result.
+    """
+    found: Dict[str, dict] = {}
+    missing: List[str] = []
+    unique = list(dict.fromkeys(leis))
+    hits = await lei_cache.aget_many(f"{CACHE_VERSION}:lei_raw:{lei}" for lei in unique)
+    local: Dict[str, dict] = {}
+    if _golden is not None:
+        absent = [lei for lei in unique if f"{CACHE_VERSION}:lei_raw:{lei}" not in hits]
+        if absent:
+            local = await _golden.run(_golden.records, absent)
+    for lei in unique:
+        cached = hits.get(f"{CACHE_VERSION}:lei_raw:{lei}") or local.get(lei)
+        if cached is not None:
+            found[lei] = cached
+        else:
+            missing.append(lei)
+
+    async def load(chunk: List[str]) -> Dict[str, dict]:
+        r = await _gleif_get(
+            f"{GLEIF_API_URL}/lei-records",
+            params={"filter[lei]": ",".join(chunk), "page[size]": str(_BATCH_CHUNK)},
+            timeout=30,
+        )
+        if r.status_code == 404:
+            return {}
+        out: Dict[str, dict] = {}
+        for item in r.json().get("data") or []:
+            lei = (item.get("attributes") or {}).get("lei") or item.get("id")
+            if lei:
+                lei_cache.set(f"{CACHE_VERSION}:lei_raw:{lei}", item)
+                out[str(lei)] = item
+        return out
+
+    chunks = [missing[i : i + _BATCH_CHUNK] for i in range(0, len(missing), _BATCH_CHUNK)]
+    results = await asyncio.gather(*[
+        _inflight.do(f"{CACHE_VERSION}:lei_batch:{','.join(c)}", lambda c=c: load(c)) for c in chunks
+    ])
+    for chunk_found in results:
+        found.update(chunk_found)
+    return found
+
+
+async def _fetch_leis(leis: List[str]) -> Dict[str, Row]:
+    """Batched counterpart of _fetch_lei; shares the lei_row and lei_raw caches."""
+    rows: Dict[str, Row] = {}
+    missing: List[str] = []
+    for lei in dict.fromkeys(leis):
+        cached = lei_cache.get(f"{CACHE_VERSION}:lei_row:{lei}")
+        if cached is not None:
+            rows[lei] = cached
+        else:
+            missing.append(lei)
+    if missing:
+        for lei, data in (await _fetch_lei_raw_many(missing)).items():
+            row = _map_row(data)
+            lei_cache.set(f"{CACHE_VERSION}:lei_row:{lei}", row)
+            _name_index.add(lei, row.legalName)
+            rows[lei] = row
+    return rows
+
+
+def _raw_legal_name(data: Any) -> Optional[str]:
+    entity = ((data or {}).get("attributes") or {}).get("entity") or {}
+    return (entity.get("legalName") or {}).get("name")
+
+
 def _map_details(data: dict) -> LeiDetails:
     attrs = data.get("attributes", {})
     entity = attrs.get("entity", {})
@@ -411,125 +2248,694 @@ def _map_details(data: dict) -> LeiDetails:
 
 async def _fetch_ultimate_parent(lei: str) -> Optional[str]:
     cache_key = f"{CACHE_VERSION}:ult_parent:{lei}"
+    cached = await lei_cache.aget(cache_key)
+    if cached is not None:
+        return cached or None
+    if _golden is not None:
+        known, parent_lei = await _golden.run(_golden.ultimate_parent, lei)
+        if known:
+            return parent_lei
+
+    async def load() -> Optional[str]:
+        r = await _gleif_get(f"{GLEIF_API_URL}/lei-records/{lei}/ultimate-parent", timeout=20)
+        data = r.json().get("data") if r.status_code != 404 else None
+        parent_lei = (data.get("id") or (data.get("attributes") or {}).get("lei")) if data else None
+        # "" records "no parent", so every view of a root doesn't ask again
+        lei_cache.set(cache_key, parent_lei or "")
+        return parent_lei
+
+    return await _inflight.do(cache_key, load)
+
+
+async def _fetch_direct_parent(lei: str) -> Optional[str]:
+    cache_key = f"{CACHE_VERSION}:direct_parent:{lei}"
     cached = lei_cache.get(cache_key)
     if cached is not None:
         return cached
-    r = await _gleif_get(f"https://api.gleif.org/api/v1/lei-records/{lei}/ultimate-parent", timeout=20)
-    if r.status_code == 404:
-        return None
-    data = r.json().get("data")
-    if not data:
-        return None
-    parent_lei = data.get("id") or (data.get("attributes") or {}).get("lei")
-    if parent_lei:
-        lei_cache.set(cache_key, parent_lei)
-    return parent_lei
+
+    async def load() -> Optional[str]:
+        r = await _gleif_get(f"{GLEIF_API_URL}/lei-records/{lei}/direct-parent", timeout=20)
+        if r.status_code == 404:
+            return None
+        data = r.json().get("data")
+        if not data:
+            return None
+        parent_lei = data.get("id") or (data.get("attributes") or {}).get("lei")
+        if parent_lei:
+            lei_cache.set(cache_key, parent_lei)
+        return parent_lei
+
+    return await _inflight.do(cache_key, load)
 
 
 async def _fetch_direct_children(
     lei: str,
     cancel_check: Optional[Callable[[], Awaitable[bool]]] = None,
 ) -> List[str]:
-    cache_key = f"{CACHE_VERSION}:children_ids:{lei}"
-    cached = lei_cache.get(cache_key)
-    if cached is not None:
-        return list(cached)
-    url = f"https://api.gleif.org/api/v1/lei-records/{lei}/direct-children?page[size]=200"
-    leis: List[str] = []
-    for _ in range(10):
+    known = _graph.child_ids(lei)
+    if known is None:
+        known = await _adopt_child_ids(lei, await lei_cache.aget(f"{CACHE_VERSION}:children_ids:{lei}"))
+    if known is not None:
+        return known
+    # Pages carry full records either way; load rows so one crawl serves both
+    rows = await _inflight.do_cancellable(
+        f"{CACHE_VERSION}:children_rows:{lei}", lambda cancel: _load_direct_children(lei, cancel), cancel_check
+    )
+    return [r.lei for r in rows]
+
+
+# Direct-children pages requested at once for one parent, once the first page
+# has said how many there are.  Every page still waits for the rate limiter.
+_CHILD_PAGE_SIZE = 200
+_CHILD_PAGE_CONCURRENCY = 4
+
+
+def _last_page(payload: Dict[str, Any], page_size: int) -> Optional[int]:
+    """Number of pages according to a GLEIF list response's meta, if it says."""
+    meta = payload.get("meta") or {}
+    last = (meta.get("pagination") or {}).get("lastPage")
+    if last is not None:
+        return int(last)
+    total = (meta.get("paging") or {}).get("totalRecords")
+    if total is not None:
+        return max(1, -(-int(total) // page_size))
+    return None
+
+
+def _page_rows(payload: Dict[str, Any]) -> List[Row]:
+    rows: List[Row] = []
+    for item in payload.get("data") or []:
+        attrs = item.get("attributes") if isinstance(item, dict) else None
+        if not isinstance(attrs, dict):
+            continue
+        try:
+            rows.append(_map_row(item))
+        except (KeyError, TypeError, ValueError):
+            continue
+    return rows
+
+
+async def _load_direct_children(
+    lei: str,
+    cancel_check: Optional[Callable[[], Awaitable[bool]]] = None,
+) -> List[Row]:
+    """Fetch every direct child of ``lei`` and fill the ids, rows and count caches.
+
+    When the first page reports the total, the remaining pages are requested
+    by number, a few at a time; otherwise ``links.next`` is followed to the end.
+    """
+    url = f"{GLEIF_API_URL}/lei-records/{lei}/direct-children"
+
+    async def fetch_page(number: int) -> Optional[Dict[str, Any]]:
         await _maybe_cancel(cancel_check)
-        r = await _gleif_get(url, timeout=30)
-        if r.status_code == 404:
-            break
-        payload = r.json()
-        for item in payload.get("data") or []:
-            cand = (item.get("attributes") or {}).get("lei") or item.get("id")
-            if cand:
-                leis.append(str(cand))
-        next_url = (payload.get("links") or {}).get("next")
-        if not next_url or next_url == url:
-            break
-        url = next_url
-    lei_cache.set(cache_key, leis)
-    return leis
+        r = await _gleif_get(
+            url, params={"page[size]": str(_CHILD_PAGE_SIZE), "page[number]": str(number)}, timeout=30
+        )
+        return None if r.status_code == 404 else r.json()
+
+    pages: List[List[Row]] = []
+    first = await fetch_page(1)
+    if first is not None:
+        pages.append(_page_rows(first))
+        last = _last_page(first, _CHILD_PAGE_SIZE)
+        if last is None:
+            seen: Set[str] = set()
+            next_url = (first.get("links") or {}).get("next")
+            while next_url and next_url not in seen:
+                seen.add(next_url)
+                await _maybe_cancel(cancel_check)
+                r = await _gleif_get(next_url, timeout=30)
+                if r.status_code == 404:
+                    break
+                payload = r.json()
+                pages.append(_page_rows(payload))
+                next_url = (payload.get("links") or {}).get("next")
+        elif last > 1:
+            sem = asyncio.Semaphore(_CHILD_PAGE_CONCURRENCY)
+
+            async def fetch_rows(number: int) -> List[Row]:
+                async with sem:
+                    payload = await fetch_page(number)
+                return _page_rows(payload) if payload is not None else []
+
+            pages.extend(await _gather(cancel_check, *[fetch_rows(n) for n in range(2, last + 1)]))
+
+    # Pages fetched side by side can overlap if the list shifts meanwhile
+    rows: List[Row] = []
+    seen_leis: Set[str] = set()
+    for page in pages:
+        for row in page:
+            if row.lei not in seen_leis:
+                seen_leis.add(row.lei)
+                rows.append(row)
+    lei_cache.set(f"{CACHE_VERSION}:children_ids:{lei}", [r.lei for r in rows])
+    lei_cache.set(f"{CACHE_VERSION}:direct_children_count:{lei}", len(rows))
+    _graph.set_child_rows(lei, rows)
+    _name_index.add_many((r.lei, r.legalName) for r in rows)
+    return rows
 
 async def _fetch_direct_children_rows(
     lei: str,
     cancel_check: Optional[Callable[[], Awaitable[bool]]] = None,
 ) -> List[Row]:
+    known = _graph.child_rows(lei)
+    if known is not None:
+        return known
+    if _golden is not None:
+
+        def load_local() -> tuple[Optional[List[str]], Dict[str, dict]]:
+            child_leis = _golden.direct_children(lei)
+            return child_leis, (_golden.records(child_leis) if child_leis else {})
+
+        child_leis, records = await _golden.run(load_local)
+        if child_leis is not None:
+            rows = [_map_row(records[c]) for c in child_leis if c in records]
+            _graph.set_child_rows(lei, rows)
+            _name_index.add_many((r.lei, r.legalName) for r in rows)
+            return list(rows)
     cache_key = f"{CACHE_VERSION}:children_rows:{lei}"
-    cached = lei_cache.get(cache_key)
+    return list(
+        await _inflight.do_cancellable(cache_key, lambda cancel: _load_direct_children(lei, cancel), cancel_check)
+    )
+
+
+# ---------------------------------------------------------------------------
+# Incremental hierarchy refresh
+# ---------------------------------------------------------------------------
+
+# Snapshots outlive the flat/shape results so an expired hierarchy can be
+# refreshed from lastUpdateDate deltas instead of a full re-crawl.
+HIERARCHY_SNAPSHOT_TTL_SECONDS = int(os.getenv("HIERARCHY_SNAPSHOT_TTL_SECONDS", "86400"))
+# Long crawls checkpoint their partial snapshot this often, so a crawl cut
+# short by a disconnect or a serverless timeout resumes instead of restarting.
+HIERARCHY_CHECKPOINT_SECONDS = float(os.getenv("HIERARCHY_CHECKPOINT_SECONDS", "10"))
+
+
+class _HierarchySnapshot:
+    """Parent->children adjacency (and packed child rows) seen by the last crawl of a root."""
+
+    __slots__ = ("taken_at", "children", "rows")
+
+    def __init__(self, taken_at: float, children: Dict[str, List[str]], rows: Dict[str, PackedRow]) -> None:
+        self.taken_at = taken_at
+        self.children = children
+        self.rows = rows
+
+    @property
+    def taken_on(self) -> str:
+        """UTC day of the crawl, the granularity used for lastUpdateDate filters."""
+        return time.strftime("%Y-%m-%d", time.gmtime(self.taken_at))
+
+
+async def _hierarchy_changes(
+    root_lei: str,
+    snapshot: _HierarchySnapshot,
+    cancel_check: Optional[Callable[[], Awaitable[bool]]] = None,
+) -> Optional[Set[str]]:
+    """Return the LEIs whose children must be re-fetched since ``snapshot``.
+
+    Asks GLEIF for records updated since the snapshot day: known members in
+    filter[lei] chunks of 200, plus the root's ultimate children to catch
+    entities that joined the group.  Changed records refresh the caches; the
+    changed entities, their old parents and their current parents are dirty.
+    Returns ``None`` if the delta cannot be determined (full crawl needed).
+    """
+    since = f">={snapshot.taken_on}"
+    members = sorted(set(snapshot.children) | set(snapshot.rows))
+    old_parent = {c: p for p, kids in snapshot.children.items() for c in kids}
+    changed: Dict[str, dict] = {}
+    try:
+        for i in range(0, len(members), _BATCH_CHUNK):
+            await _maybe_cancel(cancel_check)
+            r = await _gleif_get(
+                f"{GLEIF_API_URL}/lei-records",
+                params={
+                    "filter[lei]": ",".join(members[i : i + _BATCH_CHUNK]),
+                    "filter[registration.lastUpdateDate]": since,
+                    "page[size]": str(_BATCH_CHUNK),
+                },
+                timeout=30,
+            )
+            for item in (r.json().get("data") or []) if r.status_code != 404 else []:
+                lei = (item.get("attributes") or {}).get("lei") or item.get("id")
+                if lei:
+                    changed[str(lei)] = item
+        url = f"{GLEIF_API_URL}/lei-records/{root_lei}/ultimate-children"
+        params: Optional[Dict[str, Any]] = {"filter[registration.lastUpdateDate]": since, "page[size]": "200"}
+        for _ in range(10):
+            await _maybe_cancel(cancel_check)
+            r = await _gleif_get(url, params=params, timeout=30)
+            if r.status_code == 404:
+                break
+            payload = r.json()
+            for item in payload.get("data") or []:
+                lei = (item.get("attributes") or {}).get("lei") or item.get("id")
+                if lei:
+                    changed[str(lei)] = item
+            next_url = (payload.get("links") or {}).get("next")
+            if not next_url or next_url == url:
+                break
+            url, params = next_url, None
+        dirty: Set[str] = set(changed)
+        for lei in changed:
+            if lei in old_parent:
+                dirty.add(old_parent[lei])
+            # The entity may have moved; don't trust a cached direct parent
+            lei_cache.delete(f"{CACHE_VERSION}:direct_parent:{lei}")
+        parents = await _gather(cancel_check, *[_fetch_direct_parent(lei) for lei in changed])
+        dirty.update(p for p in parents if p)
+    except (httpx.HTTPError, ValueError) as exc:
+        logger.warning("Incremental refresh of %s failed (%s); re-crawling", root_lei, exc)
+        return None
+
+    for lei, item in changed.items():
+        lei_cache.set(f"{CACHE_VERSION}:lei_raw:{lei}", item)
+        lei_cache.delete(f"{CACHE_VERSION}:lei_row:{lei}")
+        snapshot.rows[lei] = _pack_row(_map_row(item))
+    for lei in dirty:
+        lei_cache.delete(f"{CACHE_VERSION}:children_ids:{lei}")
+        _graph.discard(lei)
+    logger.info("Incremental refresh of %s: %d changed, %d dirty", root_lei, len(changed), len(dirty))
+    return dirty
+
+
+class _HierarchyRecorder:
+    """Children provider for BFS crawls that reuses and records a snapshot.
+
+    Clean parents are answered from the previous snapshot; dirty or unknown
+    ones go through the normal (cached) fetch helpers.  Everything returned is
+    recorded into the next snapshot.
+
+    Checkpoints are written as numbered segments holding only the parents
+    expanded and rows seen since the previous one, plus a small head entry
+    naming the segments, so each costs time in proportion to new work.  The
+    crawl's remaining frontier is implied: recorded children that have no
+    entry of their own yet.  Each ``view`` (shape, flat) checkpoints under
+    its own key, so concurrent crawls of one group don't overwrite each other.
+    """
+
+    def __init__(
+        self,
+        root_lei: str,
+        view: str,
+        previous: Optional[_HierarchySnapshot],
+        dirty: Set[str],
+        taken_at: Optional[float] = None,
+    ) -> None:
+        self._key = f"{CACHE_VERSION}:snapshot:{root_lei}"
+        self._checkpoint_key = _checkpoint_key(root_lei, view)
+        self._checkpointed = time.time()
+        self._segments = 0
+        # Segments of an earlier attempt, replaced as this crawl checkpoints;
+        # _hierarchy_recorder has just loaded the head into memory
+        head = lei_cache.get(self._checkpoint_key)
+        self._stale_segments = head.get("segments", 0) if head else 0
+        self._new_parents: List[str] = []
+        self._new_rows: List[str] = []
+        self._previous = previous
+        self._dirty = dirty
+        self.snapshot = _HierarchySnapshot(time.time() if taken_at is None else taken_at, {}, {})
+
+    def _reusable(self, lei: str) -> Optional[List[str]]:
+        prev = self._previous
+        if prev is None or lei in self._dirty:
+            return None
+        return prev.children.get(lei)
+
+    async def child_rows(
+        self, lei: str, cancel_check: Optional[Callable[[], Awaitable[bool]]] = None
+    ) -> List[Row]:
+        known = self._reusable(lei)
+        if known is not None and all(c in self._previous.rows for c in known):
+            packed = [self._previous.rows[c] for c in known]
+            rows = [_unpack_row(p) for p in packed]
+        else:
+            rows = await _fetch_direct_children_rows(lei, cancel_check)
+            packed = [_pack_row(r) for r in rows]
+        self._record(lei, [r.lei for r in rows], packed)
+        return rows
+
+    async def child_ids(
+        self, lei: str, cancel_check: Optional[Callable[[], Awaitable[bool]]] = None
+    ) -> List[str]:
+        known = self._reusable(lei)
+        ids = list(known) if known is not None else await _fetch_direct_children(lei, cancel_check)
+        prev_rows = self._previous.rows if self._previous is not None else {}
+        self._record(lei, ids, [prev_rows[c] for c in ids if c in prev_rows])
+        return ids
+
+    def _record(self, lei: str, ids: List[str], rows: Iterable[PackedRow]) -> None:
+        snap = self.snapshot
+        if lei not in snap.children:
+            self._new_parents.append(lei)
+        snap.children[lei] = ids
+        for row in rows:
+            if row[0] not in snap.rows:
+                self._new_rows.append(row[0])
+            snap.rows[row[0]] = row
+        self._maybe_checkpoint()
+
+    def _maybe_checkpoint(self) -> None:
+        now = time.time()
+        if now - self._checkpointed < HIERARCHY_CHECKPOINT_SECONDS:
+            return
+        self._checkpointed = now
+        snap = self.snapshot
+        segment = {
+            "children": {lei: snap.children[lei] for lei in self._new_parents},
+            "rows": {lei: dict(zip(_ROW_FIELDS, snap.rows[lei])) for lei in self._new_rows},
+        }
+        self._new_parents, self._new_rows = [], []
+        lei_cache.set(f"{self._checkpoint_key}:{self._segments}", segment, ttl=HIERARCHY_SNAPSHOT_TTL_SECONDS)
+        self._segments += 1
+        head = {"takenAt": snap.taken_at, "segments": self._segments}
+        lei_cache.set(self._checkpoint_key, head, ttl=HIERARCHY_SNAPSHOT_TTL_SECONDS)
+        for n in range(self._segments, self._stale_segments):
+            lei_cache.delete(f"{self._checkpoint_key}:{n}")
+        self._stale_segments = 0
+
+    def save(self) -> None:
+        prev = self._previous
+        if prev is not None:
+            # Keep clean parts of the old snapshot the current crawl did not reach
+            for lei, kids in prev.children.items():
+                if lei not in self._dirty and lei not in self.snapshot.children:
+                    self.snapshot.children[lei] = kids
+            for lei, row in prev.rows.items():
+                self.snapshot.rows.setdefault(lei, row)
+        lei_cache.set(self._key, self.snapshot, ttl=HIERARCHY_SNAPSHOT_TTL_SECONDS)
+        _drop_checkpoint(self._checkpoint_key, max(self._segments, self._stale_segments))
+
+
+async def _load_checkpoint(checkpoint_key: str) -> Optional[_HierarchySnapshot]:
+    """Reassemble the partial snapshot an interrupted crawl left behind."""
+    head = await lei_cache.aget(checkpoint_key)
+    if head is None:
+        return None
+    snapshot = _HierarchySnapshot(head["takenAt"], {}, {})
+    keys = [f"{checkpoint_key}:{n}" for n in range(head.get("segments", 0))]
+    segments = await lei_cache.aget_many(keys)
+    for key in keys:
+        # A segment lost to eviction only means those parents are fetched again
+        segment = segments.get(key) or {}
+        snapshot.children.update(segment.get("children", {}))
+        snapshot.rows.update((lei, _pack_fields(row)) for lei, row in segment.get("rows", {}).items())
+    return snapshot
+
+
+def _drop_checkpoint(checkpoint_key: str, segments: int) -> None:
+    for n in range(segments):
+        lei_cache.delete(f"{checkpoint_key}:{n}")
+    lei_cache.delete(checkpoint_key)
+
+
+def _checkpoint_key(root_lei: str, view: str) -> str:
+    return f"{CACHE_VERSION}:checkpoint:{view}:{root_lei}"
+
+
+async def _hierarchy_recorder(
+    root_lei: str,
+    view: str,
+    cancel_check: Optional[Callable[[], Awaitable[bool]]] = None,
+    refresh: bool = False,
+) -> _HierarchyRecorder:
+    # An interrupted crawl left its partial snapshot behind; resume from it
+    previous = await _load_checkpoint(_checkpoint_key(root_lei, view))
+    if previous is None:
+        previous = lei_cache.get(f"{CACHE_VERSION}:snapshot:{root_lei}")
+    if previous is None:
+        return _HierarchyRecorder(root_lei, view, None, set())
+    if not refresh and time.time() - previous.taken_at < lei_cache.ttl:
+        # As fresh as any cached result; no need to ask upstream what changed
+        return _HierarchyRecorder(root_lei, view, previous, set(), taken_at=previous.taken_at)
+    dirty = await _inflight.do_cancellable(
+        f"{CACHE_VERSION}:delta:{root_lei}:{previous.taken_on}:{id(previous)}",
+        lambda cancel: _hierarchy_changes(root_lei, previous, cancel),
+        cancel_check,
+    )
+    if dirty is None:
+        return _HierarchyRecorder(root_lei, view, None, set())
+    return _HierarchyRecorder(root_lei, view, previous, dirty)
+
+
+def _shape_cache_key(root_lei: str, max_nodes: int) -> str:
+    return f"{CACHE_VERSION}:shape:v3:{root_lei}:{max_nodes}"
+
+
+def _flat_cache_key(root_lei: str, max_nodes: int) -> str:
+    return f"{CACHE_VERSION}:flat:{root_lei}:{max_nodes}"
+
+
+# Live counters of running shape/flat crawls, keyed by their result cache key.
+# The crawl and any hierarchy job reporting on it share one entry, which is
+# dropped when the last of them is done with it.
+_crawl_progress: Dict[str, Dict[str, int]] = {}
+_crawl_progress_users: Counter[str] = Counter()
+
+
+@contextmanager
+def _progress_for(cache_key: str) -> Iterator[Dict[str, int]]:
+    progress = _crawl_progress.setdefault(cache_key, {"visited": 0, "frontier": 0, "depth": 0})
+    _crawl_progress_users[cache_key] += 1
+    try:
+        yield progress
+    finally:
+        _crawl_progress_users[cache_key] -= 1
+        if _crawl_progress_users[cache_key] <= 0:
+            del _crawl_progress_users[cache_key]
+            _crawl_progress.pop(cache_key, None)
+
+
+# ---------------------------------------------------------------------------
+# Derived hierarchy facts
+# ---------------------------------------------------------------------------
+#
+# Counts and shapes answered from what is already held (graph edges, cached
+# id lists, the golden copy, complete flat results) before going upstream.
+
+# Flat results worth checking: the endpoint's cap and the largest job size
+_FLAT_SIZES = (5000, 20000)
+
+
+async def _known_direct_children(lei: str) -> Optional[List[str]]:
+    known = _graph.child_ids(lei)
+    if known is not None:
+        return known
+    return await _adopt_child_ids(lei, lei_cache.get(f"{CACHE_VERSION}:children_ids:{lei}"))
+
+
+async def _adopt_child_ids(lei: str, cached: Optional[List[str]]) -> Optional[List[str]]:
     if cached is not None:
+        _graph.set_child_ids(lei, cached)
         return list(cached)
-    url = f"https://api.gleif.org/api/v1/lei-records/{lei}/direct-children?page[size]=200"
-    rows: List[Row] = []
-    for _ in range(10):
-        await _maybe_cancel(cancel_check)
-        r = await _gleif_get(url, timeout=30)
-        if r.status_code == 404:
-            break
-        payload = r.json()
-        for item in payload.get("data") or []:
-            attrs = item.get("attributes") if isinstance(item, dict) else None
-            if not isinstance(attrs, dict):
-                continue
-            try:
-                rows.append(_map_row(item))
-            except (KeyError, TypeError, ValueError):
-                continue
-        next_url = (payload.get("links") or {}).get("next")
-        if not next_url or next_url == url:
-            break
-        url = next_url
-    lei_cache.set(cache_key, rows)
-    return rows
+    if _golden is not None:
+        return await _golden.run(_golden.direct_children, lei)
+    return None
+
+
+def _untruncated_flat(root_lei: str) -> Optional[FlatHierarchy]:
+    for size in _FLAT_SIZES:
+        flat = lei_cache.get(_flat_cache_key(root_lei, size))
+        if flat is not None and len(flat) < size:
+            return flat
+    return None
+
+
+def _complete_flat(lei: str) -> Optional[FlatHierarchy]:
+    """An untruncated flat result for the group ``lei`` belongs to (as root or member)."""
+    flat = _untruncated_flat(lei)
+    if flat is not None:
+        return flat
+    root_lei = lei_cache.get(f"{CACHE_VERSION}:ult_parent:{lei}")
+    if root_lei and root_lei != lei:
+        flat = _untruncated_flat(root_lei)
+        if flat is not None and lei in flat.columns["lei"]:
+            return flat
+    return None
+
+
+async def _derived_direct_children_count(lei: str) -> Optional[int]:
+    known = await _known_direct_children(lei)
+    if known is not None:
+        return len(known)
+    flat = _complete_flat(lei)
+    if flat is not None:
+        return sum(1 for parent_lei in flat.parents if parent_lei == lei)
+    return None
+
+
+def _derived_ultimate_children_count(lei: str) -> Optional[int]:
+    for size in _FLAT_SIZES:
+        shape = lei_cache.get(_shape_cache_key(lei, size))
+        if shape is not None:
+            return shape.ultimateChildrenCount
+    return None
+
+
+# Parents walked between yields to the event loop when deriving a shape
+_DERIVE_YIELD_EVERY = 1000
+
+
+async def _derived_shape_counts(
+    root_lei: str, max_nodes: int, progress: Dict[str, int]
+) -> Optional[tuple[int, int, int]]:
+    """``(maxDepth, directChildrenCount, visitedCount)`` without a crawl, if the whole group is known.
+
+    Only answers when the crawl would have finished under ``max_nodes``,
+    so the figures match what ``_crawl_hierarchy_shape`` would report.
+    ``progress`` carries ``derived: 1`` while known edges are being walked,
+    so a job reporting on it is not mistaken for a crawl.
+    """
+    flat = _untruncated_flat(root_lei)
+    if flat is not None and len(flat) < max_nodes:
+        direct = sum(1 for parent_lei in flat.parents if parent_lei == root_lei)
+        progress.update(visited=len(flat), frontier=0, depth=flat.max_depth(), derived=1)
+        return flat.max_depth(), direct, len(flat)
+    progress["derived"] = 1
+    counts = await _walk_known_edges(root_lei, max_nodes, progress)
+    if counts is None:
+        # A crawl takes over from here
+        progress.pop("derived", None)
+    return counts
+
+
+async def _walk_known_edges(
+    root_lei: str, max_nodes: int, progress: Dict[str, int]
+) -> Optional[tuple[int, int, int]]:
+    """BFS over edges already held; gives up at the first parent not known anywhere.
+
+    Edges held in memory are read inline; the rest of each level is looked up
+    in the golden copy in one batched query, off the event loop.
+    """
+    visited: Set[str] = {root_lei}
+    frontier = [root_lei]
+    depth = 0
+    direct = 0
+    walked = 0
+    while frontier:
+        known: Dict[str, List[str]] = {}
+        unknown: List[str] = []
+        for lei in frontier:
+            ids = _graph.child_ids(lei)
+            if ids is None:
+                cached = lei_cache.get(f"{CACHE_VERSION}:children_ids:{lei}")
+                if cached is not None:
+                    _graph.set_child_ids(lei, cached)
+                    ids = list(cached)
+            if ids is None:
+                unknown.append(lei)
+            else:
+                known[lei] = ids
+        if unknown:
+            if _golden is None:
+                return None
+            known.update(await _golden.run(_golden.direct_children_many, unknown))
+        next_level: List[str] = []
+        for i, lei in enumerate(frontier):
+            children = known.get(lei)
+            if children is None:
+                return None
+            for child in children:
+                if child not in visited:
+                    visited.add(child)
+                    next_level.append(child)
+            if len(visited) >= max_nodes:
+                return None
+            walked += 1
+            if walked % _DERIVE_YIELD_EVERY == 0:
+                progress.update(visited=len(visited), frontier=len(frontier) - i - 1 + len(next_level), depth=depth)
+                await asyncio.sleep(0)
+        if depth == 0:
+            direct = len(next_level)
+        if next_level:
+            depth += 1
+        frontier = next_level
+        progress.update(visited=len(visited), frontier=len(frontier), depth=depth)
+    return depth, direct, len(visited)
+
+
 async def _compute_hierarchy_shape(
     root_lei: str,
     max_nodes: int = 20000,
     cancel_check: Optional[Callable[[], Awaitable[bool]]] = None,
 ) -> HierarchyShape:
-    cache_key = f"{CACHE_VERSION}:shape:v3:{root_lei}:{max_nodes}"
+    cache_key = _shape_cache_key(root_lei, max_nodes)
     cached = lei_cache.get(cache_key)
     if cached is not None:
         return cached
+    with _progress_for(cache_key) as progress:
+        derived = await _derived_shape_counts(root_lei, max_nodes, progress)
+    if derived is not None:
+        max_depth, direct, visited = derived
+        shape = HierarchyShape(
+            maxDepth=max_depth,
+            directChildrenCount=direct,
+            descendantsCount=visited - 1,
+            ultimateChildrenCount=await _fetch_ultimate_children_count(root_lei, cancel_check),
+            visitedCount=visited,
+        )
+        _derived_answers.inc("shape")
+        lei_cache.set(cache_key, shape)
+        return shape
+    return await _inflight.do_cancellable(
+        cache_key, lambda cancel: _crawl_hierarchy_shape(root_lei, max_nodes, cache_key, cancel), cancel_check
+    )
 
-    root_children = await _fetch_direct_children(root_lei, cancel_check)
 
-    visited: set[str] = {root_lei}
-    frontier: List[str] = list(root_children)
-    depth = 0
-    bfs_semaphore = asyncio.Semaphore(10)
+async def _crawl_hierarchy_shape(
+    root_lei: str,
+    max_nodes: int,
+    cache_key: str,
+    cancel_check: Optional[Callable[[], Awaitable[bool]]] = None,
+    refresh: bool = False,
+) -> HierarchyShape:
+    _request_priority.set(PRIORITY_BULK)
+    # Inner cache reads belong to the crawl, not to the response that awaits it
+    _cache_reads.set(None)
+    recorder = await _hierarchy_recorder(root_lei, "shape", cancel_check, refresh)
+    root_children = await recorder.child_ids(root_lei, cancel_check)
 
-    async def fetch_ids(lei: str) -> List[str]:
-        async with bfs_semaphore:
-            try:
-                await _maybe_cancel(cancel_check)
-                return await _fetch_direct_children(lei, cancel_check)
-            except (httpx.HTTPError, ValueError):
-                return []
+    with _progress_for(cache_key) as progress:
+        visited: set[str] = {root_lei, *root_children}
+        frontier: List[str] = list(root_children)
+        depth = 0
+        bfs_semaphore = asyncio.Semaphore(10)
+        progress.update(visited=len(visited), frontier=len(frontier), depth=depth)
 
-    while frontier and len(visited) < max_nodes:
-        await _maybe_cancel(cancel_check)
-        depth += 1
-        next_level: List[str] = []
-        # Process frontier in chunks to avoid thundering-herd
-        CHUNK = 40
-        for i in range(0, len(frontier), CHUNK):
-            chunk = frontier[i : i + CHUNK]
-            results = await asyncio.gather(*[fetch_ids(x) for x in chunk])
-            for ids in results:
-                for cid in ids:
-                    if cid not in visited:
-                        visited.add(cid)
-                        next_level.append(cid)
-                        if len(visited) >= max_nodes:
-                            break
+        async def fetch_ids(lei: str) -> List[str]:
+            async with bfs_semaphore:
+                try:
+                    await _maybe_cancel(cancel_check)
+                    return await recorder.child_ids(lei, cancel_check)
+                except (httpx.HTTPError, ValueError):
+                    return []
+
+        while frontier and len(visited) < max_nodes:
+            await _maybe_cancel(cancel_check)
+            depth += 1
+            next_level: List[str] = []
+            # Process frontier in chunks to avoid thundering-herd
+            CHUNK = 40
+            for i in range(0, len(frontier), CHUNK):
+                chunk = frontier[i : i + CHUNK]
+                results = await _gather(cancel_check, *[fetch_ids(x) for x in chunk])
+                for ids in results:
+                    for cid in ids:
+                        if cid not in visited:
+                            visited.add(cid)
+                            next_level.append(cid)
+                            if len(visited) >= max_nodes:
+                                break
+                    if len(visited) >= max_nodes:
+                        break
+                progress.update(
+                    visited=len(visited), frontier=len(frontier) - i - len(chunk) + len(next_level), depth=depth
+                )
                 if len(visited) >= max_nodes:
                     break
-            if len(visited) >= max_nodes:
-                break
-        frontier = next_level
+            frontier = next_level
 
+    recorder.save()
     ultimate_cnt = await _fetch_ultimate_children_count(root_lei, cancel_check)
     shape = HierarchyShape(
         maxDepth=depth,
@@ -545,24 +2951,87 @@ async def _compute_hierarchy_shape(
 
 async def _build_hierarchy(
     root_lei: str,
+    max_nodes: int = 5000,
+    max_depth: Optional[int] = None,
     cancel_check: Optional[Callable[[], Awaitable[bool]]] = None,
 ) -> Optional[HierarchyNode]:
-    visited: Set[str] = set()
+    """BFS the hierarchy level by level and return it as a nested tree.
+
+    Uses the same _fetch_direct_children_rows payloads as the flat endpoint,
+    so no per-node record fetch is needed.  Nodes whose children were not
+    explored because of ``max_nodes``/``max_depth`` are marked ``truncated``.
+    """
+    cache_key = f"{CACHE_VERSION}:tree:{root_lei}:{max_nodes}:{max_depth}"
+    cached = lei_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    return await _inflight.do_cancellable(
+        cache_key,
+        lambda cancel: _crawl_hierarchy_tree(root_lei, max_nodes, max_depth, cache_key, cancel),
+        cancel_check,
+    )
+
+
+async def _crawl_hierarchy_tree(
+    root_lei: str,
+    max_nodes: int,
+    max_depth: Optional[int],
+    cache_key: str,
+    cancel_check: Optional[Callable[[], Awaitable[bool]]] = None,
+) -> Optional[HierarchyNode]:
+    _request_priority.set(PRIORITY_BULK)
+    root_row = await _fetch_lei(root_lei)
+    if not root_row:
+        return None
+
+    root = HierarchyNode(entity=root_row)
+    nodes: Dict[str, HierarchyNode] = {root_lei: root}
+    visited: Set[str] = {root_lei}
+    frontier: List[str] = [root_lei]
+    depth = 0
+    sem = asyncio.Semaphore(10)
+
+    async def fetch_rows(parent_lei: str) -> List[Row]:
+        async with sem:
+            await _maybe_cancel(cancel_check)
+            try:
+                return await _fetch_direct_children_rows(parent_lei, cancel_check)
+            except (httpx.HTTPError, ValueError):
+                return []
 
-    async def build(lei: str) -> Optional[HierarchyNode]:
+    while frontier:
         await _maybe_cancel(cancel_check)
-        if lei in visited:
-            return None
-        visited.add(lei)
-        row = await _fetch_lei(lei)
-        if not row:
-            return None
-        child_leis = await _fetch_direct_children(lei, cancel_check)
-        children_nodes_raw = await asyncio.gather(*[build(c) for c in child_leis])
-        children_nodes = [c for c in children_nodes_raw if c]
-        return HierarchyNode(entity=row, children=children_nodes)
+        if len(visited) >= max_nodes or (max_depth is not None and depth >= max_depth):
+            for lei in frontier:
+                nodes[lei].truncated = True
+            break
+        depth += 1
+        next_frontier: List[str] = []
+        CHUNK = 30
+        for i in range(0, len(frontier), CHUNK):
+            if len(visited) >= max_nodes:
+                for lei in frontier[i:]:
+                    nodes[lei].truncated = True
+                break
+            chunk = frontier[i : i + CHUNK]
+            batch = await _gather(cancel_check, *[fetch_rows(lei) for lei in chunk])
+            for parent_lei, rows in zip(chunk, batch):
+                parent = nodes[parent_lei]
+                for row in rows:
+                    if row.lei in visited:
+                        continue
+                    if len(visited) >= max_nodes:
+                        parent.truncated = True
+                        break
+                    visited.add(row.lei)
+                    node = HierarchyNode(entity=row)
+                    parent.children.append(node)
+                    nodes[row.lei] = node
+                    next_frontier.append(row.lei)
+        frontier = next_frontier
 
-    return await build(root_lei)
+    lei_cache.set(cache_key, root)
+    return root
 
 
 class FlatNode(BaseModel):
@@ -570,11 +3039,97 @@ class FlatNode(BaseModel):
     entity: Row
 
 
+class FlatSummary(BaseModel):
+    """Trailing record of the NDJSON flat-hierarchy stream."""
+    count: int = 0
+    maxDepth: int = 0
+    truncated: bool = False
+
+
+
+def _json_bytes(value: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def _flat_node_json(parent_lei: Optional[str], row: Row) -> bytes:
+    """One FlatNode as JSON, without going through Pydantic serialisation."""
+    return _json_bytes({"parentLei": parent_lei, "entity": {f: getattr(row, f) for f in _ROW_FIELDS}})
+
+
+class FlatHierarchy:
+    """Flat hierarchy held column-wise instead of as FlatNode/Row models.
+
+    Every Row field is one list, parent LEIs another, so a cached group costs
+    a few pointers per node rather than two model instances.  Responses are
+    encoded straight to JSON bytes in the FlatNode shape.
+    """
+
+    __slots__ = ("parents", "columns")
+
+    def __init__(self) -> None:
+        self.parents: List[Optional[str]] = []
+        self.columns: Dict[str, List[Any]] = {f: [] for f in _ROW_FIELDS}
+
+    def __len__(self) -> int:
+        return len(self.parents)
+
+    def append(self, parent_lei: Optional[str], row: Row) -> None:
+        self.parents.append(sys.intern(parent_lei) if parent_lei else None)
+        for column, value in zip(self.columns.values(), _pack_row(row)):
+            column.append(value)
+
+    def extend(self, nodes: Iterable[tuple[Optional[str], Row]]) -> None:
+        for parent_lei, row in nodes:
+            self.append(parent_lei, row)
+
+    def _nodes(self) -> Iterator[Dict[str, Any]]:
+        columns = list(self.columns.items())
+        for i, parent_lei in enumerate(self.parents):
+            yield {"parentLei": parent_lei, "entity": {f: column[i] for f, column in columns}}
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        return list(self._nodes())
+
+    def to_json(self) -> bytes:
+        return _json_bytes(self.to_list())
+
+    def to_ndjson(self) -> bytes:
+        return b"".join(_json_bytes(node) + b"\n" for node in self._nodes())
+
+    def to_columnar(self) -> Dict[str, Any]:
+        """Dictionary-encoded column layout served for COLUMNAR_JSON/COLUMNAR_MSGPACK.
+
+        ``parents`` holds the row index of each node's parent (-1 for the
+        root).  Low-cardinality columns are sent as ``{"dictionary", "codes"}``;
+        the others as plain arrays.
+        """
+        index = {lei: i for i, lei in enumerate(self.columns["lei"])}
+        columns: Dict[str, Any] = {}
+        for field, values in self.columns.items():
+            if field in _INTERNED_ROW_FIELDS and field != "lei":
+                dictionary: Dict[Any, int] = {}
+                codes = [dictionary.setdefault(v, len(dictionary)) for v in values]
+                columns[field] = {"dictionary": list(dictionary), "codes": codes}
+            else:
+                columns[field] = [list(v) if isinstance(v, tuple) else v for v in values]
+        parents = [index.get(p, -1) if p else -1 for p in self.parents]
+        return {"count": len(self), "parents": parents, "columns": columns}
+
+    def max_depth(self) -> int:
+        # BFS order: a parent always precedes its children
+        depths: Dict[str, int] = {}
+        for lei, parent_lei in zip(self.columns["lei"], self.parents):
+            depths[lei] = depths.get(parent_lei, -1) + 1 if parent_lei else 0
+        return max(depths.values(), default=0)
+
+
 async def _build_hierarchy_flat(
     root_lei: str,
     max_nodes: int = 5000,
     cancel_check: Optional[Callable[[], Awaitable[bool]]] = None,
-) -> List[FlatNode]:
+) -> FlatHierarchy:
     """BFS the hierarchy and return a flat list of (parentLei, Row).
     
     Much faster than the tree endpoint because:
@@ -582,55 +3137,109 @@ async def _build_hierarchy_flat(
       all children) instead of individual per-LEI fetches.
     - Processes each BFS level in parallel batches via a semaphore.
     """
-    cache_key = f"{CACHE_VERSION}:flat:{root_lei}:{max_nodes}"
+    cache_key = _flat_cache_key(root_lei, max_nodes)
     cached = lei_cache.get(cache_key)
     if cached is not None:
         return cached
+    return await _inflight.do_cancellable(
+        cache_key, lambda cancel: _crawl_hierarchy_flat(root_lei, max_nodes, cache_key, cancel), cancel_check
+    )
 
+
+async def _crawl_hierarchy_flat(
+    root_lei: str,
+    max_nodes: int,
+    cache_key: str,
+    cancel_check: Optional[Callable[[], Awaitable[bool]]] = None,
+    refresh: bool = False,
+) -> FlatHierarchy:
+    _request_priority.set(PRIORITY_BULK)
+    # Inner cache reads belong to the crawl, not to the response that awaits it
+    _cache_reads.set(None)
+    recorder = await _hierarchy_recorder(root_lei, "flat", cancel_check, refresh)
+    result = FlatHierarchy()
+    with _progress_for(cache_key) as progress:
+        async for nodes in _iter_hierarchy_flat(
+            root_lei, max_nodes, FlatSummary(), cancel_check, recorder.child_rows, progress
+        ):
+            result.extend(nodes)
+    recorder.save()
+    lei_cache.set(cache_key, result)
+    return result
+
+
+async def _iter_hierarchy_flat(
+    root_lei: str,
+    max_nodes: int,
+    summary: FlatSummary,
+    cancel_check: Optional[Callable[[], Awaitable[bool]]] = None,
+    child_rows: Callable[..., Awaitable[List[Row]]] = _fetch_direct_children_rows,
+    progress: Optional[Dict[str, int]] = None,
+) -> AsyncIterator[List[tuple[Optional[str], Row]]]:
+    """Yield ``(parentLei, Row)`` pairs in BFS order, one batch per resolved chunk.
+
+    ``summary`` is filled in as the crawl progresses so streaming callers can
+    report depth and truncation once the generator is exhausted.  ``progress``,
+    if given, is kept up to date with visited/frontier/depth counters.
+    """
+    if progress is None:
+        progress = {}
     root_row = await _fetch_lei(root_lei)
     if not root_row:
-        return []
+        return
 
-    result: List[FlatNode] = [FlatNode(parentLei=None, entity=root_row)]
+    summary.count = 1
+    progress.update(visited=1, frontier=1, depth=0)
+    yield [(None, root_row)]
     visited: set[str] = {root_lei}
-    # frontier = list of (parent_lei, child_lei) to process
     frontier: List[str] = [root_lei]
     sem = asyncio.Semaphore(10)
 
-    async def fetch_children_of(parent_lei: str) -> List[FlatNode]:
+    async def fetch_children_of(parent_lei: str) -> List[tuple[Optional[str], Row]]:
         async with sem:
             await _maybe_cancel(cancel_check)
             try:
-                rows = await _fetch_direct_children_rows(parent_lei, cancel_check)
+                rows = await child_rows(parent_lei, cancel_check)
             except (httpx.HTTPError, ValueError):
                 return []
-            return [FlatNode(parentLei=parent_lei, entity=r) for r in rows]
+            return [(parent_lei, r) for r in rows]
 
-    while frontier and len(result) < max_nodes:
+    depth = 0
+    while frontier:
+        if summary.count >= max_nodes:
+            summary.truncated = True
+            break
         await _maybe_cancel(cancel_check)
+        depth += 1
         # Fetch all children for the entire current level in parallel
         CHUNK = 30
         next_frontier: List[str] = []
         for i in range(0, len(frontier), CHUNK):
             chunk = frontier[i : i + CHUNK]
-            batch = await asyncio.gather(*[fetch_children_of(lei) for lei in chunk])
+            batch = await _gather(cancel_check, *[fetch_children_of(lei) for lei in chunk])
+            fresh: List[tuple[Optional[str], Row]] = []
             for nodes in batch:
-                for fn in nodes:
-                    if fn.entity.lei not in visited:
-                        visited.add(fn.entity.lei)
-                        result.append(fn)
-                        next_frontier.append(fn.entity.lei)
-                        if len(result) >= max_nodes:
+                for parent_lei, row in nodes:
+                    if row.lei not in visited:
+                        if summary.count >= max_nodes:
+                            summary.truncated = True
                             break
-                if len(result) >= max_nodes:
+                        visited.add(row.lei)
+                        fresh.append((parent_lei, row))
+                        next_frontier.append(row.lei)
+                        summary.count += 1
+                if summary.truncated:
                     break
-            if len(result) >= max_nodes:
-                break
+            progress.update(
+                visited=summary.count, frontier=len(frontier) - i - len(chunk) + len(next_frontier), depth=depth
+            )
+            if fresh:
+                summary.maxDepth = depth
+                yield fresh
+            if summary.truncated:
+                return
         frontier = next_frontier
 
-    lei_cache.set(cache_key, result)
-    return result
-
 
 async def _fetch_ultimate_children_count(
     lei: str,
@@ -642,10 +3251,18 @@ async def _fetch_ultimate_children_count(
     Fall back to paginating if the field is missing.
     """
     cache_key = f"{CACHE_VERSION}:ultimate_children_count:{lei}"
-    cached = lei_cache.get(cache_key)
+    cached = await lei_cache.aget(cache_key)
     if cached is not None:
         return int(cached)
-    url = f"https://api.gleif.org/api/v1/lei-records/{lei}/ultimate-children"
+    if _golden is not None:
+        local = await _golden.run(_golden.ultimate_children_count, lei)
+        if local is not None:
+            return local
+    derived = _derived_ultimate_children_count(lei)
+    if derived is not None:
+        _derived_answers.inc("ultimate_children_count")
+        return derived
+    url = f"{GLEIF_API_URL}/lei-records/{lei}/ultimate-children"
     await _maybe_cancel(cancel_check)
     r = await _gleif_get(url, params={"page[size]": "1"}, timeout=30)
     if r.status_code == 404:
@@ -681,10 +3298,14 @@ async def _fetch_direct_children_count(
 ) -> int:
     """Get total direct-children count (prefers meta.paging.totalRecords)."""
     cache_key = f"{CACHE_VERSION}:direct_children_count:{lei}"
-    cached = lei_cache.get(cache_key)
+    cached = await lei_cache.aget(cache_key)
     if cached is not None:
         return int(cached)
-    url = f"https://api.gleif.org/api/v1/lei-records/{lei}/direct-children"
+    derived = await _derived_direct_children_count(lei)
+    if derived is not None:
+        _derived_answers.inc("direct_children_count")
+        return derived
+    url = f"{GLEIF_API_URL}/lei-records/{lei}/direct-children"
     await _maybe_cancel(cancel_check)
     r = await _gleif_get(url, params={"page[size]": "1"}, timeout=30)
     if r.status_code == 404:
@@ -713,27 +3334,356 @@ async def _fetch_direct_children_count(
     lei_cache.set(cache_key, total)
     return total
 
-@app.get("/api/lei/{lei}", response_model=Optional[Row])
-async def get_lei(lei: str, response: Response):
-    if not LEI_PATTERN.match(lei):
-        raise HTTPException(status_code=400, detail="Invalid LEI format")
-    response.headers["Cache-Control"] = "public, max-age=300"
-    row = await _fetch_lei(lei)
-    return row
 
+# ---------------------------------------------------------------------------
+# Ultimate-children export
+# ---------------------------------------------------------------------------
+
+_EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+# GLEIF pages are 200 rows; Parquet row groups that small would bloat the file
+_PARQUET_ROW_GROUP = 10000
 
-@app.get("/api/search", response_model=List[Row])
-async def search(q: str, response: Response):
-    q = q.strip()
-    if not q:
-        return []
-    response.headers["Cache-Control"] = "public, max-age=120"
-    if LEI_PATTERN.match(q):
-        row = await _fetch_lei(q)
-        return [row] if row else []
-    # name / autocomplete path
+
+async def _iter_ultimate_children(
+    first: Dict[str, Any],
+    cancel_check: Optional[Callable[[], Awaitable[bool]]] = None,
+) -> AsyncIterator[List[Row]]:
+    """Rows of each ``ultimate-children`` page, starting from the already fetched ``first``."""
+    payload = first
+    url = None
+    while True:
+        yield [_map_row(item) for item in payload.get("data") or []]
+        next_url = (payload.get("links") or {}).get("next")
+        if not next_url or next_url == url:
+            return
+        await _maybe_cancel(cancel_check)
+        url = next_url
+        r = await _gleif_get(url, timeout=30)
+        if r.status_code == 404:
+            return
+        payload = r.json()
+
+
+def _csv_chunk(rows: List[Row], header: bool) -> bytes:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    if header:
+        writer.writerow(_ROW_FIELDS)
+    for row in rows:
+        values = (getattr(row, f) for f in _ROW_FIELDS)
+        writer.writerow([";".join(v) if isinstance(v, list) else v for v in values])
+    return buf.getvalue().encode("utf-8")
+
+
+class _ChunkSink:
+    """Write-only file object for ParquetWriter; ``drain`` hands back what was written."""
+
+    def __init__(self) -> None:
+        self._chunks: List[bytes] = []
+        self._written = 0
+        self.closed = False
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        self._written += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._written
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        out = b"".join(self._chunks)
+        self._chunks.clear()
+        return out
+
+
+async def _parquet_stream(pages: AsyncIterator[List[Row]]) -> AsyncIterator[bytes]:
+    schema = pyarrow.schema(
+        [(f, pyarrow.list_(pyarrow.string()) if f == "spglobal" else pyarrow.string()) for f in _ROW_FIELDS]
+    )
+    sink = _ChunkSink()
+    writer = pyarrow.parquet.ParquetWriter(sink, schema)
+    columns: Dict[str, List[Any]] = {f: [] for f in _ROW_FIELDS}
+    buffered = 0
+    async for rows in pages:
+        for row in rows:
+            for f in _ROW_FIELDS:
+                columns[f].append(getattr(row, f))
+        buffered += len(rows)
+        if buffered >= _PARQUET_ROW_GROUP:
+            writer.write_table(pyarrow.table(columns, schema=schema))
+            columns = {f: [] for f in _ROW_FIELDS}
+            buffered = 0
+            yield sink.drain()
+    if buffered:
+        writer.write_table(pyarrow.table(columns, schema=schema))
+    writer.close()
+    yield sink.drain()
+
+
+async def _export_ultimate_children(pages: AsyncIterator[List[Row]], fmt: str) -> AsyncIterator[bytes]:
+    """Encode pages of rows as they arrive; only one page (or Parquet row group) is held."""
+    _request_priority.set(PRIORITY_BULK)
+    if fmt == "parquet":
+        async for chunk in _parquet_stream(pages):
+            yield chunk
+        return
+    header = True
+    async for rows in pages:
+        if fmt == "csv":
+            yield _csv_chunk(rows, header)
+            header = False
+        else:
+            yield b"".join(_json_bytes({f: getattr(row, f) for f in _ROW_FIELDS}) + b"\n" for row in rows)
+
+
+# ---------------------------------------------------------------------------
+# Cache warmer (refresh-ahead)
+# ---------------------------------------------------------------------------
+
+# Entries hit at least CACHE_WARM_MIN_HITS times since they were stored are
+# refreshed CACHE_WARM_AHEAD_SECONDS before they expire.  Refreshes run in the
+# bulk lane and only start while no upstream call is queued; readers keep
+# getting the old value until the new one is set.  0 disables the warmer.
+CACHE_WARM_INTERVAL_SECONDS = float(os.getenv("CACHE_WARM_INTERVAL_SECONDS", "15"))
+CACHE_WARM_AHEAD_SECONDS = float(os.getenv("CACHE_WARM_AHEAD_SECONDS", "90"))
+CACHE_WARM_MIN_HITS = int(os.getenv("CACHE_WARM_MIN_HITS", "3"))
+CACHE_WARM_CONCURRENCY = int(os.getenv("CACHE_WARM_CONCURRENCY", "2"))
+_warm_tasks: Set["asyncio.Task[None]"] = set()
+
+
+async def _refresh_lei(lei: str) -> None:
+    data = await _golden.run(_golden.record, lei) if _golden is not None else None
+    if data is None:
+        data = await _inflight.do(f"{CACHE_VERSION}:lei_raw:{lei}", lambda: _load_lei_raw(lei))
+    if data:
+        lei_cache.set(f"{CACHE_VERSION}:lei_row:{lei}", _map_row(data))
+
+
+async def _refresh_children_ids(lei: str) -> None:
+    _graph.discard(lei)
+    await _inflight.do(f"{CACHE_VERSION}:children_rows:{lei}", lambda: _load_direct_children(lei))
+
+
+async def _refresh_flat(rest: str) -> None:
+    root_lei, max_nodes = rest.split(":")[-2:]
+    cache_key = _flat_cache_key(root_lei, int(max_nodes))
+    await _inflight.do(
+        cache_key, lambda: _crawl_hierarchy_flat(root_lei, int(max_nodes), cache_key, refresh=True)
+    )
+
+
+async def _refresh_shape(rest: str) -> None:
+    root_lei, max_nodes = rest.split(":")[-2:]
+    cache_key = _shape_cache_key(root_lei, int(max_nodes))
+    lei_cache.delete(f"{CACHE_VERSION}:ultimate_children_count:{root_lei}")
+    await _inflight.do(
+        cache_key, lambda: _crawl_hierarchy_shape(root_lei, int(max_nodes), cache_key, refresh=True)
+    )
+
+
+# Refreshers by cache key kind; each takes the key after "<version>:<kind>:".
+# Hierarchy results are refreshed through the snapshot delta, not a re-crawl.
+_REFRESHERS: Dict[str, Callable[[str], Awaitable[None]]] = {
+    "lei_raw": _refresh_lei,
+    "lei_row": _refresh_lei,
+    "children_ids": _refresh_children_ids,
+    "flat": _refresh_flat,
+    "shape": _refresh_shape,
+}
+
+
+def _start_refresh(key: str) -> None:
+    _, kind, rest = key.split(":", 2)
+    lei_cache.begin_refresh(key)
+
+    async def run() -> None:
+        try:
+            await _REFRESHERS[kind](rest)
+        except Exception as exc:
+            logger.warning("Refresh-ahead of %s failed: %s", key, exc)
+        finally:
+            lei_cache.end_refresh(key)
+
+    task = asyncio.create_task(run())
+    _warm_tasks.add(task)
+    task.add_done_callback(_warm_tasks.discard)
+
+
+async def _cache_warmer() -> None:
+    """Refresh hot cache entries shortly before they expire (started by _lifespan)."""
+    _request_priority.set(PRIORITY_BULK)
+    _request_endpoint.set("cache-warmer")
+    while True:
+        await asyncio.sleep(CACHE_WARM_INTERVAL_SECONDS)
+        slots = CACHE_WARM_CONCURRENCY - len(_warm_tasks)
+        if slots <= 0 or not GLEIF_RATE_LIMITER.idle() or _gleif_breaker.degraded():
+            continue
+        candidates = lei_cache.refresh_candidates(set(_REFRESHERS), CACHE_WARM_AHEAD_SECONDS, CACHE_WARM_MIN_HITS)
+        for key in candidates[:slots]:
+            _start_refresh(key)
+
+
+# ---------------------------------------------------------------------------
+# Background jobs
+# ---------------------------------------------------------------------------
+
+# Finished jobs are kept for polling until this many newer jobs have been
+# started.  With the L2 cache enabled job records are also written there, so
+# any worker can report them and pick up jobs whose worker went away.
+JOBS_MAX = int(os.getenv("JOBS_MAX", "256"))
+JOB_HEARTBEAT_SECONDS = 5.0
+# A queued/running job not heard from for this long is considered orphaned
+JOB_STALE_SECONDS = float(os.getenv("JOB_STALE_SECONDS", "30"))
+_jobs: "OrderedDict[str, Job]" = OrderedDict()
+_job_tasks: Set["asyncio.Task[None]"] = set()
+
+
+def _persist_job(job: Job) -> None:
+    job.updatedAt = time.time()
+    if lei_cache.l2 is not None:
+        lei_cache.l2.set(f"{CACHE_VERSION}:job:{job.id}", job.model_dump())
+
+
+async def _load_job(job_id: str) -> Optional[Job]:
+    job = _jobs.get(job_id)
+    if job is not None or lei_cache.l2 is None:
+        return job
+    data = await asyncio.to_thread(lei_cache.l2.get, f"{CACHE_VERSION}:job:{job_id}")
+    return Job(**data) if data else None
+
+
+def _start_job(
+    kind: str,
+    work: Callable[[Job], Awaitable[Any]],
+    params: Optional[Dict[str, Any]] = None,
+    *,
+    slots: Optional[asyncio.Semaphore] = None,
+) -> Job:
+    """Register a job and run ``work(job)`` in the background; ``work`` returns the result.
+
+    With ``slots`` the job stays queued until it can take one of them.
+    """
+    now = time.time()
+    job = Job(id=uuid.uuid4().hex, kind=kind, params=params or {}, createdAt=now, updatedAt=now)
+    _run_job(job, work, slots)
+    return job
+
+
+def _run_job(job: Job, work: Callable[[Job], Awaitable[Any]], slots: Optional[asyncio.Semaphore] = None) -> None:
+    _jobs[job.id] = job
+    _jobs.move_to_end(job.id)
+    finished = [jid for jid, j in _jobs.items() if j.status in ("done", "failed")]
+    while len(_jobs) > JOBS_MAX and finished:
+        del _jobs[finished.pop(0)]
+    _persist_job(job)
+
+    async def heartbeat() -> None:
+        while True:
+            await asyncio.sleep(JOB_HEARTBEAT_SECONDS)
+            _persist_job(job)
+
+    async def run() -> None:
+        async with slots or nullcontext():
+            await execute()
+
+    async def execute() -> None:
+        job.status = "running"
+        _persist_job(job)
+        beat = asyncio.create_task(heartbeat())
+        try:
+            job.result = await work(job)
+            job.status = "done"
+        except asyncio.CancelledError:
+            # Worker shutting down: the record stays "running" so another worker adopts it
+            raise
+        except Exception as exc:
+            logger.exception("Job %s (%s) failed", job.id, job.kind)
+            job.status = "failed"
+            job.error = exc.detail if isinstance(exc, HTTPException) else str(exc)
+        finally:
+            beat.cancel()
+            if job.status != "running":
+                _persist_job(job)
+
+    task = asyncio.create_task(run())
+    _job_tasks.add(task)
+    task.add_done_callback(_job_tasks.discard)
+
+
+def _adopt_job(job: Job) -> Job:
+    """Take over a job whose worker stopped heartbeating (restart or timeout)."""
+    runner = _JOB_RUNNERS.get(job.kind)
+    if runner is None:
+        job.status, job.error = "failed", "worker lost"
+        _persist_job(job)
+        return job
+    logger.info("Resuming orphaned %s job %s", job.kind, job.id)
+    job.status = "queued"
+    _run_job(job, runner)
+    return job
+
+# ---------------------------------------------------------------------------
+# Hierarchy jobs
+# ---------------------------------------------------------------------------
+
+async def _run_hierarchy_job(job: Job) -> Any:
+    """Crawl ``job.params`` (lei, view, maxNodes) detached from any request.
+
+    The crawl goes through the normal cached/single-flight builders, so the
+    result is cached for later callers of the hierarchy endpoints, and it
+    resumes from the last checkpoint if an earlier attempt was interrupted.
+    A finished job reports the result's counts as its final progress, as
+    cached and derived results never move the crawl counters.
+    """
+    _request_priority.set(PRIORITY_BULK)
+    lei, view, max_nodes = job.params["lei"], job.params["view"], job.params["maxNodes"]
+    root_lei = await _fetch_ultimate_parent(lei) or lei
+    if view == "shape":
+        with _progress_for(_shape_cache_key(root_lei, max_nodes)) as job.progress:
+            shape = await _compute_hierarchy_shape(root_lei, max_nodes)
+        job.progress = {**job.progress, "visited": shape.visitedCount, "frontier": 0, "depth": shape.maxDepth}
+        return shape
+    with _progress_for(_flat_cache_key(root_lei, max_nodes)) as job.progress:
+        flat = await _build_hierarchy_flat(root_lei, max_nodes)
+    job.progress = {**job.progress, "visited": len(flat), "frontier": 0, "depth": flat.max_depth()}
+    return flat.to_list()
+
+
+_JOB_RUNNERS: Dict[str, Callable[[Job], Awaitable[Any]]] = {"hierarchy": _run_hierarchy_job}
+
+# ---------------------------------------------------------------------------
+# Bulk name matching
+# ---------------------------------------------------------------------------
+
+_MATCH_MAX_NAMES = 5000
+# Names whose best local candidate scores below this also consult GLEIF
+# autocompletions; at or above it the local index is trusted.
+_MATCH_LOCAL_MIN_SCORE = 85
+_MATCH_CANDIDATES = 50
+_MATCH_CONCURRENCY = 8
+# Match jobs running at once; later ones stay queued.  Scoring runs in worker
+# threads, so this also bounds how much CPU matching takes from requests.
+MATCH_JOBS_CONCURRENCY = int(os.getenv("MATCH_JOBS_CONCURRENCY", "2"))
+# Queued plus running match jobs; beyond this new ones are refused with a 429
+MATCH_JOBS_MAX_PENDING = int(os.getenv("MATCH_JOBS_MAX_PENDING", "16"))
+_match_job_slots = asyncio.Semaphore(MATCH_JOBS_CONCURRENCY)
+
+
+async def _autocomplete_leis(q: str) -> List[str]:
+    """LEIs suggested by GLEIF fulltext autocompletion for ``q``, in upstream order."""
     r = await _gleif_get(
-        "https://api.gleif.org/api/v1/autocompletions",
+        f"{GLEIF_API_URL}/autocompletions",
         params={"field": "fulltext", "q": q},
         timeout=20,
     )
@@ -753,103 +3703,648 @@ async def search(q: str, response: Response):
             cand = m.group(0) if m else None
         if cand and cand not in leis:
             leis.append(cand)
+    return leis
+
+
+async def _local_name_candidates(normalized: str) -> Dict[str, str]:
+    candidates = dict(_name_index.candidates(normalized, _MATCH_CANDIDATES))
+    if _golden is not None:
+        found = await _golden.run(_golden.name_candidates, normalized, _MATCH_CANDIDATES)
+        for lei, legal_name in found:
+            candidates.setdefault(lei, legal_name)
+    return candidates
+
+
+def _rank_candidates(
+    name: str, candidates: Dict[str, str], limit: int, min_score: int
+) -> List[tuple[int, str, str]]:
+    """Score candidates against ``name``; returns ``(score, lei, match type)`` best first.
+
+    CPU-bound (edit distance per candidate); callers run it in a worker thread.
+    """
+    normalized = normalize_name(name)
+    scored = []
+    for lei, legal_name in candidates.items():
+        score, kind = score_normalized(normalized, legal_name)
+        if score >= max(min_score, 1):
+            scored.append((score, lei, kind))
+    scored.sort(key=lambda s: (-s[0], s[1]))
+    return scored[:limit]
+
+
+async def _match_name(name: str, limit: int, min_score: int) -> tuple[str, List[tuple[int, str, str]], str]:
+    """Return ``(normalized, ranked matches, source)`` for one input name."""
+    normalized = normalize_name(name)
+    if not normalized:
+        return normalized, [], "none"
+    candidates = await _local_name_candidates(normalized)
+    ranked = await asyncio.to_thread(_rank_candidates, name, candidates, limit, min_score)
+    if ranked and ranked[0][0] >= _MATCH_LOCAL_MIN_SCORE:
+        return normalized, ranked, "local"
+    leis = (await _autocomplete_leis(name))[:25]
+    rows = await _fetch_leis(leis)
+    for lei in leis:
+        if lei in rows and rows[lei].legalName:
+            candidates.setdefault(lei, rows[lei].legalName)
+    ranked = await asyncio.to_thread(_rank_candidates, name, candidates, limit, min_score)
+    return normalized, ranked, "gleif" if ranked else "none"
+
+
+async def _run_match(job: Job, names: List[str], limit: int, min_score: int) -> List[MatchResult]:
+    _request_priority.set(PRIORITY_BULK)
+    unique = list(dict.fromkeys(names))
+    job.progress = {"total": len(unique), "done": 0, "local": 0, "gleif": 0, "unmatched": 0}
+    sem = asyncio.Semaphore(_MATCH_CONCURRENCY)
+    matched: Dict[str, tuple[str, List[tuple[int, str, str]], str]] = {}
+
+    async def one(name: str) -> None:
+        async with sem:
+            result = await _match_name(name, limit, min_score)
+        matched[name] = result
+        job.progress["done"] += 1
+        job.progress["unmatched" if result[2] == "none" else result[2]] += 1
+        job.updatedAt = time.time()
+
+    await asyncio.gather(*[one(n) for n in unique])
+    # Rows for the winning LEIs are mostly cached by now; the rest resolve in batches
+    rows = await _fetch_leis([lei for _, ranked, _ in matched.values() for _, lei, _ in ranked])
+    results: List[MatchResult] = []
+    for name in names:
+        normalized, ranked, source = matched[name]
+        matches = [
+            NameMatch(
+                lei=lei,
+                legalName=rows[lei].legalName if lei in rows else None,
+                jurisdiction=rows[lei].jurisdiction if lei in rows else None,
+                status=rows[lei].status if lei in rows else None,
+                score=score,
+                matchType=kind,
+            )
+            for score, lei, kind in ranked
+        ]
+        results.append(MatchResult(input=name, normalized=normalized, matches=matches, source=source))
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Encoded response cache (ETag / If-None-Match)
+# ---------------------------------------------------------------------------
+
+# Opt-in compact formats for flat hierarchies, chosen via the Accept header.
+# Other payloads are always JSON.
+COLUMNAR_JSON = "application/vnd.gleif.columnar+json"
+COLUMNAR_MSGPACK = "application/vnd.gleif.columnar+msgpack"
+# Bodies smaller than this are not worth compressing
+_COMPRESS_MIN_BYTES = 1024
+# Compress big bodies off the event loop
+_COMPRESS_THREAD_BYTES = 256 * 1024
+
+
+def _wire_format(request: Request) -> str:
+    accept = request.headers.get("accept", "")
+    if msgpack is not None and (COLUMNAR_MSGPACK in accept or "application/msgpack" in accept):
+        return COLUMNAR_MSGPACK
+    if COLUMNAR_JSON in accept:
+        return COLUMNAR_JSON
+    return "application/json"
+
+
+def _content_encoding(request: Request) -> Optional[str]:
+    """Pick br or gzip from Accept-Encoding (honouring q=0), or None for identity."""
+    offered: Dict[str, float] = {}
+    for part in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = part.partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name.strip():
+            offered[name.strip().lower()] = q
+    for encoding in (("br",) if brotli is not None else ()) + ("gzip",):
+        if offered.get(encoding, offered.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=5)
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress(body) + compressor.flush()
+
+
+async def _compress_stream(chunks: AsyncIterator[bytes], encoding: str) -> AsyncIterator[bytes]:
+    """Compress a streamed body chunk by chunk, flushing so each chunk is decodable on arrival."""
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=5)
+        async for chunk in chunks:
+            yield compressor.process(chunk) + compressor.flush()
+        yield compressor.finish()
+        return
+    gz = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    async for chunk in chunks:
+        yield gz.compress(chunk) + gz.flush(zlib.Z_SYNC_FLUSH)
+    yield gz.flush()
+
+
+class _EncodedResponse:
+    """A body encoded once, with a strong ETag derived from its bytes.
+
+    Compressed variants are produced on first request and kept alongside;
+    each carries its own ETag.  ``sources`` maps the cache keys the body was
+    built from to their ``lei_cache.version`` at the time.
+    """
+
+    __slots__ = ("body", "etag", "media_type", "sources", "_compressed")
+
+    def __init__(self, body: bytes, media_type: str = "application/json") -> None:
+        self.body = body
+        self.etag = '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+        self.media_type = media_type
+        self.sources: Dict[str, Optional[int]] = {}
+        self._compressed: Dict[str, bytes] = {}
+
+    async def variant(self, encoding: Optional[str]) -> tuple[bytes, str]:
+        if encoding is None or len(self.body) < _COMPRESS_MIN_BYTES:
+            return self.body, self.etag
+        body = self._compressed.get(encoding)
+        if body is None:
+            if len(self.body) >= _COMPRESS_THREAD_BYTES:
+                body = await asyncio.to_thread(_compress, self.body, encoding)
+            else:
+                body = _compress(self.body, encoding)
+            self._compressed[encoding] = body
+        return body, f'{self.etag[:-1]}-{encoding}"'
+
+    def outdated(self) -> bool:
+        """Whether a source has been stored again (refreshed) since this body was built."""
+        for key, built_from in self.sources.items():
+            current = lei_cache.version(key)
+            if current is not None and current != built_from:
+                return True
+        return False
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.body) + sum(len(b) for b in self._compressed.values())
+
+
+def _encode_body(value: Any, wire_format: str) -> _EncodedResponse:
+    if isinstance(value, FlatHierarchy):
+        if wire_format == COLUMNAR_MSGPACK:
+            return _EncodedResponse(msgpack.packb(value.to_columnar()), COLUMNAR_MSGPACK)
+        if wire_format == COLUMNAR_JSON:
+            return _EncodedResponse(_json_bytes(value.to_columnar()), COLUMNAR_JSON)
+        return _EncodedResponse(value.to_json())
+    return _EncodedResponse(pydantic_core.to_json(value))
+
+
+def _etag_matches(if_none_match: Optional[str], etags: tuple[str, ...]) -> bool:
+    if not if_none_match:
+        return False
+    tags = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+    return "*" in tags or any(etag in tags for etag in etags)
+
+
+async def _cached_json(
+    request: Request, max_age: int, produce: Callable[[], Awaitable[Any]], *, key: str
+) -> Response:
+    """Serve ``produce()``, re-using the encoded bytes for repeat requests.
+
+    ``key`` identifies the response within its route and is built from the
+    endpoint's validated parameters, so unrelated query parameters share an
+    entry instead of creating new ones.  Cached bodies skip response_model validation and encoding entirely, a
+    matching ``If-None-Match`` is answered with an empty 304, and bodies are
+    compressed per Accept-Encoding.  Flat hierarchies honour the columnar
+    formats in Accept.  A body is rebuilt once any cache entry it was built
+    from has been refreshed.  Bodies built from stale data (upstream
+    unavailable) are neither cached here nor by clients.
+    """
+    cost = _request_cost.get()
+    wire_format = _wire_format(request)
+    route = getattr(request.scope.get("route"), "path", request.url.path)
+    cache_key = f"{CACHE_VERSION}:resp:{wire_format}:{route}:{key}"
+    encoded = response_cache.get(cache_key)
+    if encoded is not None and encoded.outdated():
+        encoded = None
+    _response_cache.inc(_request_endpoint.get(), "miss" if encoded is None else "hit")
+    if encoded is None:
+        reads: List[str] = []
+        token = _cache_reads.set(reads)
+        try:
+            value = await produce()
+        except UpstreamUnavailable:
+            # The circuit opened while producing; an expired copy may now be served
+            encoded = response_cache.get(cache_key)
+            if encoded is None:
+                raise
+        finally:
+            _cache_reads.reset(token)
+    if encoded is None:
+        encoded = _encode_body(value, wire_format)
+        encoded.sources = {key: lei_cache.version(key) for key in reads}
+        # Unknown LEIs are asked upstream again next time
+        if value is not None and not (cost is not None and cost.stale_seconds):
+            response_cache.set(cache_key, encoded)
+    else:
+        # Keep the entries behind this body hot for the cache warmer
+        lei_cache.touch(encoded.sources)
+    encoding = _content_encoding(request)
+    size = encoded.nbytes
+    body, etag = await encoded.variant(encoding)
+    if encoded.nbytes != size:
+        response_cache.resize(cache_key)
+    stale = cost is not None and cost.stale_seconds > 0
+    headers = {
+        "Cache-Control": "no-cache" if stale else f"public, max-age={max_age}",
+        "ETag": etag,
+        "Vary": "Accept, Accept-Encoding",
+    }
+    if _etag_matches(request.headers.get("if-none-match"), (etag, encoded.etag)):
+        return Response(status_code=304, headers=headers)
+    if body is not encoded.body:
+        headers["Content-Encoding"] = encoding
+    return Response(body, media_type=encoded.media_type, headers=headers)
+
+
+async def _root_of(lei: str) -> str:
+    return await _fetch_ultimate_parent(lei) or lei
+
+
+@app.get("/api/lei/{lei}", response_model=Optional[Row])
+async def get_lei(lei: str, request: Request):
+    if not LEI_PATTERN.match(lei):
+        raise HTTPException(status_code=400, detail="Invalid LEI format")
+    return await _cached_json(request, 300, lambda: _fetch_lei(lei), key=lei)
+
+
+@app.get("/api/search", response_model=List[Row])
+async def search(q: str, response: Response):
+    q = q.strip()
+    if not q:
+        return []
+    response.headers["Cache-Control"] = "public, max-age=120"
+    if LEI_PATTERN.match(q):
+        row = await _fetch_lei(q)
+        return [row] if row else []
+    # name / autocomplete path
+    leis = (await _autocomplete_leis(q))[:25]
+    rows = await _fetch_leis(leis)
+    return [rows[l] for l in leis if l in rows]
+
+
+@app.post("/api/lei/batch", response_model=List[Row])
+async def lei_batch(body: BatchLeiRequest):
+    """Resolve many LEIs at once; unknown LEIs are omitted, input order is kept."""
+    leis = [l.strip().upper() for l in body.leis if l and l.strip()]
+    if len(leis) > _BATCH_MAX_LEIS:
+        raise HTTPException(status_code=413, detail=f"At most {_BATCH_MAX_LEIS} LEIs per request")
+    invalid = [l for l in leis if not LEI_PATTERN.match(l)]
+    if invalid:
+        raise HTTPException(status_code=400, detail=f"Invalid LEI format: {', '.join(invalid[:5])}")
+    rows = await _fetch_leis(leis)
+    return [rows[l] for l in dict.fromkeys(leis) if l in rows]
+
+
+@app.post("/api/match", response_model=Job, status_code=202)
+async def match_names(body: MatchRequest):
+    """Start a bulk name-matching job; poll ``/api/jobs/{id}`` for the results."""
+    names = [n.strip() for n in body.names if n and n.strip()]
+    if not names:
+        raise HTTPException(status_code=400, detail="No names to match")
+    if len(names) > _MATCH_MAX_NAMES:
+        raise HTTPException(status_code=413, detail=f"At most {_MATCH_MAX_NAMES} names per request")
+    pending = sum(1 for j in _jobs.values() if j.kind == "match" and j.status in ("queued", "running"))
+    if pending >= MATCH_JOBS_MAX_PENDING:
+        raise HTTPException(status_code=429, detail="Too many match jobs in progress", headers={"Retry-After": "30"})
+    return _start_job("match", lambda job: _run_match(job, names, body.limit, body.minScore), slots=_match_job_slots)
+
+
+@app.post("/api/jobs/hierarchy", response_model=Job, status_code=202)
+async def start_hierarchy_job(body: HierarchyJobRequest):
+    """Crawl a hierarchy in the background; poll ``/api/jobs/{id}`` for progress and the result."""
+    lei = body.lei.strip().upper()
+    if not LEI_PATTERN.match(lei):
+        raise HTTPException(status_code=400, detail="Invalid LEI format")
+    params = {
+        "lei": lei,
+        "view": body.view,
+        "maxNodes": body.maxNodes or (20000 if body.view == "shape" else 5000),
+    }
+    for job in _jobs.values():
+        if job.kind == "hierarchy" and job.params == params and job.status in ("queued", "running"):
+            return job
+    return _start_job("hierarchy", _run_hierarchy_job, params)
 
-    leis = leis[:25]
-    rows = await asyncio.gather(*[_fetch_lei(l) for l in leis])
-    return [r for r in rows if r]
+
+@app.get("/api/jobs/{job_id}", response_model=Job)
+async def get_job(job_id: str):
+    job = await _load_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    if (
+        job.id not in _jobs
+        and job.status in ("queued", "running")
+        and time.time() - job.updatedAt > JOB_STALE_SECONDS
+    ):
+        job = _adopt_job(job)
+    return job
 
 
 @app.get("/api/lei/{lei}/details", response_model=Optional[LeiDetails])
-async def lei_details(lei: str, response: Response):
+async def lei_details(lei: str, request: Request):
     if not LEI_PATTERN.match(lei):
         raise HTTPException(status_code=400, detail="Invalid LEI format")
-    response.headers["Cache-Control"] = "public, max-age=300"
-    data = await _fetch_lei_raw(lei)
-    if not data:
-        return None
-    return _map_details(data)
+
+    async def produce() -> Optional[LeiDetails]:
+        data = await _fetch_lei_raw(lei)
+        return _map_details(data) if data else None
+
+    return await _cached_json(request, 300, produce, key=lei)
 
 
 @app.get("/api/lei/{lei}/hierarchy", response_model=Optional[HierarchyNode])
-async def lei_hierarchy(lei: str, request: Request, response: Response):
+async def lei_hierarchy(
+    lei: str,
+    request: Request,
+    max_nodes: int = Query(5000, ge=1, le=20000),
+    max_depth: Optional[int] = Query(None, ge=0),
+):
     if not LEI_PATTERN.match(lei):
         raise HTTPException(status_code=400, detail="Invalid LEI format")
-    response.headers["Cache-Control"] = "public, max-age=600"
-    ultimate = await _fetch_ultimate_parent(lei)
-    root_lei = ultimate or lei
-    cancel_check = _make_cancel_check(request)
-    tree = await _build_hierarchy(root_lei, cancel_check)
-    return tree
+
+    async def produce() -> Optional[HierarchyNode]:
+        root_lei = await _root_of(lei)
+        return await _build_hierarchy(root_lei, max_nodes, max_depth, _make_cancel_check(request))
+
+    return await _cached_json(request, 600, produce, key=f"{lei}:{max_nodes}:{max_depth}")
 
 @app.get("/api/lei/{lei}/hierarchy/flat", response_model=List[FlatNode])
-async def lei_hierarchy_flat(lei: str, request: Request, response: Response):
+async def lei_hierarchy_flat(
+    lei: str,
+    request: Request,
+    stream: Optional[str] = Query(None, pattern="^ndjson$"),
+):
     """Return entire hierarchy as a flat list – much faster than the tree endpoint.
     
     Each item has { parentLei, entity } so the frontend can reconstruct the tree.
+    With ``?stream=ndjson`` nodes are sent one per line as each BFS chunk
+    resolves, followed by a single ``{"summary": {...}}`` line.  Sending
+    ``Accept: application/vnd.gleif.columnar+json`` (or ``+msgpack``) returns
+    the dictionary-encoded column layout of ``FlatHierarchy.to_columnar``.
     """
     if not LEI_PATTERN.match(lei):
         raise HTTPException(status_code=400, detail="Invalid LEI format")
-    response.headers["Cache-Control"] = "public, max-age=600"
-    ultimate = await _fetch_ultimate_parent(lei)
-    root_lei = ultimate or lei
-    cancel_check = _make_cancel_check(request)
-    nodes = await _build_hierarchy_flat(root_lei, cancel_check=cancel_check)
-    return nodes
+    if stream == "ndjson":
+        body = _stream_hierarchy_flat(await _root_of(lei), 5000, _make_cancel_check(request))
+        headers = {"Cache-Control": "public, max-age=600", "Vary": "Accept-Encoding"}
+        encoding = _content_encoding(request)
+        if encoding is not None:
+            body = _compress_stream(body, encoding)
+            headers["Content-Encoding"] = encoding
+        return StreamingResponse(body, media_type="application/x-ndjson", headers=headers)
+
+    async def produce() -> FlatHierarchy:
+        root_lei = await _root_of(lei)
+        return await _build_hierarchy_flat(root_lei, cancel_check=_make_cancel_check(request))
+
+    return await _cached_json(request, 600, produce, key=lei)
+
+
+async def _stream_hierarchy_flat(
+    root_lei: str,
+    max_nodes: int,
+    cancel_check: Optional[Callable[[], Awaitable[bool]]] = None,
+) -> AsyncIterator[bytes]:
+    cache_key = _flat_cache_key(root_lei, max_nodes)
+    cached = lei_cache.get(cache_key)
+    summary = FlatSummary()
+    _request_priority.set(PRIORITY_BULK)
+    if cached is not None:
+        yield cached.to_ndjson()
+        summary.count = len(cached)
+        summary.maxDepth = cached.max_depth()
+        summary.truncated = len(cached) >= max_nodes
+    else:
+        recorder = await _hierarchy_recorder(root_lei, "flat", cancel_check)
+        result = FlatHierarchy()
+        with _progress_for(cache_key) as progress:
+            async for nodes in _iter_hierarchy_flat(
+                root_lei, max_nodes, summary, cancel_check, recorder.child_rows, progress
+            ):
+                result.extend(nodes)
+                yield b"".join(_flat_node_json(parent_lei, row) + b"\n" for parent_lei, row in nodes)
+        recorder.save()
+        lei_cache.set(cache_key, result)
+    yield (json.dumps({"summary": summary.model_dump()}) + "\n").encode()
 
 @app.get("/api/lei/{lei}/ultimate-parent/row", response_model=Optional[Row])
-async def lei_ultimate_parent_row(lei: str, response: Response):
+async def lei_ultimate_parent_row(lei: str, request: Request):
     if not LEI_PATTERN.match(lei):
         raise HTTPException(status_code=400, detail="Invalid LEI format")
-    response.headers["Cache-Control"] = "public, max-age=300"
-    ultimate = await _fetch_ultimate_parent(lei)
-    root_lei = ultimate or lei
-    row = await _fetch_lei(root_lei)
-    return row
+
+    async def produce() -> Optional[Row]:
+        return await _fetch_lei(await _root_of(lei))
+
+    return await _cached_json(request, 300, produce, key=lei)
 
 @app.get("/api/lei/{lei}/children", response_model=List[Row])
-async def lei_direct_children(lei: str, request: Request, response: Response):
+async def lei_direct_children(lei: str, request: Request):
     if not LEI_PATTERN.match(lei):
         raise HTTPException(status_code=400, detail="Invalid LEI format")
-    response.headers["Cache-Control"] = "public, max-age=300"
-    cancel_check = _make_cancel_check(request)
-    rows = await _fetch_direct_children_rows(lei, cancel_check)
-    return rows
+    return await _cached_json(
+        request, 300, lambda: _fetch_direct_children_rows(lei, _make_cancel_check(request)), key=lei
+    )
 
 @app.get("/api/lei/{lei}/direct-children/leis", response_model=List[str])
-async def lei_direct_children_leis(lei: str, request: Request, response: Response):
+async def lei_direct_children_leis(lei: str, request: Request):
     if not LEI_PATTERN.match(lei):
         raise HTTPException(status_code=400, detail="Invalid LEI format")
-    response.headers["Cache-Control"] = "public, max-age=300"
-    cancel_check = _make_cancel_check(request)
-    child_leis = await _fetch_direct_children(lei, cancel_check)
-    return child_leis
+    return await _cached_json(
+        request, 300, lambda: _fetch_direct_children(lei, _make_cancel_check(request)), key=lei
+    )
 
 @app.get("/api/lei/{lei}/hierarchy/shape", response_model=HierarchyShape)
-async def lei_hierarchy_shape(lei: str, request: Request, response: Response):
+async def lei_hierarchy_shape(lei: str, request: Request):
     if not LEI_PATTERN.match(lei):
         raise HTTPException(status_code=400, detail="Invalid LEI format")
-    response.headers["Cache-Control"] = "public, max-age=600"
-    ultimate = await _fetch_ultimate_parent(lei)
-    root_lei = ultimate or lei
-    cancel_check = _make_cancel_check(request)
-    shape = await _compute_hierarchy_shape(root_lei, cancel_check=cancel_check)
-    return shape
+
+    async def produce() -> HierarchyShape:
+        root_lei = await _root_of(lei)
+        return await _compute_hierarchy_shape(root_lei, cancel_check=_make_cancel_check(request))
+
+    return await _cached_json(request, 600, produce, key=lei)
 
 @app.get("/api/lei/{lei}/ultimate-children/count", response_model=int)
-async def lei_ultimate_children_count(lei: str, request: Request, response: Response):
+async def lei_ultimate_children_count(lei: str, request: Request):
+    if not LEI_PATTERN.match(lei):
+        raise HTTPException(status_code=400, detail="Invalid LEI format")
+    return await _cached_json(
+        request, 300, lambda: _fetch_ultimate_children_count(lei, _make_cancel_check(request)), key=lei
+    )
+
+@app.get("/api/lei/{lei}/ultimate-children/export")
+async def lei_ultimate_children_export(
+    lei: str,
+    request: Request,
+    fmt: str = Query("csv", alias="format", pattern="^(csv|ndjson|parquet)$"),
+):
+    """Every ultimate child of ``lei`` as CSV, NDJSON or Parquet, streamed as GLEIF pages arrive.
+
+    Pages of 200 come straight from the ``ultimate-children`` relation, so
+    the 5,000-node cap of the hierarchy views does not apply and memory
+    stays flat however large the group.  Rows carry no parent links; use
+    the flat hierarchy for structure.  Parquet needs pyarrow.
+    """
     if not LEI_PATTERN.match(lei):
         raise HTTPException(status_code=400, detail="Invalid LEI format")
-    response.headers["Cache-Control"] = "public, max-age=300"
-    cancel_check = _make_cancel_check(request)
-    count = await _fetch_ultimate_children_count(lei, cancel_check)
-    return count
+    if fmt == "parquet" and pyarrow is None:
+        raise HTTPException(status_code=501, detail="Parquet export is not available (pyarrow not installed)")
+    _request_priority.set(PRIORITY_BULK)
+    # The first page is fetched before answering, so upstream failures still get a proper status
+    r = await _gleif_get(
+        f"{GLEIF_API_URL}/lei-records/{lei}/ultimate-children", params={"page[size]": "200"}, timeout=30
+    )
+    first = {} if r.status_code == 404 else r.json()
+    body = _export_ultimate_children(_iter_ultimate_children(first, _make_cancel_check(request)), fmt)
+    headers = {
+        "Cache-Control": "public, max-age=300",
+        "Content-Disposition": f'attachment; filename="{lei.upper()}-ultimate-children.{fmt}"',
+    }
+    if fmt != "parquet":  # already compressed column by column
+        headers["Vary"] = "Accept-Encoding"
+        encoding = _content_encoding(request)
+        if encoding is not None:
+            body = _compress_stream(body, encoding)
+            headers["Content-Encoding"] = encoding
+    return StreamingResponse(body, media_type=_EXPORT_MEDIA_TYPES[fmt], headers=headers)
 
 @app.get("/api/lei/{lei}/direct-children/count", response_model=int)
-async def lei_direct_children_count(lei: str, request: Request, response: Response):
+async def lei_direct_children_count(lei: str, request: Request):
+    if not LEI_PATTERN.match(lei):
+        raise HTTPException(status_code=400, detail="Invalid LEI format")
+    return await _cached_json(
+        request, 300, lambda: _fetch_direct_children_count(lei, _make_cancel_check(request)), key=lei
+    )
+
+
+_VIEW_PARTS = ("ultimateParent", "children", "childCounts", "shape")
+_VIEW_COUNT_CONCURRENCY = 8
+# childCounts covers this many children, about what a page shows before
+# scrolling; the client counts the rest as they come into view.
+VIEW_CHILD_COUNTS_MAX = int(os.getenv("VIEW_CHILD_COUNTS_MAX", "50"))
+
+
+def _view_parts(
+    lei: str,
+    include: List[str],
+    at_root: bool,
+    cancel_check: Optional[Callable[[], Awaitable[bool]]] = None,
+) -> Dict[str, Callable[[], Awaitable[Any]]]:
+    """One coroutine function per requested part of ``/view``.
+
+    Callers create the coroutines only when they run them, so a stream
+    dropped before it starts leaves none un-awaited.  Parts run concurrently and share their upstream work through the
+    caches and single-flight: the root lookup, the child rows and the
+    counts derived from them are fetched once however many parts need them.
+    """
+
+    async def subject() -> str:
+        return await _root_of(lei) if at_root else lei
+
+    async def ultimate_parent() -> Optional[Row]:
+        return await _fetch_lei(await _root_of(lei))
+
+    async def children() -> List[Row]:
+        return await _fetch_direct_children_rows(await subject(), cancel_check)
+
+    async def child_counts() -> Dict[str, int]:
+        target = await subject()
+        leis = [r.lei for r in await _fetch_direct_children_rows(target, cancel_check)]
+        sem = asyncio.Semaphore(_VIEW_COUNT_CONCURRENCY)
+
+        async def count(child: str) -> int:
+            async with sem:
+                return await _fetch_direct_children_count(child, cancel_check)
+
+        first = leis[:VIEW_CHILD_COUNTS_MAX]
+        counts = await _gather(cancel_check, *[count(c) for c in first])
+        return {target: len(leis), **dict(zip(first, counts))}
+
+    async def shape() -> HierarchyShape:
+        return await _compute_hierarchy_shape(await _root_of(lei), cancel_check=cancel_check)
+
+    resolvers = {
+        "ultimateParent": ultimate_parent,
+        "children": children,
+        "childCounts": child_counts,
+        "shape": shape,
+    }
+    return {part: resolvers[part] for part in include}
+
+
+async def _stream_view(parts: Dict[str, Callable[[], Awaitable[Any]]]) -> AsyncIterator[bytes]:
+    async def settle(part: str, resolve: Callable[[], Awaitable[Any]]) -> tuple[str, Any, Optional[str]]:
+        try:
+            return part, await resolve(), None
+        except HTTPException as exc:
+            return part, None, str(exc.detail)
+        except (httpx.HTTPError, ValueError) as exc:
+            return part, None, f"Upstream error: {exc}"
+
+    tasks = [asyncio.ensure_future(settle(part, resolve)) for part, resolve in parts.items()]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            part, value, error = await next_done
+            line = {"part": part, "error": error} if error else {"part": part, "data": value}
+            yield pydantic_core.to_json(line) + b"\n"
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+@app.get("/api/lei/{lei}/view", response_model=LeiView)
+async def lei_view(
+    lei: str,
+    request: Request,
+    include: str = Query(",".join(_VIEW_PARTS)),
+    root: bool = Query(False),
+    stream: Optional[str] = Query(None, pattern="^ndjson$"),
+):
+    """Several parts of a hierarchy page in one round trip.
+
+    ``include`` picks any of ultimateParent, children, childCounts and shape.
+    ``children`` and ``childCounts`` describe ``lei`` itself, or its ultimate
+    parent with ``root=true``; ``childCounts`` stops after the first
+    ``VIEW_CHILD_COUNTS_MAX`` children.  With ``?stream=ndjson`` each part is sent as
+    ``{"part", "data"}`` (or ``{"part", "error"}``) as soon as it resolves,
+    so a slow shape crawl does not hold back the rows.
+    """
     if not LEI_PATTERN.match(lei):
         raise HTTPException(status_code=400, detail="Invalid LEI format")
-    response.headers["Cache-Control"] = "public, max-age=300"
-    cancel_check = _make_cancel_check(request)
-    count = await _fetch_direct_children_count(lei, cancel_check)
-    return count
+    wanted = list(dict.fromkeys(p.strip() for p in include.split(",") if p.strip()))
+    unknown = [p for p in wanted if p not in _VIEW_PARTS]
+    if unknown or not wanted:
+        raise HTTPException(
+            status_code=400, detail=f"include takes a comma-separated subset of {', '.join(_VIEW_PARTS)}"
+        )
+    if stream == "ndjson":
+        body = _stream_view(_view_parts(lei, wanted, root, _make_cancel_check(request)))
+        headers = {"Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+        encoding = _content_encoding(request)
+        if encoding is not None:
+            body = _compress_stream(body, encoding)
+            headers["Content-Encoding"] = encoding
+        return StreamingResponse(body, media_type="application/x-ndjson", headers=headers)
+
+    async def produce() -> LeiView:
+        cancel_check = _make_cancel_check(request)
+        parts = _view_parts(lei, wanted, root, cancel_check)
+        values = await _gather(cancel_check, *[resolve() for resolve in parts.values()])
+        subject = await _root_of(lei) if root else lei
+        return LeiView(lei=subject, **dict(zip(parts, values)))
 
+    return await _cached_json(request, 300, produce, key=f"{lei}:{','.join(wanted)}:{root}")
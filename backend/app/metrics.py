@@ -0,0 +1,151 @@
+"""Prometheus text-format metrics without a client library.
+
+Counters and histograms live in this process and are rendered on demand in
+the text exposition format (0.0.4).  ``Collector`` adapts statistics other
+components already keep (cache, rate limiter, single-flight) so they are not
+counted twice.  With several workers, each process reports its own values.
+"""
+
+from __future__ import annotations
+
+import abc
+import bisect
+import math
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple, TypeVar
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# (sample name, labels, value)
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _line(name: str, labels: Dict[str, str], value: float) -> str:
+    if labels:
+        name += "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items()) + "}"
+    return f"{name} {_number(value)}"
+
+
+def histogram_samples(
+    name: str, labels: Dict[str, str], buckets: Sequence[float], counts: Sequence[int], total: float
+) -> List[Sample]:
+    """Samples of one histogram series; ``counts`` holds per-bucket counts plus the overflow."""
+    out: List[Sample] = []
+    running = 0
+    for bound, n in zip((*buckets, math.inf), counts):
+        running += n
+        out.append((f"{name}_bucket", {**labels, "le": "+Inf" if bound == math.inf else f"{bound:g}"}, running))
+    out.append((f"{name}_sum", labels, total))
+    out.append((f"{name}_count", labels, running))
+    return out
+
+
+class _Metric(abc.ABC):
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+
+    def _labels(self, values: Tuple[str, ...]) -> Dict[str, str]:
+        return dict(zip(self.labelnames, values))
+
+    @abc.abstractmethod
+    def samples(self) -> Iterable[Sample]:
+        """Current ``(name, labels, value)`` samples of this metric."""
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def samples(self) -> Iterable[Sample]:
+        for labels, value in self._values.items():
+            yield self.name, self._labels(labels), value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, help, labelnames)
+        self._buckets = tuple(buckets)
+        self._counts: Dict[Tuple[str, ...], List[int]] = {}
+        self._sums: Dict[Tuple[str, ...], float] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        counts = self._counts.get(labels)
+        if counts is None:
+            counts = self._counts[labels] = [0] * (len(self._buckets) + 1)
+        counts[bisect.bisect_left(self._buckets, value)] += 1
+        self._sums[labels] = self._sums.get(labels, 0.0) + value
+
+    def samples(self) -> Iterable[Sample]:
+        for labels, counts in self._counts.items():
+            yield from histogram_samples(self.name, self._labels(labels), self._buckets, counts, self._sums[labels])
+
+
+class Collector(_Metric):
+    """A metric whose samples are read from elsewhere at scrape time."""
+
+    def __init__(self, name: str, help: str, kind: str, collect: Callable[[], Iterable[Sample]]) -> None:
+        super().__init__(name, help)
+        self.kind = kind
+        self._collect = collect
+
+    def samples(self) -> Iterable[Sample]:
+        return self._collect()
+
+
+M = TypeVar("M", bound=_Metric)
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: M) -> M:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help, labelnames))
+
+    def histogram(
+        self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def collector(self, name: str, help: str, kind: str, collect: Callable[[], Iterable[Sample]]) -> None:
+        self.register(Collector(name, help, kind, collect))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(_line(*sample) for sample in metric.samples())
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,303 @@
+"""Local stand-in for the GLEIF API endpoints the proxy calls.
+
+``FakeGleif`` serves synthetic corporate groups through an
+``httpx.MockTransport``, so benchmarks never touch api.gleif.org.  Responses
+follow the GLEIF JSON:API layout closely enough for the proxy's parsers:
+records, ``filter[lei]`` batches, paginated ``direct-children`` and
+``ultimate-children`` with ``links.next``, ``ultimate-parent``,
+``direct-parent`` and ``autocompletions``.  Latency and 429s are injected
+per request.
+
+It can also run as a local server, to exercise the proxy's real transport
+(connection pool, HTTP/2) with ``GLEIF_API_URL=http://127.0.0.1:8081/api/v1``.
+Run from ``backend``::
+
+    python -m bench.fake_gleif [--port 8081] [--shape 6x5x4] [--groups 4] [--latency 0.02]
+
+HTTP/2 (h2c prior knowledge) needs hypercorn; otherwise uvicorn serves HTTP/1.1.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import time
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+from urllib.parse import parse_qs, urlencode, urlparse
+
+import httpx
+
+_COUNTRIES = ("GB", "US", "DE", "FR", "NL", "LU", "IE", "JP")
+_LOUS = ("5493001KJTIIGC8Y1R12", "EVK05KS7XY1DEII3R011", "213800WAVVOPS85N2205")
+_FORMS = ("Limited", "Holdings Ltd", "GmbH", "S.A.", "Inc.", "B.V.")
+
+
+def parse_shape(spec: str) -> List[int]:
+    """``"5x4x3"`` -> children per node at each level below the root."""
+    return [int(part) for part in spec.lower().split("x") if part]
+
+
+def group_lei(group: int, index: int) -> str:
+    return f"{group:04d}BENCH{index:011d}"
+
+
+class FakeGleif:
+    """Synthetic groups plus the GLEIF routes the proxy uses.
+
+    ``latency`` is the mean seconds per response, varied by ``jitter``
+    (a fraction).  ``throttle`` is the probability of answering 429, and
+    ``rate`` (requests per second, 0 for none) makes the fake enforce a
+    quota the way GLEIF does; 429s carry ``Retry-After: retry_after``.
+    """
+
+    def __init__(
+        self,
+        shapes: Sequence[Sequence[int]],
+        *,
+        latency: float = 0.0,
+        jitter: float = 0.5,
+        throttle: float = 0.0,
+        rate: float = 0.0,
+        retry_after: float = 0.5,
+        seed: int = 0,
+    ) -> None:
+        self.latency = latency
+        self.jitter = jitter
+        self.throttle = throttle
+        self.rate = rate
+        self.retry_after = retry_after
+        self.calls: Counter[str] = Counter()
+        self.throttled = 0
+        self.roots: List[str] = []
+        self.members: List[List[str]] = []
+        self.children: Dict[str, List[str]] = {}
+        self.parent: Dict[str, str] = {}
+        self.names: Dict[str, str] = {}
+        self._random = random.Random(seed)
+        self._window_start = time.monotonic()
+        self._window_calls = 0
+        for group, fanout in enumerate(shapes):
+            self._add_group(group, fanout)
+
+    def _add_group(self, group: int, fanout: Sequence[int]) -> None:
+        root = group_lei(group, 0)
+        members = [root]
+        level = [root]
+        for width in fanout:
+            next_level = []
+            for parent in level:
+                kids = [group_lei(group, len(members) + i) for i in range(width)]
+                members.extend(kids)
+                self.children[parent] = kids
+                for kid in kids:
+                    self.parent[kid] = parent
+                next_level.extend(kids)
+            level = next_level
+        for i, lei in enumerate(members):
+            label = "Group" if i == 0 else f"Subsidiary {i}"
+            self.names[lei] = f"Bench {group} {label} {_FORMS[i % len(_FORMS)]}"
+        self.roots.append(root)
+        self.members.append(members)
+
+    @property
+    def total_calls(self) -> int:
+        """Requests received, including those answered with 429."""
+        return sum(self.calls.values()) + self.throttled
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handle)
+
+    async def __call__(
+        self,
+        scope: Dict[str, Any],
+        receive: Callable[[], Awaitable[Dict[str, Any]]],
+        send: Callable[[Dict[str, Any]], Awaitable[None]],
+    ) -> None:
+        """ASGI entry point, for serving over a socket."""
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                await send({"type": f"{message['type']}.complete"})
+                if message["type"] == "lifespan.shutdown":
+                    return
+        host, port = scope["server"]
+        url = httpx.URL(
+            scheme=scope["scheme"], host=host, port=port, path=scope["path"], query=scope["query_string"]
+        )
+        response = await self.handle(httpx.Request(scope["method"], url))
+        await send({"type": "http.response.start", "status": response.status_code, "headers": response.headers.raw})
+        await send({"type": "http.response.body", "body": b"" if scope["method"] == "HEAD" else response.content})
+
+    def record(self, lei: str) -> dict:
+        i = int(lei[-11:])
+        country = _COUNTRIES[i % len(_COUNTRIES)]
+        return {
+            "type": "lei-records",
+            "id": lei,
+            "attributes": {
+                "lei": lei,
+                "entity": {
+                    "legalName": {"name": self.names[lei], "language": "en"},
+                    "status": "ACTIVE",
+                    "jurisdiction": country,
+                    "legalAddress": {
+                        "addressLines": [f"{i} Example Street"],
+                        "city": "London",
+                        "postalCode": f"EC{i % 9 + 1} {i % 10}AA",
+                        "country": country,
+                    },
+                    "registrationAuthority": {
+                        "registrationAuthorityID": "RA000585",
+                        "registrationAuthorityEntityID": f"{10000000 + i}",
+                    },
+                },
+                "registration": {
+                    "registrationStatus": "ISSUED",
+                    "lastUpdateDate": "2024-01-01T00:00:00Z",
+                },
+                "managingLou": _LOUS[i % len(_LOUS)],
+            },
+        }
+
+    def _ultimate(self, lei: str) -> str:
+        while lei in self.parent:
+            lei = self.parent[lei]
+        return lei
+
+    def _descendants(self, lei: str) -> List[str]:
+        out: List[str] = []
+        frontier = list(self.children.get(lei, ()))
+        while frontier:
+            out.extend(frontier)
+            frontier = [c for p in frontier for c in self.children.get(p, ())]
+        return out
+
+    def _page(self, request: httpx.Request, leis: List[str]) -> httpx.Response:
+        query = {k: v[-1] for k, v in parse_qs(urlparse(str(request.url)).query).items()}
+        if query.get("filter[registration.lastUpdateDate]", "").lstrip(">=") > "2024-01-01":
+            leis = []
+        size = max(1, min(200, int(query.get("page[size]", "10"))))
+        number = max(1, int(query.get("page[number]", "1")))
+        last = max(1, -(-len(leis) // size))
+        links: Dict[str, str] = {}
+        if number < last:
+            next_query = urlencode({**query, "page[number]": str(number + 1)})
+            links["next"] = str(request.url.copy_with(query=next_query.encode()))
+        start = (number - 1) * size
+        return httpx.Response(
+            200,
+            json={
+                # GLEIF reports totals under meta.pagination; the proxy reads meta.paging.totalRecords
+                "meta": {
+                    "pagination": {"currentPage": number, "perPage": size, "total": len(leis), "lastPage": last},
+                    "paging": {"totalRecords": len(leis)},
+                },
+                "data": [self.record(lei) for lei in leis[start : start + size]],
+                "links": links,
+            },
+        )
+
+    def _throttled(self) -> bool:
+        if self.throttle and self._random.random() < self.throttle:
+            return True
+        if self.rate:
+            now = time.monotonic()
+            if now - self._window_start >= 1.0:
+                self._window_start, self._window_calls = now, 0
+            self._window_calls += 1
+            return self._window_calls > self.rate
+        return False
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        if self.latency:
+            spread = self.latency * self.jitter
+            await asyncio.sleep(max(0.0, self.latency + self._random.uniform(-spread, spread)))
+        if self._throttled():
+            self.throttled += 1
+            return httpx.Response(429, headers={"Retry-After": f"{self.retry_after:g}"}, json={})
+        path = request.url.path.removeprefix("/api/v1/")
+        parts = path.split("/")
+        if parts[0] == "autocompletions":
+            self.calls["autocompletions"] += 1
+            return self._autocomplete(request.url.params.get("q", ""))
+        if parts[0] != "lei-records":
+            return httpx.Response(404, json={"errors": [{"status": "404"}]})
+        if len(parts) == 1:
+            self.calls["lei-records"] += 1
+            wanted = request.url.params.get("filter[lei]", "").split(",")
+            return self._page(request, [lei for lei in wanted if lei in self.names])
+        lei, route = parts[1], "/".join(parts[2:])
+        self.calls[f"lei-records/{{lei}}/{route}".rstrip("/")] += 1
+        if lei not in self.names:
+            return httpx.Response(404, json={"errors": [{"status": "404"}]})
+        if route == "":
+            return httpx.Response(200, json={"data": self.record(lei)})
+        if route == "direct-children":
+            return self._page(request, self.children.get(lei, []))
+        if route == "ultimate-children":
+            return self._page(request, self._descendants(lei))
+        parent: Optional[str] = None
+        if route == "direct-parent":
+            parent = self.parent.get(lei)
+        elif route == "ultimate-parent":
+            parent = self._ultimate(lei) if lei in self.parent else None
+        if parent is None:
+            return httpx.Response(404, json={"errors": [{"status": "404"}]})
+        return httpx.Response(200, json={"data": self.record(parent)})
+
+    def _autocomplete(self, q: str) -> httpx.Response:
+        needle = q.lower()
+        hits = [lei for lei, name in self.names.items() if needle in name.lower()][:10]
+        return httpx.Response(
+            200,
+            json={
+                "data": [
+                    {
+                        "type": "autocompletions",
+                        "attributes": {"value": self.names[lei]},
+                        "relationships": {"lei-records": {"data": {"type": "lei-records", "id": lei}}},
+                    }
+                    for lei in hits
+                ]
+            },
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve FakeGleif as a local GLEIF stand-in.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--shape", default="6x5x4", help="children per node at each level, e.g. 6x5x4")
+    parser.add_argument("--groups", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.02, help="mean response latency in seconds")
+    parser.add_argument("--throttle", type=float, default=0.0, help="probability of a random 429")
+    parser.add_argument("--rate", type=float, default=0.0, help="quota in requests/second (0: none)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    fake = FakeGleif(
+        [parse_shape(args.shape)] * args.groups,
+        latency=args.latency,
+        throttle=args.throttle,
+        rate=args.rate,
+        seed=args.seed,
+    )
+    print(f"Serving {args.groups} groups of shape {args.shape}, roots {', '.join(fake.roots)}")
+    try:
+        from hypercorn.asyncio import serve
+        from hypercorn.config import Config
+    except ImportError:
+        import uvicorn
+
+        print("hypercorn not installed; serving HTTP/1.1 only")
+        uvicorn.run(fake, host=args.host, port=args.port, lifespan="off", log_level="warning")
+        return
+    config = Config()
+    config.bind = [f"{args.host}:{args.port}"]
+    asyncio.run(serve(fake, config))
+
+
+if __name__ == "__main__":
+    main()
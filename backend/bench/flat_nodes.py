@@ -0,0 +1,142 @@
+"""Memory and encoding cost of cached flat hierarchies, per 10k nodes.
+
+Compares the previous representation (a list of FlatNode models, encoded by
+FastAPI's response_model path) with FlatHierarchy.  A crawled group is also
+held by the shared graph and the hierarchy snapshot, so the whole cached
+group is measured too: Row models kept there, as before, against packed
+rows.  Run from ``backend``::
+
+    python -m bench.flat_nodes [--nodes 10000] [--repeat 5]
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional, Tuple
+
+from pydantic import TypeAdapter
+
+from app.main import FlatHierarchy, FlatNode, HierarchyGraph, Row, _pack_row, orjson
+
+_STATUSES = ("Active", "Inactive", "Lapsed")
+_COUNTRIES = ("GB", "US", "DE", "FR", "NL", "LU", "IE", "JP")
+_LOUS = ("5493001KJTIIGC8Y1R12", "EVK05KS7XY1DEII3R011", "213800WAVVOPS85N2205")
+
+
+def _rows(n: int) -> List[Tuple[str, Row]]:
+    """Synthetic group: ``n`` entities, ten children per parent, GLEIF-like values."""
+    out: List[Tuple[str, Row]] = []
+    for i in range(n):
+        country = _COUNTRIES[i % len(_COUNTRIES)]
+        # Built from parts so equal values are distinct objects, as after json.loads
+        row = Row(
+            lei=f"{i:018d}{i % 97:02d}",
+            legalName=f"Example Holdings {i} Limited",
+            status="".join(_STATUSES[i % 3]),
+            jurisdiction="".join(country),
+            countryCode="".join(country),
+            lastUpdate=f"2024-0{1 + i % 9}-1{i % 10}T08:00:00Z",
+            managingLOU="".join(_LOUS[i % 3]),
+            registrationAuthorityName="".join("Companies House"),
+            registrationAuthorityEntityID=f"{10000000 + i}",
+            address=f"{i} Example Street, London, {country}",
+        )
+        out.append((out[(i - 1) // 10][1].lei if i else None, row))
+    return out
+
+
+def _by_parent(rows: List[Tuple[Optional[str], Row]]) -> Dict[str, List[Row]]:
+    children: Dict[str, List[Row]] = {}
+    for parent_lei, row in rows:
+        if parent_lei:
+            children.setdefault(parent_lei, []).append(row)
+    return children
+
+
+def _measure(build: Callable[[], object]) -> Tuple[object, int]:
+    gc.collect()
+    tracemalloc.start()
+    obj = build()
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, size
+
+
+def _best(fn: Callable[[], bytes], repeat: int) -> Tuple[float, int]:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), len(body)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--nodes", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    adapter = TypeAdapter(List[FlatNode])
+
+    def models() -> List[FlatNode]:
+        return [FlatNode(parentLei=p, entity=r) for p, r in _rows(args.nodes)]
+
+    def columns() -> FlatHierarchy:
+        flat = FlatHierarchy()
+        flat.extend(_rows(args.nodes))
+        return flat
+
+    def group_with_models() -> tuple:
+        # FlatHierarchy, plus the crawl's Row models kept by graph and snapshot
+        rows = _rows(args.nodes)
+        flat = FlatHierarchy()
+        flat.extend(rows)
+        graph = _by_parent(rows)
+        snapshot = {row.lei: row for _, row in rows}
+        return flat, graph, snapshot
+
+    def group_packed() -> tuple:
+        rows = _rows(args.nodes)
+        flat = FlatHierarchy()
+        flat.extend(rows)
+        graph = HierarchyGraph(max_parents=args.nodes)
+        for parent_lei, kids in _by_parent(rows).items():
+            graph.set_child_rows(parent_lei, kids)
+        snapshot = {row.lei: _pack_row(row) for _, row in rows}
+        return flat, graph, snapshot
+
+    # Retained memory: for the columnar form the Row models are garbage once copied
+    nodes, model_bytes = _measure(models)
+    flat, flat_bytes = _measure(columns)
+    _, group_model_bytes = _measure(group_with_models)
+    _, group_packed_bytes = _measure(group_packed)
+
+    def encode_models() -> bytes:
+        # What FastAPI does for response_model=List[FlatNode]: validate, dump, json.dumps
+        return json.dumps(adapter.dump_python(adapter.validate_python(nodes), mode="json")).encode()
+
+    model_time, model_len = _best(encode_models, args.repeat)
+    flat_time, flat_len = _best(flat.to_json, args.repeat)
+
+    per = 10000 / args.nodes
+    print(f"{args.nodes} nodes, figures scaled to 10k nodes (orjson {'on' if orjson else 'off'})")
+    print(f"{'':22}{'memory MiB':>12}{'encode ms':>12}{'body KiB':>12}")
+    for label, size, secs, length in (
+        ("List[FlatNode]", model_bytes, model_time, model_len),
+        ("FlatHierarchy", flat_bytes, flat_time, flat_len),
+    ):
+        print(f"{label:22}{size * per / 2**20:12.2f}{secs * per * 1000:12.1f}{length * per / 1024:12.0f}")
+    print()
+    print(f"{'cached group':22}{'memory MiB':>12}")
+    for label, size in (("Row models", group_model_bytes), ("packed rows", group_packed_bytes)):
+        print(f"{label:22}{size * per / 2**20:12.2f}")
+
+
+if __name__ == "__main__":
+    main()
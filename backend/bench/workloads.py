@@ -0,0 +1,200 @@
+"""Scripted workloads against the proxy with GLEIF simulated locally.
+
+Drives the FastAPI app in-process (ASGI transport, lifespan included) while
+``bench.fake_gleif`` answers every upstream call, so it can run anywhere
+without touching api.gleif.org.  Each workload starts from empty caches and
+reports latency percentiles, upstream calls per request (total and the
+per-request maximum from ``Server-Timing``), 429s and peak Python heap.
+Run from ``backend``::
+
+    python -m bench.workloads [--shape 6x5x4] [--groups 4] [--latency 0.05]
+        [--throttle 0.02] [--requests 200] [--concurrency 16]
+        [--save results.json] [--compare baseline.json]
+
+The proxy's own GLEIF rate limiter is lifted unless ``--proxy-rate`` is
+given, otherwise cold crawls would run at 55 calls a minute.  tracemalloc
+slows the app down; pass ``--no-tracemalloc`` for cleaner latencies.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import sys
+import time
+import tracemalloc
+from typing import Dict, List
+
+# Keep background refreshes and connection pre-warming out of the measurements
+os.environ.setdefault("CACHE_WARM_INTERVAL_SECONDS", "0")
+os.environ.setdefault("GLEIF_POOL_WARM_CONNECTIONS", "0")
+
+import httpx
+
+from app import main as proxy
+from bench.fake_gleif import FakeGleif, parse_shape
+
+_UPSTREAM_CALLS = re.compile(r'upstream;[^,]*desc="(\d+) GLEIF calls"')
+# Compared with --compare; a run fails if any grows by more than --tolerance
+_GATED = ("p50Ms", "p99Ms", "upstreamPerRequest")
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))] if ordered else 0.0
+
+
+def _paths(fake: FakeGleif, workload: str, n: int, rng: random.Random) -> List[str]:
+    """``n`` request paths; earlier groups are more popular, as real traffic is skewed."""
+    weights = [1 / (g + 1) for g in range(len(fake.roots))]
+    paths = []
+    for _ in range(n):
+        members = rng.choices(fake.members, weights)[0]
+        lei = rng.choice(members)
+        if workload == "search":
+            q = lei if rng.random() < 0.5 else " ".join(fake.names[lei].split()[:4])
+            paths.append(f"/api/search?{httpx.QueryParams({'q': q})}")
+        elif workload == "hierarchy":
+            paths.append(f"/api/lei/{lei}/hierarchy")
+        elif workload == "flat":
+            paths.append(f"/api/lei/{lei}/hierarchy/flat")
+        else:
+            paths.append(f"/api/lei/{lei}/hierarchy/shape")
+    return paths
+
+
+def _reset_caches() -> None:
+    proxy.lei_cache.clear()
+    proxy.response_cache.clear()
+    proxy._graph._edges.clear()
+    proxy._crawl_progress.clear()
+
+
+async def _run(client: httpx.AsyncClient, fake: FakeGleif, paths: List[str], concurrency: int, trace: bool) -> Dict:
+    _reset_caches()
+    calls, throttled = fake.total_calls, fake.throttled
+    latencies: List[float] = []
+    per_request: List[int] = []
+    errors = 0
+    queue = list(reversed(paths))
+
+    async def worker() -> None:
+        nonlocal errors
+        while queue:
+            path = queue.pop()
+            start = time.perf_counter()
+            r = await client.get(path)
+            latencies.append(time.perf_counter() - start)
+            errors += r.status_code >= 400
+            m = _UPSTREAM_CALLS.search(r.headers.get("server-timing", ""))
+            per_request.append(int(m.group(1)) if m else 0)
+
+    if trace:
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] - base if trace else 0
+    return {
+        "requests": len(paths),
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "p50Ms": round(_percentile(latencies, 50) * 1000, 2),
+        "p99Ms": round(_percentile(latencies, 99) * 1000, 2),
+        "upstreamPerRequest": round((fake.total_calls - calls) / len(paths), 3),
+        "maxUpstreamPerRequest": max(per_request, default=0),
+        "throttled": fake.throttled - throttled,
+        "peakMiB": round(peak / 2**20, 2),
+    }
+
+
+async def _bench(args: argparse.Namespace) -> Dict[str, Dict]:
+    shape = parse_shape(args.shape)
+    fake = FakeGleif(
+        [shape] * args.groups,
+        latency=args.latency,
+        throttle=args.throttle,
+        rate=args.upstream_rate,
+        retry_after=args.retry_after,
+        seed=args.seed,
+    )
+    rng = random.Random(args.seed)
+    results: Dict[str, Dict] = {}
+    async with proxy.app.router.lifespan_context(proxy.app):
+        await proxy._http_client.aclose()
+        proxy._http_client = httpx.AsyncClient(transport=fake.transport())
+        if args.proxy_rate:
+            proxy.GLEIF_RATE_LIMITER._bucket = proxy.LocalTokenBucket(args.proxy_rate, max(1.0, args.proxy_rate))
+        else:
+            proxy.GLEIF_RATE_LIMITER._bucket = proxy.LocalTokenBucket(1e9, 1e9)
+        transport = httpx.ASGITransport(app=proxy.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            for workload in args.workloads:
+                paths = _paths(fake, workload, args.requests, rng)
+                results[workload] = await _run(client, fake, paths, args.concurrency, not args.no_tracemalloc)
+    return results
+
+
+def _regressions(results: Dict[str, Dict], baseline: Dict[str, Dict], tolerance: float) -> List[str]:
+    out = []
+    for workload, current in results.items():
+        before = baseline.get(workload)
+        if before is None:
+            continue
+        for metric in _GATED:
+            old, new = before.get(metric, 0), current[metric]
+            if new > old * (1 + tolerance) and new - old > 1e-6:
+                out.append(f"{workload} {metric}: {old} -> {new}")
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--shape", default="6x5x4", help="children per node at each level, e.g. 6x5x4")
+    parser.add_argument("--groups", type=int, default=4)
+    parser.add_argument("--workloads", nargs="+", default=["search", "hierarchy", "flat", "shape"],
+                        choices=["search", "hierarchy", "flat", "shape"])
+    parser.add_argument("--requests", type=int, default=200, help="requests per workload")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.02, help="mean upstream latency in seconds")
+    parser.add_argument("--throttle", type=float, default=0.0, help="probability of a random upstream 429")
+    parser.add_argument("--upstream-rate", type=float, default=0.0, help="upstream quota in calls/second (0: none)")
+    parser.add_argument("--retry-after", type=float, default=0.2, help="Retry-After seconds sent with 429s")
+    parser.add_argument("--proxy-rate", type=float, default=0.0, help="keep the proxy limiter at this calls/second")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-tracemalloc", action="store_true")
+    parser.add_argument("--save", help="write results as JSON")
+    parser.add_argument("--compare", help="baseline JSON from --save; exit 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative growth for --compare")
+    args = parser.parse_args()
+
+    if not args.no_tracemalloc:
+        tracemalloc.start()
+    results = asyncio.run(_bench(args))
+
+    print(f"{args.groups} groups of shape {args.shape}, {args.requests} requests per workload, "
+          f"concurrency {args.concurrency}, upstream latency {args.latency * 1000:g} ms")
+    print(f"{'':11}{'p50 ms':>9}{'p99 ms':>9}{'up/req':>8}{'max up':>8}{'429s':>6}{'errors':>8}{'peak MiB':>10}")
+    for workload, r in results.items():
+        print(f"{workload:11}{r['p50Ms']:9.1f}{r['p99Ms']:9.1f}{r['upstreamPerRequest']:8.2f}"
+              f"{r['maxUpstreamPerRequest']:8d}{r['throttled']:6d}{r['errors']:8d}{r['peakMiB']:10.2f}")
+
+    if args.save:
+        with open(args.save, "w") as fh:
+            json.dump(results, fh, indent=2)
+    if args.compare:
+        with open(args.compare) as fh:
+            regressions = _regressions(results, json.load(fh), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+import httpx
+import pytest
+
+from app import main
+from bench.fake_gleif import FakeGleif
+
+
+def _reset_caches() -> None:
+    main.lei_cache.clear()
+    main.response_cache.clear()
+
+
+@pytest.fixture
+def gleif(monkeypatch):
+    """A FakeGleif group (root, 3 children, 2 grandchildren each) behind the app.
+
+    Caches start empty, the golden copy is off and the rate limiter has
+    tokens to spare, so tests only see the calls their requests make.
+    """
+    fake = FakeGleif([[3, 2]])
+    monkeypatch.setattr(main, "_golden", None)
+    monkeypatch.setattr(main, "_gleif_breaker", main.CircuitBreaker())
+    monkeypatch.setattr(
+        main, "GLEIF_RATE_LIMITER", main.AsyncRateLimiter(1, 1, bucket=main.LocalTokenBucket(1e9, 1e9))
+    )
+    monkeypatch.setattr(main, "_http_client", httpx.AsyncClient(transport=fake.transport()))
+    monkeypatch.setattr(main, "_graph", main.HierarchyGraph())
+    _reset_caches()
+    yield fake
+    _reset_caches()
+
+
+@pytest.fixture
+def api():
+    """Opens an httpx client on the app itself (no lifespan; use with ``gleif``)."""
+    return lambda: httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://test")
@@ -0,0 +1,69 @@
+import asyncio
+
+from app.main import AdaptiveConcurrencyLimit
+
+
+def _calls(limit: AdaptiveConcurrencyLimit, latencies, ok: bool = True) -> None:
+    async def run() -> None:
+        for latency in latencies:
+            await limit.acquire()
+            limit.release(latency, ok)
+
+    asyncio.run(run())
+
+
+def test_steady_latency_grows_the_limit_up_to_its_maximum():
+    limit = AdaptiveConcurrencyLimit(2, max_limit=4)
+    _calls(limit, [0.1] * 4)
+    assert limit.limit == 3
+    _calls(limit, [0.1] * 50)
+    assert limit.limit == 4
+    assert limit.in_flight == 0
+
+
+def test_failures_halve_the_limit_down_to_the_minimum():
+    limit = AdaptiveConcurrencyLimit(8, min_limit=2)
+    _calls(limit, [None], ok=False)
+    assert limit.limit == 4
+    _calls(limit, [None] * 3, ok=False)
+    assert limit.limit == 2
+
+
+def test_latency_well_above_the_long_run_average_backs_off():
+    limit = AdaptiveConcurrencyLimit(10, tolerance=2.0)
+    _calls(limit, [0.1] * 20)
+    assert limit.limit == 10
+    # Within tolerance of the long-run average: no change
+    _calls(limit, [0.15])
+    assert limit.limit == 10
+    # Each slow call takes 10% off
+    _calls(limit, [1.0] * 3)
+    assert limit.limit == 7
+
+
+def test_waiters_get_slots_in_order_as_calls_finish():
+    limit = AdaptiveConcurrencyLimit(1)
+    order = []
+
+    async def call(name: str) -> None:
+        await limit.acquire()
+        order.append(name)
+
+    async def scenario() -> None:
+        await limit.acquire()
+        waiters = [asyncio.ensure_future(call(name)) for name in ("a", "b", "c")]
+        await asyncio.sleep(0)
+        waiters[1].cancel()
+        await asyncio.sleep(0)
+        assert order == []
+        limit.release(0.1)
+        await asyncio.sleep(0)
+        assert order == ["a"] and limit.in_flight == 1
+        limit.release(0.1)
+        await asyncio.sleep(0)
+        assert order == ["a", "c"] and limit.in_flight == 1
+        limit.release(0.1)
+        assert limit.in_flight == 0
+        await asyncio.gather(*waiters, return_exceptions=True)
+
+    asyncio.run(scenario())
@@ -0,0 +1,52 @@
+import asyncio
+
+from app import main
+from bench.fake_gleif import group_lei
+
+UNKNOWN = group_lei(0, 9999)
+
+
+def test_batch_keeps_input_order_and_omits_unknown_leis(gleif, api):
+    wanted = [group_lei(0, 3), UNKNOWN, group_lei(0, 0), group_lei(0, 3).lower(), group_lei(0, 1)]
+
+    async def scenario() -> None:
+        async with api() as client:
+            r = await client.post("/api/lei/batch", json={"leis": wanted})
+            assert r.status_code == 200
+            assert [row["lei"] for row in r.json()] == [group_lei(0, 3), group_lei(0, 0), group_lei(0, 1)]
+            assert r.json()[1]["legalName"] == gleif.names[group_lei(0, 0)]
+            # All misses went out as one filter[lei] query
+            assert dict(gleif.calls) == {"lei-records": 1}
+
+            r = await client.post("/api/lei/batch", json={"leis": [group_lei(0, 1), group_lei(0, 2)]})
+            assert [row["lei"] for row in r.json()] == [group_lei(0, 1), group_lei(0, 2)]
+            assert dict(gleif.calls) == {"lei-records": 2}
+
+    asyncio.run(scenario())
+
+
+def test_batch_splits_misses_into_chunks_of_page_size(gleif, api, monkeypatch):
+    monkeypatch.setattr(main, "_BATCH_CHUNK", 4)
+    members = gleif.members[0]
+
+    async def scenario() -> None:
+        async with api() as client:
+            r = await client.post("/api/lei/batch", json={"leis": members})
+            assert [row["lei"] for row in r.json()] == members
+            assert gleif.calls["lei-records"] == -(-len(members) // 4)
+
+    asyncio.run(scenario())
+
+
+def test_batch_rejects_bad_input(gleif, api, monkeypatch):
+    monkeypatch.setattr(main, "_BATCH_MAX_LEIS", 2)
+
+    async def scenario() -> None:
+        async with api() as client:
+            r = await client.post("/api/lei/batch", json={"leis": [group_lei(0, 0), "not-an-lei"]})
+            assert r.status_code == 400
+            r = await client.post("/api/lei/batch", json={"leis": [group_lei(0, i) for i in range(3)]})
+            assert r.status_code == 413
+            assert gleif.total_calls == 0
+
+    asyncio.run(scenario())
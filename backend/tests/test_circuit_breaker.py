@@ -0,0 +1,131 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from app import main
+from app.main import CircuitBreaker, UpstreamUnavailable
+
+
+class Clock:
+    """Stands in for the ``time`` module in app.main; only ``monotonic`` is frozen."""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def __getattr__(self, name: str):
+        return getattr(time, name)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(main, "time", clock)
+    return clock
+
+
+def _open(breaker: CircuitBreaker) -> None:
+    for _ in range(breaker._threshold):
+        assert breaker.allow()
+        breaker.record(False)
+
+
+def test_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_seconds=10)
+    for _ in range(2):
+        breaker.record(False)
+    assert breaker.state == "closed"
+    breaker.record(True)
+    for _ in range(2):
+        breaker.record(False)
+    assert breaker.state == "closed"
+    breaker.record(False)
+    assert breaker.state == "open"
+    assert breaker.rejects() and not breaker.allow()
+    assert breaker.retry_after() == pytest.approx(10)
+
+
+def test_half_open_admits_one_probe_and_success_closes(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=10)
+    _open(breaker)
+    clock.now += 10
+    assert not breaker.rejects()
+    assert breaker.allow()
+    assert breaker.state == "half_open"
+    assert breaker.rejects() and not breaker.allow()
+    breaker.record(True)
+    assert breaker.state == "closed"
+    assert breaker.allow() and breaker.allow()
+
+
+def test_failed_probe_reopens_with_longer_reset(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=10, max_reset_seconds=30)
+    _open(breaker)
+    for expected in (20, 30, 30):
+        clock.now += breaker.retry_after()
+        assert breaker.allow()
+        breaker.record(False)
+        assert breaker.state == "open"
+        assert breaker.retry_after() == pytest.approx(expected)
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record(True)
+    assert breaker.retry_after() == 0
+    _open(breaker)
+    assert breaker.retry_after() == pytest.approx(10)
+
+
+def test_abandoned_probe_frees_the_slot(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=10)
+    _open(breaker)
+    clock.now += 10
+    assert breaker.allow()
+    breaker.abandon()
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+
+
+class _StuckLimiter:
+    """Rate limiter whose tokens never come due."""
+
+    async def acquire(self, priority=None) -> None:
+        await asyncio.Event().wait()
+
+
+def test_probe_cancelled_while_queued_does_not_wedge_the_circuit(clock, monkeypatch):
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=10)
+    _open(breaker)
+    clock.now += 10
+    monkeypatch.setattr(main, "_gleif_breaker", breaker)
+    monkeypatch.setattr(main, "GLEIF_RATE_LIMITER", _StuckLimiter())
+    monkeypatch.setattr(main, "_http_client", httpx.AsyncClient(transport=httpx.MockTransport(lambda r: httpx.Response(200))))
+
+    async def scenario() -> None:
+        call = asyncio.ensure_future(main._gleif_get(f"{main.GLEIF_API_URL}/lei-records/X"))
+        await asyncio.sleep(0.01)
+        call.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await call
+
+    asyncio.run(scenario())
+    assert not breaker.rejects()
+    assert breaker.allow()
+    breaker.record(True)
+    assert breaker.state == "closed"
+
+
+def test_rejected_call_fails_fast_with_retry_after(clock, monkeypatch):
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=10)
+    _open(breaker)
+    monkeypatch.setattr(main, "_gleif_breaker", breaker)
+    monkeypatch.setattr(main, "GLEIF_RATE_LIMITER", _StuckLimiter())
+    monkeypatch.setattr(main, "_http_client", httpx.AsyncClient(transport=httpx.MockTransport(lambda r: httpx.Response(200))))
+
+    with pytest.raises(UpstreamUnavailable) as exc:
+        asyncio.run(main._gleif_get(f"{main.GLEIF_API_URL}/lei-records/X"))
+    assert exc.value.status_code == 503
+    assert exc.value.headers["Retry-After"] == "10"
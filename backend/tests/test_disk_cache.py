@@ -0,0 +1,86 @@
+import asyncio
+
+from app.main import DiskCache, TTLCache
+
+
+def _open(path, **kwargs) -> DiskCache:
+    return DiskCache(str(path), namespace="3:", kinds={"lei_raw"}, **kwargs)
+
+
+def test_writes_are_readable_before_and_after_the_writer_runs(tmp_path):
+    path = tmp_path / "l2.sqlite"
+    cache = _open(path)
+    cache.set("3:lei_raw:A", {"id": "A"})
+    cache.set("3:other:B", {"id": "B"})
+    assert cache.get("3:lei_raw:A") == {"id": "A"}
+    assert cache.get("3:other:B") is None
+    cache.delete("3:lei_raw:A")
+    assert cache.get("3:lei_raw:A") is None
+    cache.set("3:lei_raw:A", {"id": "A2"})
+    cache.close()
+
+    cache = _open(path)
+    assert cache.get_many(["3:lei_raw:A", "3:lei_raw:missing"]) == {"3:lei_raw:A": {"id": "A2"}}
+    assert cache.size == len('{"id":"A2"}')
+    cache.close()
+
+
+def test_size_total_survives_overwrites_and_evicts_coldest(tmp_path):
+    path = tmp_path / "l2.sqlite"
+    cache = _open(path, max_bytes=400)
+    value = {"pad": "x" * 40}
+    for i in range(4):
+        cache.set(f"3:lei_raw:{i}", value)
+    cache.set("3:lei_raw:0", value)
+    for _ in range(3):
+        cache.note_hit("3:lei_raw:hot")
+    cache.set("3:lei_raw:hot", value)
+    cache.close()
+
+    cache = _open(path, max_bytes=400)
+    row = cache._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()
+    assert cache.size == row[0] == 5 * len('{"pad":"' + "x" * 40 + '"}')
+    for i in range(5, 10):
+        cache.set(f"3:lei_raw:{i}", value)
+    cache.close()
+
+    cache = _open(path, max_bytes=400)
+    assert cache.size <= 400
+    assert cache.get("3:lei_raw:9") is not None
+    cache.close()
+
+
+def test_ttl_cache_reads_l2_only_through_aget(tmp_path):
+    path = tmp_path / "l2.sqlite"
+    writer = _open(path)
+    writer.set("3:lei_raw:A", {"id": "A"})
+    writer.close()
+
+    cache = TTLCache()
+    cache.l2 = _open(path)
+    try:
+        assert cache.get("3:lei_raw:A") is None
+        assert asyncio.run(cache.aget("3:lei_raw:A")) == {"id": "A"}
+        # Promoted into memory by the read
+        assert cache.get("3:lei_raw:A") == {"id": "A"}
+        found = asyncio.run(cache.aget_many(["3:lei_raw:A", "3:lei_raw:B"]))
+        assert found == {"3:lei_raw:A": {"id": "A"}}
+        assert cache.lookups["lei_raw", "l2_hit"] == 1
+        assert cache.lookups["lei_raw", "miss"] == 2
+    finally:
+        cache.l2.close()
+
+
+def test_prime_fills_memory_and_writes_l2_only_when_asked(tmp_path):
+    cache = TTLCache(ttl_seconds=60)
+    cache.l2 = _open(tmp_path / "l2.sqlite")
+    try:
+        assert cache.ttl == 60
+        cache.prime("3:lei_raw:A", {"id": "A"})
+        cache.prime("3:lei_raw:B", {"id": "B"}, write_through=True)
+        assert cache.get("3:lei_raw:A") == {"id": "A"}
+        assert cache.writes["lei_raw"] == 0
+        assert cache.l2.get("3:lei_raw:A") is None
+        assert cache.l2.get("3:lei_raw:B") == {"id": "B"}
+    finally:
+        cache.l2.close()
@@ -0,0 +1,63 @@
+import asyncio
+import csv
+import io
+import json
+
+import httpx
+import pytest
+
+from app import main
+from bench.fake_gleif import FakeGleif
+
+
+@pytest.fixture
+def big_group(gleif, monkeypatch):
+    """A group whose 240 ultimate children span two GLEIF pages."""
+    fake = FakeGleif([[15, 15]])
+    monkeypatch.setattr(main, "_http_client", httpx.AsyncClient(transport=fake.transport()))
+    return fake
+
+
+def _export(api, lei: str, fmt: str, **headers) -> httpx.Response:
+    async def fetch() -> httpx.Response:
+        async with api() as client:
+            return await client.get(f"/api/lei/{lei}/ultimate-children/export", params={"format": fmt}, headers=headers)
+
+    return asyncio.run(fetch())
+
+
+def test_csv_export_follows_every_page(big_group, api):
+    root = big_group.roots[0]
+    r = _export(api, root, "csv")
+    assert r.headers["content-type"] == "text/csv; charset=utf-8"
+    assert r.headers["content-disposition"] == f'attachment; filename="{root}-ultimate-children.csv"'
+    header, *rows = list(csv.reader(io.StringIO(r.text)))
+    assert header == list(main._ROW_FIELDS)
+    assert [row[header.index("lei")] for row in rows] == big_group.members[0][1:]
+    assert big_group.calls["lei-records/{lei}/ultimate-children"] == 2
+
+
+def test_ndjson_export_has_one_row_per_line(big_group, api):
+    root = big_group.roots[0]
+    r = _export(api, root, "ndjson", **{"Accept-Encoding": "gzip"})
+    assert r.headers["content-encoding"] == "gzip"
+    rows = [json.loads(line) for line in r.text.splitlines()]
+    assert [row["lei"] for row in rows] == big_group.members[0][1:]
+    assert rows[0]["legalName"] == big_group.names[rows[0]["lei"]]
+
+
+def test_parquet_export_round_trips(big_group, api):
+    pq = pytest.importorskip("pyarrow.parquet")
+    root = big_group.roots[0]
+    r = _export(api, root, "parquet")
+    assert r.headers["content-type"] == "application/vnd.apache.parquet"
+    table = pq.read_table(io.BytesIO(r.content))
+    assert table.column_names == list(main._ROW_FIELDS)
+    assert table.column("lei").to_pylist() == big_group.members[0][1:]
+
+
+def test_parquet_export_without_pyarrow_is_501(gleif, api, monkeypatch):
+    monkeypatch.setattr(main, "pyarrow", None)
+    r = _export(api, gleif.roots[0], "parquet")
+    assert r.status_code == 501
+    assert gleif.total_calls == 0
@@ -0,0 +1,32 @@
+import asyncio
+import json
+
+from bench.fake_gleif import group_lei
+
+ROOT = group_lei(0, 0)
+
+
+def _lines(body: bytes) -> list:
+    return [json.loads(line) for line in body.splitlines() if line]
+
+
+def test_flat_ndjson_streams_nodes_then_a_summary(gleif, api):
+    async def scenario() -> None:
+        async with api() as client:
+            r = await client.get(f"/api/lei/{ROOT}/hierarchy/flat", params={"stream": "ndjson"})
+            assert r.headers["content-type"].startswith("application/x-ndjson")
+            *nodes, last = _lines(r.content)
+            assert last == {"summary": {"count": len(gleif.members[0]), "maxDepth": 2, "truncated": False}}
+            assert nodes[0] == {"parentLei": None, "entity": nodes[0]["entity"]}
+            assert [n["entity"]["lei"] for n in nodes] == gleif.members[0]
+            assert all(n["parentLei"] == gleif.parent[n["entity"]["lei"]] for n in nodes[1:])
+
+            # The finished stream is cached for the JSON view and later streams
+            calls = gleif.total_calls
+            flat = (await client.get(f"/api/lei/{ROOT}/hierarchy/flat")).json()
+            assert flat == nodes
+            again = await client.get(f"/api/lei/{ROOT}/hierarchy/flat", params={"stream": "ndjson"})
+            assert _lines(again.content) == [*nodes, last]
+            assert gleif.total_calls == calls
+
+    asyncio.run(scenario())
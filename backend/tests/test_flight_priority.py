@@ -0,0 +1,120 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app import main
+from app.main import PRIORITY_BULK, PRIORITY_INTERACTIVE, AsyncRateLimiter, CancelToken, SingleFlight
+
+
+class ManualBucket:
+    """Token bucket that only has the tokens a test hands it."""
+
+    def __init__(self) -> None:
+        self.tokens = 0
+
+    async def take(self) -> float:
+        if self.tokens > 0:
+            self.tokens -= 1
+            return 0.0
+        return 0.01
+
+    async def give_back(self) -> None:
+        self.tokens += 1
+
+    def describe(self):
+        return {}
+
+
+def test_interactive_caller_promotes_a_bulk_flight():
+    limiter = AsyncRateLimiter(max_calls=1, period_seconds=1, bucket=ManualBucket())
+    flights = SingleFlight()
+    granted = []
+
+    async def load(name: str) -> str:
+        await limiter.acquire()
+        granted.append(name)
+        return name
+
+    async def bulk(coro):
+        main._request_priority.set(PRIORITY_BULK)
+        return await coro
+
+    async def scenario() -> None:
+        other = asyncio.ensure_future(bulk(load("other")))
+        await asyncio.sleep(0.02)
+        shared = asyncio.ensure_future(bulk(flights.do("k", lambda: load("shared"))))
+        await asyncio.sleep(0.02)
+        assert limiter.stats()["lanes"]["bulk"]["queueDepth"] == 2
+
+        joiner = asyncio.ensure_future(flights.do("k", lambda: load("joiner")))
+        await asyncio.sleep(0.02)
+        limiter._bucket.tokens = 1
+        assert await asyncio.wait_for(joiner, 1) == "shared"
+        assert granted == ["shared"]
+        assert await shared == "shared"
+        limiter._bucket.tokens = 1
+        await asyncio.wait_for(other, 1)
+        assert granted == ["shared", "other"]
+
+    asyncio.run(scenario())
+    assert flights.stats() == {"inflight": 0, "started": 1, "coalesced": 1}
+
+
+def test_flight_keeps_priority_its_work_sets():
+    flights = SingleFlight()
+    seen = []
+
+    async def crawl() -> None:
+        main._request_priority.set(PRIORITY_BULK)
+        seen.append(main._current_priority())
+
+    async def plain() -> None:
+        seen.append(main._current_priority())
+
+    async def scenario() -> None:
+        await flights.do("crawl", crawl)
+        await flights.do("plain", plain)
+        main._request_priority.set(PRIORITY_BULK)
+        await flights.do("plain-bulk", plain)
+
+    asyncio.run(scenario())
+    assert seen == [PRIORITY_BULK, PRIORITY_INTERACTIVE, PRIORITY_BULK]
+
+
+def test_shared_work_is_cancelled_only_when_every_waiter_disconnects():
+    flights = SingleFlight()
+    release = asyncio.Event()
+    tokens = []
+
+    async def crawl(cancel: CancelToken) -> str:
+        tokens.append(cancel)
+        await cancel.run(release.wait())
+        return "done"
+
+    async def scenario() -> None:
+        first, second = CancelToken(), CancelToken()
+        owner = asyncio.ensure_future(flights.do_cancellable("k", crawl, first))
+        joiner = asyncio.ensure_future(flights.do_cancellable("k", crawl, second))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(HTTPException) as exc:
+            await owner
+        assert exc.value.status_code == 499
+        assert not tokens[0].cancelled
+        release.set()
+        assert await joiner == "done"
+
+        release.clear()
+        third, fourth = CancelToken(), CancelToken()
+        waiters = [asyncio.ensure_future(flights.do_cancellable("k2", crawl, t)) for t in (third, fourth)]
+        await asyncio.sleep(0)
+        third.cancel()
+        fourth.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        await asyncio.sleep(0)
+        assert tokens[1].cancelled
+        assert flights.stats()["inflight"] == 0
+
+    asyncio.run(scenario())
+    assert len(tokens) == 2
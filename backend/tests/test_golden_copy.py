@@ -0,0 +1,125 @@
+import asyncio
+from pathlib import Path
+
+import httpx
+import pytest
+
+from app import main
+from app import golden_copy
+from app.golden_copy import GoldenCopyStore, ingest
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+ROOT = "5493000GOLDENROOT001"
+SUB_A = "5493000GOLDENSUBA002"
+SUB_B = "5493000GOLDENSUBB003"
+LEAF = "5493000GOLDENLEAF004"
+UNKNOWN = "529900UNKNOWNLEI0000"
+
+
+@pytest.fixture
+def store(tmp_path):
+    path = str(tmp_path / "golden.sqlite")
+    counts = ingest(path, lei_file=str(FIXTURES / "lei-cdf.xml.zip"), rr_file=str(FIXTURES / "rr-cdf.xml.zip"))
+    assert counts == {"records": 4, "direct": 3, "ultimate": 3}
+    store = GoldenCopyStore(path)
+    yield store
+    store.close()
+
+
+def test_record_maps_like_an_api_record(store):
+    data = store.record(SUB_B)
+    assert data["id"] == SUB_B
+    row = main._map_row(data)
+    assert row.lei == SUB_B
+    assert row.legalName == "Golden Subsidiary B GmbH"
+    assert row.jurisdiction == "DE"
+    assert row.status == "Active"
+    assert row.managingLOU == "5493001KJTIIGC8Y1R12"
+    assert store.record(UNKNOWN) is None
+    assert set(store.records([ROOT, LEAF, UNKNOWN])) == {ROOT, LEAF}
+
+
+def test_direct_children(store):
+    assert store.direct_children(ROOT) == [SUB_A, SUB_B]
+    assert store.direct_children(SUB_B) == [LEAF]
+    # The inactive LEAF -> ROOT relationship in the fixture is skipped.
+    assert store.direct_children(LEAF) == []
+    assert store.direct_children(UNKNOWN) is None
+    assert store.direct_children_many([ROOT, LEAF, UNKNOWN]) == {ROOT: [SUB_A, SUB_B], LEAF: []}
+
+
+def test_ultimate_parent(store):
+    assert store.ultimate_parent(LEAF) == (True, ROOT)
+    assert store.ultimate_parent(ROOT) == (True, None)
+    assert store.ultimate_parent(UNKNOWN) == (False, None)
+    assert store.ultimate_children_count(ROOT) == 3
+    assert store.ultimate_children_count(LEAF) == 0
+    assert store.ultimate_children_count(UNKNOWN) is None
+
+
+class _OpenLimiter:
+    async def acquire(self, priority=None) -> None:
+        return None
+
+
+def test_fetch_lei_raw_prefers_store_and_falls_back_to_http(store, monkeypatch):
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        lei = request.url.path.rsplit("/", 1)[-1]
+        return httpx.Response(200, json={"data": {"type": "lei-records", "id": lei, "attributes": {}}})
+
+    monkeypatch.setattr(main, "_golden", store)
+    monkeypatch.setattr(main, "_gleif_breaker", main.CircuitBreaker())
+    monkeypatch.setattr(main, "GLEIF_RATE_LIMITER", _OpenLimiter())
+    monkeypatch.setattr(main, "_http_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    main.lei_cache.clear()
+
+    async def scenario() -> None:
+        local = await main._fetch_lei_raw(ROOT)
+        assert local["id"] == ROOT
+        assert calls == []
+        remote = await main._fetch_lei_raw(UNKNOWN)
+        assert remote["id"] == UNKNOWN
+        assert calls == [f"/api/v1/lei-records/{UNKNOWN}"]
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        main.lei_cache.clear()
+
+
+def test_shape_derived_from_the_store_is_reported_as_derived(store, monkeypatch):
+    monkeypatch.setattr(main, "_golden", store)
+    progress = {}
+    counts = asyncio.run(main._derived_shape_counts(ROOT, 100, progress))
+    assert counts == (2, 2, 4)
+    assert progress == {"visited": 4, "frontier": 0, "depth": 2, "derived": 1}
+    # A group bigger than max_nodes needs a crawl
+    progress = {}
+    assert asyncio.run(main._derived_shape_counts(ROOT, 3, progress)) is None
+    assert "derived" not in progress
+
+
+def test_ingest_without_fts5_trigram_skips_the_name_index(tmp_path, monkeypatch):
+    # What an SQLite build without the trigram tokenizer reports
+    monkeypatch.setattr(
+        golden_copy, "_NAMES_SCHEMA", "CREATE VIRTUAL TABLE names USING fts5(lei, tokenize='no_such_tokenizer')"
+    )
+    path = str(tmp_path / "golden.sqlite")
+    counts = ingest(path, lei_file=str(FIXTURES / "lei-cdf.xml.zip"), rr_file=str(FIXTURES / "rr-cdf.xml.zip"))
+    assert counts == {"records": 4, "direct": 3, "ultimate": 3}
+    store = GoldenCopyStore(path)
+    try:
+        assert not store.with_names
+        assert store.name_candidates("golden holdings") == []
+        assert store.direct_children(ROOT) == [SUB_A, SUB_B]
+    finally:
+        store.close()
+
+
+def test_name_candidates_use_the_trigram_index(store):
+    assert store.with_names
+    assert store.name_candidates("golden subsidiary b")[0] == (SUB_B, "Golden Subsidiary B GmbH")
@@ -0,0 +1,41 @@
+import asyncio
+
+from bench.fake_gleif import group_lei
+
+ROOT = group_lei(0, 0)
+
+
+def _shape(node: dict) -> list:
+    return [(c["entity"]["lei"], c["truncated"], _shape(c)) for c in node["children"]]
+
+
+def test_tree_is_built_level_by_level_with_one_children_call_per_parent(gleif, api):
+    async def scenario() -> None:
+        async with api() as client:
+            r = await client.get(f"/api/lei/{group_lei(0, 5)}/hierarchy")
+            tree = r.json()
+            assert tree["entity"]["lei"] == ROOT
+            assert [c["entity"]["lei"] for c in tree["children"]] == gleif.children[ROOT]
+            grandchildren = [g["entity"]["lei"] for c in tree["children"] for g in c["children"]]
+            assert grandchildren == gleif.members[0][4:]
+            assert not any(c["truncated"] for c in tree["children"])
+            assert gleif.calls["lei-records/{lei}/direct-children"] == len(gleif.members[0])
+
+    asyncio.run(scenario())
+
+
+def test_depth_and_node_limits_mark_unexplored_parents_truncated(gleif, api):
+    children = gleif.children[ROOT]
+
+    async def scenario() -> None:
+        async with api() as client:
+            tree = (await client.get(f"/api/lei/{ROOT}/hierarchy", params={"max_depth": 1})).json()
+            assert _shape(tree) == [(lei, True, []) for lei in children]
+
+            tree = (await client.get(f"/api/lei/{ROOT}/hierarchy", params={"max_nodes": 5})).json()
+            assert tree["truncated"] is False
+            first = tree["children"][0]
+            assert [g["entity"]["lei"] for g in first["children"]] == gleif.children[children[0]][:1]
+            assert first["truncated"] is True
+
+    asyncio.run(scenario())
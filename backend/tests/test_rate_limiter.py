@@ -0,0 +1,149 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app import main
+from app.main import (
+    PRIORITY_BULK,
+    PRIORITY_INTERACTIVE,
+    AsyncRateLimiter,
+    RedisTokenBucket,
+    SQLiteTokenBucket,
+)
+
+
+class ManualBucket:
+    """Token bucket that only has the tokens a test hands it."""
+
+    def __init__(self, tokens: int = 0) -> None:
+        self.tokens = tokens
+
+    async def take(self) -> float:
+        if self.tokens > 0:
+            self.tokens -= 1
+            return 0.0
+        return 0.01
+
+    async def give_back(self) -> None:
+        self.tokens += 1
+
+    def describe(self):
+        return {"backend": "manual"}
+
+
+def test_interactive_lane_is_served_before_queued_bulk_callers():
+    bucket = ManualBucket()
+    limiter = AsyncRateLimiter(max_calls=1, period_seconds=1, bucket=bucket)
+    granted = []
+
+    async def call(name: str, priority: int) -> None:
+        await limiter.acquire(priority)
+        granted.append(name)
+
+    async def scenario() -> None:
+        tasks = [asyncio.ensure_future(call(f"bulk{i}", PRIORITY_BULK)) for i in range(3)]
+        await asyncio.sleep(0.02)
+        tasks.append(asyncio.ensure_future(call("interactive", PRIORITY_INTERACTIVE)))
+        await asyncio.sleep(0.02)
+        lanes = limiter.stats()["lanes"]
+        assert (lanes["interactive"]["queueDepth"], lanes["bulk"]["queueDepth"]) == (1, 3)
+        assert not limiter.idle()
+
+        bucket.tokens = 2
+        await asyncio.sleep(0.05)
+        assert granted == ["interactive", "bulk0"]
+        bucket.tokens = 2
+        await asyncio.wait_for(asyncio.gather(*tasks), 1)
+        assert granted == ["interactive", "bulk0", "bulk1", "bulk2"]
+        assert limiter.idle()
+
+    asyncio.run(scenario())
+    lanes = limiter.stats()["lanes"]
+    assert (lanes["interactive"]["granted"], lanes["bulk"]["granted"]) == (1, 3)
+    counts, waited = limiter.wait_histogram(PRIORITY_BULK)
+    assert sum(counts) == 3 and waited > 0
+
+
+def test_free_token_is_granted_without_queueing():
+    bucket = ManualBucket(tokens=1)
+    limiter = AsyncRateLimiter(max_calls=1, period_seconds=1, bucket=bucket)
+    asyncio.run(limiter.acquire(PRIORITY_BULK))
+    assert bucket.tokens == 0
+    counts, waited = limiter.wait_histogram(PRIORITY_BULK)
+    assert counts[0] == 1 and waited == 0.0
+
+
+def test_cancelled_waiter_does_not_use_up_a_token():
+    bucket = ManualBucket()
+    limiter = AsyncRateLimiter(max_calls=1, period_seconds=1, bucket=bucket)
+
+    async def scenario() -> None:
+        waiter = asyncio.ensure_future(limiter.acquire(PRIORITY_INTERACTIVE))
+        await asyncio.sleep(0.02)
+        waiter.cancel()
+        await asyncio.sleep(0.02)
+        bucket.tokens = 1
+        await asyncio.sleep(0.03)
+        # Nobody left to grant it to: the token stays in the bucket
+        assert bucket.tokens == 1
+        await asyncio.wait_for(limiter.acquire(PRIORITY_BULK), 1)
+        assert bucket.tokens == 0
+
+    asyncio.run(scenario())
+
+
+def test_sqlite_bucket_is_shared_between_processes_using_one_file(tmp_path):
+    path = str(tmp_path / "coordination.sqlite")
+    # One token per 1000 s: nothing refills while the test runs
+    first = SQLiteTokenBucket(path, "gleif", rate=0.001, capacity=2)
+    second = SQLiteTokenBucket(path, "gleif", rate=0.001, capacity=2)
+    other = SQLiteTokenBucket(path, "other", rate=0.001, capacity=2)
+
+    async def scenario() -> None:
+        assert await first.take() == 0
+        assert await second.take() == 0
+        wait = await first.take()
+        assert 900 < wait <= 1000
+        assert await other.take() == 0
+        await second.give_back()
+        assert await first.take() == 0
+
+    asyncio.run(scenario())
+    assert first.describe() == {"backend": "sqlite", "path": path}
+
+
+class _FakeRedis:
+    """Stands in for redis.asyncio: records script calls and answers with a fixed wait."""
+
+    def __init__(self, answer: str) -> None:
+        self.answer = answer
+        self.calls = []
+
+    def register_script(self, script: str):
+        assert "HSET" in script
+
+        async def run(keys, args):
+            self.calls.append((keys, args))
+            return self.answer
+
+        return run
+
+
+def test_redis_bucket_runs_the_script_on_its_key(monkeypatch):
+    client = _FakeRedis("0.25")
+    monkeypatch.setattr(main, "aioredis", SimpleNamespace(from_url=lambda url: client))
+    bucket = RedisTokenBucket("redis://example:6379/0", "gleif", rate=0.5, capacity=5)
+
+    async def scenario() -> None:
+        assert await bucket.take() == 0.25
+        await bucket.give_back()
+
+    asyncio.run(scenario())
+    assert client.calls == [(["gleif:bucket:gleif"], [0.5, 5, -1]), (["gleif:bucket:gleif"], [0.5, 5, 1])]
+
+
+def test_redis_bucket_needs_the_redis_package(monkeypatch):
+    monkeypatch.setattr(main, "aioredis", None)
+    with pytest.raises(RuntimeError, match="redis"):
+        RedisTokenBucket("redis://example:6379/0", "gleif", rate=0.5, capacity=5)
@@ -0,0 +1,84 @@
+import asyncio
+
+from app import main
+from bench.fake_gleif import group_lei
+
+ROOT = group_lei(0, 0)
+UNKNOWN = group_lei(0, 9999)
+
+
+def _response_cache_hits() -> float:
+    return sum(value for _, labels, value in main._response_cache.samples() if labels["result"] == "hit")
+
+
+def test_if_none_match_gets_304_from_the_cached_body(gleif, api):
+    async def scenario() -> None:
+        async with api() as client:
+            first = await client.get(f"/api/lei/{ROOT}")
+            etag = first.headers["etag"]
+            assert first.headers["cache-control"] == "public, max-age=300"
+            hits = _response_cache_hits()
+            again = await client.get(f"/api/lei/{ROOT}", headers={"If-None-Match": f'"other", {etag}'})
+            assert again.status_code == 304
+            assert again.content == b""
+            assert again.headers["etag"] == etag
+            # Unrelated query parameters share the entry
+            other = await client.get(f"/api/lei/{ROOT}", params={"utm_source": "mail"})
+            assert other.status_code == 200
+            assert other.headers["etag"] == etag
+            assert _response_cache_hits() == hits + 2
+            assert dict(gleif.calls) == {"lei-records/{lei}": 1}
+
+    asyncio.run(scenario())
+
+
+def test_compressed_variant_has_its_own_etag(gleif, api):
+    async def scenario() -> None:
+        async with api() as client:
+            plain = await client.get(f"/api/lei/{ROOT}/hierarchy/flat", headers={"Accept-Encoding": "identity"})
+            packed = await client.get(f"/api/lei/{ROOT}/hierarchy/flat", headers={"Accept-Encoding": "gzip"})
+            assert packed.headers["content-encoding"] == "gzip"
+            assert packed.headers["etag"] == plain.headers["etag"][:-1] + '-gzip"'
+            assert "Accept-Encoding" in packed.headers["vary"]
+            assert packed.content == plain.content  # decoded by httpx
+            revalidated = await client.get(
+                f"/api/lei/{ROOT}/hierarchy/flat",
+                headers={"Accept-Encoding": "gzip", "If-None-Match": packed.headers["etag"]},
+            )
+            assert revalidated.status_code == 304
+
+    asyncio.run(scenario())
+
+
+def test_unknown_lei_is_not_cached(gleif, api):
+    async def scenario() -> None:
+        async with api() as client:
+            for _ in range(2):
+                r = await client.get(f"/api/lei/{UNKNOWN}")
+                assert r.status_code == 200 and r.json() is None
+            assert gleif.calls["lei-records/{lei}"] == 2
+
+    asyncio.run(scenario())
+
+
+def test_refreshed_source_gives_a_new_etag(gleif, api):
+    async def scenario() -> None:
+        async with api() as client:
+            first = await client.get(f"/api/lei/{ROOT}")
+            assert first.json()["legalName"] == gleif.names[ROOT]
+            etag = first.headers["etag"]
+            hits = _response_cache_hits()
+            again = await client.get(f"/api/lei/{ROOT}", headers={"If-None-Match": etag})
+            assert again.status_code == 304
+            assert _response_cache_hits() == hits + 1
+
+            gleif.names[ROOT] = "After Refresh AG"
+            await main._refresh_lei(ROOT)
+            refreshed = await client.get(f"/api/lei/{ROOT}", headers={"If-None-Match": etag})
+            assert refreshed.status_code == 200
+            assert refreshed.json()["legalName"] == "After Refresh AG"
+            assert refreshed.headers["etag"] != etag
+            assert _response_cache_hits() == hits + 1
+            assert gleif.calls["lei-records/{lei}"] == 2
+
+    asyncio.run(scenario())
@@ -0,0 +1,59 @@
+import asyncio
+import json
+
+import httpx
+from fastapi import HTTPException
+
+from app import main
+from bench.fake_gleif import group_lei
+
+ROOT = group_lei(0, 0)
+LEAF = group_lei(0, 9)
+
+
+def _get(api, path: str, **params) -> httpx.Response:
+    async def fetch() -> httpx.Response:
+        async with api() as client:
+            return await client.get(path, params=params)
+
+    return asyncio.run(fetch())
+
+
+def test_view_returns_the_requested_parts(gleif, api):
+    r = _get(api, f"/api/lei/{ROOT}/view", include="children,childCounts")
+    view = r.json()
+    assert view["lei"] == ROOT
+    assert [row["lei"] for row in view["children"]] == gleif.children[ROOT]
+    assert view["childCounts"] == {ROOT: 3, **{lei: 2 for lei in gleif.children[ROOT]}}
+    assert view["ultimateParent"] is None and view["shape"] is None
+
+    view = _get(api, f"/api/lei/{LEAF}/view", root="true").json()
+    assert view["lei"] == ROOT
+    assert view["ultimateParent"]["lei"] == ROOT
+    assert view["shape"]["visitedCount"] == len(gleif.members[0])
+    assert view["shape"]["maxDepth"] == 2
+
+    assert _get(api, f"/api/lei/{ROOT}/view", include="children,nope").status_code == 400
+
+
+def test_child_counts_stop_at_the_configured_number_of_children(gleif, api, monkeypatch):
+    monkeypatch.setattr(main, "VIEW_CHILD_COUNTS_MAX", 2)
+    counts = _get(api, f"/api/lei/{ROOT}/view", include="childCounts").json()["childCounts"]
+    assert counts == {ROOT: 3, **{lei: 2 for lei in gleif.children[ROOT][:2]}}
+    assert gleif.calls["lei-records/{lei}/direct-children"] == 3
+
+
+def test_ndjson_view_sends_each_part_and_reports_a_failed_one(gleif, api, monkeypatch):
+    async def no_shape(root_lei, **kwargs):
+        raise HTTPException(status_code=502, detail="GLEIF upstream not available")
+
+    monkeypatch.setattr(main, "_compute_hierarchy_shape", no_shape)
+    r = _get(api, f"/api/lei/{LEAF}/view", root="true", stream="ndjson")
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    parts = {msg["part"]: msg for msg in map(json.loads, r.text.splitlines())}
+    assert set(parts) == set(main._VIEW_PARTS)
+    # The page falls back to fetching the shape on its own
+    assert parts["shape"] == {"part": "shape", "error": "GLEIF upstream not available"}
+    assert parts["ultimateParent"]["data"]["lei"] == ROOT
+    assert [row["lei"] for row in parts["children"]["data"]] == gleif.children[ROOT]
+    assert parts["childCounts"]["data"][ROOT] == 3
@@ -32,6 +32,28 @@ interface LazyNode {
   children?: LazyNode[]
 }
 
+type FlatNode = { parentLei: string | null; entity: Row }
+
+// Dictionary-encoded column layout served by /hierarchy/flat on request
+const COLUMNAR_JSON = "application/vnd.gleif.columnar+json"
+type Column = unknown[] | { dictionary: unknown[]; codes: number[] }
+type ColumnarFlat = { count: number; parents: number[]; columns: Record<string, Column> }
+
+function decodeColumnar(payload: ColumnarFlat): FlatNode[] {
+  const fields = Object.entries(payload.columns)
+  const leis = payload.columns.lei as string[]
+  const nodes: FlatNode[] = new Array(payload.count)
+  for (let i = 0; i < payload.count; i++) {
+    const entity: Record<string, unknown> = {}
+    for (const [field, column] of fields) {
+      entity[field] = Array.isArray(column) ? column[i] : column.dictionary[column.codes[i]]
+    }
+    const parent = payload.parents[i]
+    nodes[i] = { parentLei: parent >= 0 ? leis[parent] : null, entity: entity as Row }
+  }
+  return nodes
+}
+
 export function HierarchyPage() {
   const API_BASE = (import.meta as any).env?.VITE_API_BASE_URL || "http://localhost:8000"
   const [searchLEI, setSearchLEI] = useState("")
@@ -45,6 +67,10 @@ export function HierarchyPage() {
   const deepRunIdRef = useRef(0)
   const [deepStatus, setDeepStatus] = useState<{ loaded: number; total: number | null; inProgress: boolean }>({ loaded: 0, total: null, inProgress: false })
   const abortControllersRef = useRef<Set<AbortController>>(new Set())
+  // Root LEI whose shape is loaded or being fetched on its own
+  const shapeLeiRef = useRef<string | null>(null)
+  // Root LEI whose shape is expected in the /view stream still being read
+  const streamShapeLeiRef = useRef<string | null>(null)
 
   const abortAll = () => {
     for (const ac of abortControllersRef.current) {
@@ -114,18 +140,40 @@ export function HierarchyPage() {
     setExpandedNodes(newExpanded)
   }
 
+  // Only the rows: the children's own counts come from the visible-node count
+  // loader below, so expanding a big node doesn't wait on a count per child
   const fetchChildren = async (lei: string): Promise<LazyNode[]> => {
     const ac = new AbortController()
     abortControllersRef.current.add(ac)
     let res: Response
     try {
-      res = await fetch(`${API_BASE}/api/lei/${encodeURIComponent(lei)}/children`, { signal: ac.signal })
+      res = await fetch(`${API_BASE}/api/lei/${encodeURIComponent(lei)}/view?include=children`, { signal: ac.signal })
     } finally {
       abortControllersRef.current.delete(ac)
     }
     if (!res.ok) throw new Error(`HTTP ${res.status}`)
-    const rows = (await res.json()) as Row[]
-    return rows.map((r) => ({ entity: r, hasFetched: false, children: [] }))
+    const view = (await res.json()) as { children?: Row[] }
+    return (view.children || []).map((r) => ({ entity: r, hasFetched: false, children: [] }))
+  }
+
+  // Read an NDJSON response as it arrives, one parsed object per line
+  const readNdjson = async (res: Response, onLine: (msg: any) => void) => {
+    if (!res.body) return
+    const reader = res.body.getReader()
+    const decoder = new TextDecoder()
+    let buffered = ''
+    for (;;) {
+      const { done, value } = await reader.read()
+      buffered += decoder.decode(value, { stream: !done })
+      let nl = buffered.indexOf('\n')
+      while (nl >= 0) {
+        const line = buffered.slice(0, nl).trim()
+        buffered = buffered.slice(nl + 1)
+        if (line) onLine(JSON.parse(line))
+        nl = buffered.indexOf('\n')
+      }
+      if (done) break
+    }
   }
 
   const renderHierarchyNode = (node: LazyNode, depth: number): React.ReactNode => {
@@ -207,53 +255,58 @@ export function HierarchyPage() {
     setIsLoading(true)
     setProgress({ current: 0, total: 0 })
     try {
-      // Load only ultimate parent row for lazy root
-      const ac1 = new AbortController()
-      abortControllersRef.current.add(ac1)
-      const res = await fetch(`${API_BASE}/api/lei/${encodeURIComponent(q)}/ultimate-parent/row`, { signal: ac1.signal })
-      abortControllersRef.current.delete(ac1)
-      if (!res.ok) throw new Error(`HTTP ${res.status}`)
-      const rootRow = (await res.json()) as Row | null
-      const rootNode: LazyNode | null = rootRow ? { entity: rootRow, hasFetched: false, children: [] } : null
-      setTree(rootNode)
-      const next = new Set<string>()
-      if (rootRow?.lei) next.add(rootRow.lei)
-      setExpandedNodes(next)
-
-      // If possible, set an expected total upfront so the UI doesn't stay in "Preparing..."
-      let expectedTotal: number | null = null
-      if (rootRow?.lei) {
-        try {
-          const ac2 = new AbortController()
-          abortControllersRef.current.add(ac2)
-          const cntRes = await fetch(`${API_BASE}/api/lei/${encodeURIComponent(rootRow.lei)}/direct-children/count`, { signal: ac2.signal })
-          abortControllersRef.current.delete(ac2)
-          if (cntRes.ok) {
-            const cnt = await cntRes.json()
-            const total = Number(cnt) || 0
-            expectedTotal = total
-            setProgress({ current: 0, total })
+      // One request for the root row, its children, their child counts and the
+      // shape; the backend streams each part as soon as it is resolved
+      const ac = new AbortController()
+      abortControllersRef.current.add(ac)
+      const loaded: { root: Row | null; rows: Row[] | null; attached: boolean; shape: boolean } = { root: null, rows: null, attached: false, shape: false }
+      try {
+        const res = await fetch(`${API_BASE}/api/lei/${encodeURIComponent(q)}/view?root=true&stream=ndjson`, { signal: ac.signal })
+        if (!res.ok) throw new Error(`HTTP ${res.status}`)
+        await readNdjson(res, (msg) => {
+          if (msg.error) {
+            console.warn(`Hierarchy view part ${msg.part} failed`, msg.error)
+            return
           }
-        } catch {}
-      }
-
-      // Fetch first-level (direct) children in one request and attach immediately
-      if (rootRow) {
-        const ac3 = new AbortController()
-        abortControllersRef.current.add(ac3)
-        const rowsRes = await fetch(`${API_BASE}/api/lei/${encodeURIComponent(rootRow.lei)}/children`, { signal: ac3.signal })
-        abortControllersRef.current.delete(ac3)
-        if (rowsRes.ok) {
-          const rows = (await rowsRes.json()) as Row[]
-          setTree({
-            entity: rootRow,
-            hasFetched: true,
-            children: rows.map((r) => ({ entity: r, hasFetched: false, children: [] })),
-          })
-          setProgress({ current: rows.length, total: expectedTotal ?? rows.length })
-          setEtaSec(0)
+          if (msg.part === 'ultimateParent') {
+            loaded.root = msg.data as Row | null
+            if (loaded.root?.lei) {
+              // The shape should arrive in this same stream; don't fetch it meanwhile
+              streamShapeLeiRef.current = loaded.root.lei
+              setTree({ entity: loaded.root, hasFetched: false, children: [] })
+              setExpandedNodes(new Set([loaded.root.lei]))
+            }
+          } else if (msg.part === 'children') {
+            loaded.rows = msg.data as Row[]
+          } else if (msg.part === 'childCounts') {
+            const counts = msg.data as Record<string, number>
+            setChildCounts((prev) => ({ ...prev, ...counts }))
+          } else if (msg.part === 'shape') {
+            loaded.shape = true
+            setShape(msg.data)
+          }
+          if (loaded.root && loaded.rows && !loaded.attached) {
+            loaded.attached = true
+            setTree({
+              entity: loaded.root,
+              hasFetched: true,
+              children: loaded.rows.map((r) => ({ entity: r, hasFetched: false, children: [] })),
+            })
+            setProgress({ current: loaded.rows.length, total: loaded.rows.length })
+            setEtaSec(0)
+          }
+        })
+      } finally {
+        abortControllersRef.current.delete(ac)
+        const rootLei = loaded.root?.lei
+        if (rootLei && streamShapeLeiRef.current === rootLei) {
+          streamShapeLeiRef.current = null
+          if (loaded.shape) shapeLeiRef.current = rootLei
+          // The shape part failed or never came; fetch it on its own
+          else if (!ac.signal.aborted) loadShape(rootLei)
         }
       }
+      if (!loaded.root) setTree(null)
     } catch (e) {
       console.error("Failed to load hierarchy", e)
       setTree(null)
@@ -338,11 +391,13 @@ export function HierarchyPage() {
         abortControllersRef.current.add(ac)
         const res = await fetch(
           `${API_BASE}/api/lei/${encodeURIComponent(rootLei)}/hierarchy/flat`,
-          { signal: ac.signal }
+          { signal: ac.signal, headers: { Accept: `${COLUMNAR_JSON}, application/json;q=0.9` } }
         )
         abortControllersRef.current.delete(ac)
         if (!res.ok) throw new Error(`HTTP ${res.status}`)
-        const flatNodes = (await res.json()) as { parentLei: string | null; entity: Row }[]
+        const flatNodes = res.headers.get("content-type")?.startsWith(COLUMNAR_JSON)
+          ? decodeColumnar((await res.json()) as ColumnarFlat)
+          : ((await res.json()) as FlatNode[])
 
         if (cancelled || deepRunIdRef.current !== runId) return
 
@@ -408,20 +463,24 @@ export function HierarchyPage() {
 
   // Fetch authoritative shape (max depth, direct and ultimate children) from backend for accuracy
   const [shape, setShape] = useState<{ maxDepth: number; directChildrenCount: number; descendantsCount: number; ultimateChildrenCount: number; visitedCount: number } | null>(null)
-  useEffect(() => {
-    const loadShape = async () => {
-      const lei = tree?.entity?.lei
-      if (!lei) return
-      try {
-        const ac = new AbortController()
-        abortControllersRef.current.add(ac)
-        const res = await fetch(`${API_BASE}/api/lei/${encodeURIComponent(lei)}/hierarchy/shape`, { signal: ac.signal })
-        if (!res.ok) return
-        const json = await res.json()
-        setShape(json)
-      } catch {}
+  const loadShape = async (lei: string) => {
+    if (shapeLeiRef.current === lei) return
+    shapeLeiRef.current = lei
+    const ac = new AbortController()
+    abortControllersRef.current.add(ac)
+    try {
+      const res = await fetch(`${API_BASE}/api/lei/${encodeURIComponent(lei)}/hierarchy/shape`, { signal: ac.signal })
+      if (!res.ok) return
+      const json = await res.json()
+      setShape(json)
+    } catch {} finally {
+      abortControllersRef.current.delete(ac)
     }
-    loadShape()
+  }
+  useEffect(() => {
+    const lei = tree?.entity?.lei
+    if (!lei || streamShapeLeiRef.current === lei) return
+    loadShape(lei)
     // eslint-disable-next-line react-hooks/exhaustive-deps
   }, [tree?.entity?.lei])
 